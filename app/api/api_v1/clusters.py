@@ -0,0 +1,104 @@
+"""Klasteri markera za udaljene nivoe zuma (GET /api/dogs/clusters).
+
+Svet se deli na pločice (app.db.spatial.Tile), a svaka pločica na
+CLUSTER_GRID_SIZE x CLUSTER_GRID_SIZE ćelija. Klaster je skup vidljivih
+pasa u jednoj ćeliji: broj, težište i broj po statusu. Agregacija se radi
+jednim GROUP BY upitom za sve pločice koje nisu u kešu, a rezultat se
+kešira po pločici kao gotov JSON - upisi poništavaju keš zajedno sa ostalim
+odgovorima pasa (invalidate_dog_responses).
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.api_v1.utils import dump_json, response_cache_fillable, response_cache_usable
+from app.core.config import settings
+from app.core.response_cache import CachedResponse, cache_key, response_cache
+from app.db import spatial
+from app.db.models import Dog, dog_is_visible
+from app.schemas.dog import DogClusterList
+
+
+def _tile_key(tile: spatial.Tile) -> str:
+    return cache_key("clusters", grid=settings.CLUSTER_GRID_SIZE, tile=f"{tile.zoom}/{tile.x}/{tile.y}")
+
+
+def cluster_query(dialect_name: str, zoom: int, area: spatial.BoundingBox):
+    """(cell_x, cell_y, status, count, sum lat, sum lng, min id) po ćeliji i statusu unutar area"""
+    cell = spatial.tile_size(zoom) / settings.CLUSTER_GRID_SIZE
+    cell_x = spatial.grid_index(dialect_name, Dog.longitude, -180.0, cell).label("cell_x")
+    cell_y = spatial.grid_index(dialect_name, Dog.latitude, -90.0, cell).label("cell_y")
+    query = (
+        select(
+            cell_x, cell_y, Dog.status,
+            func.count(Dog.id), func.sum(Dog.latitude), func.sum(Dog.longitude), func.min(Dog.id)
+        )
+        .where(dog_is_visible)
+        .group_by(cell_x, cell_y, Dog.status)
+    )
+    return spatial.filter_bbox(query, dialect_name, Dog.id, Dog.latitude, Dog.longitude, area)
+
+
+async def _aggregate(db: AsyncSession, tiles: List[spatial.Tile]) -> Dict[spatial.Tile, bytes]:
+    """Klasteri za date pločice (istog zuma) jednim upitom; vraća JSON stavke bez [ ] po pločici"""
+    zoom = tiles[0].zoom
+    grid = settings.CLUSTER_GRID_SIZE
+    count_x, count_y = spatial.tile_counts(zoom)
+
+    bounds = [spatial.tile_bbox(tile) for tile in tiles]
+    area = spatial.BoundingBox(
+        min(b.min_lng for b in bounds), min(b.min_lat for b in bounds),
+        max(b.max_lng for b in bounds), max(b.max_lat for b in bounds),
+    )
+
+    query = cluster_query(db.bind.dialect.name, zoom, area)
+
+    cells = defaultdict(lambda: {"count": 0, "lat": 0.0, "lng": 0.0, "statuses": {}, "dog_id": None})
+    for x, y, status, count, lat_sum, lng_sum, min_id in (await db.execute(query)).all():
+        # Tačke na 180°/90° padaju u poslednju ćeliju, ne van mreže
+        x, y = min(x, count_x * grid - 1), min(y, count_y * grid - 1)
+        item = cells[(x, y)]
+        item["count"] += count
+        item["lat"] += lat_sum
+        item["lng"] += lng_sum
+        item["statuses"][status.value] = item["statuses"].get(status.value, 0) + count
+        item["dog_id"] = min_id
+
+    wanted = set(tiles)
+    by_tile: Dict[spatial.Tile, list] = {tile: [] for tile in tiles}
+    for (x, y), item in sorted(cells.items()):
+        # Ćelija pripada tačno jednoj pločici - tako se granične tačke ne broje dvaput
+        tile = spatial.Tile(zoom, x // grid, y // grid)
+        if tile not in wanted:
+            continue
+        by_tile[tile].append({
+            "latitude": item["lat"] / item["count"],
+            "longitude": item["lng"] / item["count"],
+            "count": item["count"],
+            "statuses": item["statuses"],
+            "dog_id": item["dog_id"] if item["count"] == 1 else None,
+        })
+    return {tile: dump_json(DogClusterList, clusters)[1:-1] for tile, clusters in by_tile.items()}
+
+
+async def tile_clusters(db: AsyncSession, tiles: List[spatial.Tile]) -> List[bytes]:
+    """JSON klastera po pločici (bez [ ]), iz keša gde je moguće"""
+    generation = await response_cache.generation() if response_cache_usable(db) else None
+    found: Dict[spatial.Tile, Optional[bytes]] = {}
+    if generation is not None:
+        for tile in tiles:
+            cached = await response_cache.get(generation, _tile_key(tile))
+            if cached is not None:
+                found[tile] = cached.body
+
+    missing = [tile for tile in tiles if tile not in found]
+    if missing:
+        computed = await _aggregate(db, missing)
+        fill = generation is not None and response_cache_fillable(generation)
+        for tile, body in computed.items():
+            found[tile] = body
+            if fill:
+                await response_cache.set(generation, _tile_key(tile), CachedResponse(body))
+    return [found[tile] for tile in tiles]
@@ -0,0 +1,47 @@
+"""Uslovni GET (ETag / Last-Modified) za JSON endpointe.
+
+Validatori se računaju jeftinim upitom (id, updated_at, skup slika...) pre
+učitavanja relacija i serijalizacije, pa klijent koji već ima aktuelnu
+verziju dobija 304 bez tela.
+"""
+import hashlib
+from email.utils import parsedate_to_datetime
+from typing import Any, NamedTuple, Optional
+
+from starlette.datastructures import Headers
+
+from app.core.static_files import etag_matches
+
+
+class ResourceVersion(NamedTuple):
+    etag: str
+    last_modified: Optional[str] = None  # HTTP datum
+    data: Any = None  # ono što je validacioni upit već učitao, za render
+
+
+def make_etag(*parts) -> str:
+    """Jak ETag od delova verzije; isti delovi uvek daju iste bajtove odgovora"""
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def validator_headers(etag: str, last_modified: Optional[str]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+
+def is_not_modified(request_headers: Headers, etag: str, last_modified: Optional[str]) -> bool:
+    """If-None-Match ima prednost; If-Modified-Since se gleda samo bez njega"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
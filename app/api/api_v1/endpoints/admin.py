@@ -1,39 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from datetime import datetime
-import os
+from typing import Literal
 
-from app.db.database import get_db
+from app.db.database import db_router, get_db
 from app.db.models import Dog, User, DogStatus, DogImage
-from app.schemas.dog import Dog as DogSchema
+from app.schemas.dog import Dog as DogSchema, DogModerationRequest, DogModerationResult, DogPage
 from app.schemas.user import User as UserSchema
-from app.api.deps import get_admin_user
-from app.api.api_v1.utils import convert_dog_to_schema
+from app.core.config import settings
+from app.core.events import dog_events
+from app.core.images import purge_unused_blobs, release_image
+from app.core.profiling import profile_pstats, profile_report, profiles, slow_queries
+from app.core.response_cache import invalidate_dog_responses, response_cache
+from app.core.storage import delete_uploads
+from app.api.deps import get_admin_user, get_read_db, invalidate_user_cache, auth_cache_stats
+from app.api.api_v1.utils import (
+    dog_query, get_dog_or_404, json_response, moderate_pending_dogs, publish_dog_event
+)
+from app.api.api_v1.pagination import PageParams, page_params, paginate
 
 router = APIRouter()
 
-@router.get("/dogs/pending", response_model=List[DogSchema])
-def get_pending_dogs(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+@router.get("/dogs/pending", response_model=DogPage)
+async def get_pending_dogs(
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: UserSchema = Depends(get_admin_user)
 ):
     """Lista pasa koji čekaju potvrdu spašavanja"""
-    pending_dogs = db.query(Dog).filter(
-        Dog.status == DogStatus.PENDING_ADMIN
-    ).order_by(Dog.created_at.desc()).all()
+    query = dog_query().where(Dog.status == DogStatus.PENDING_ADMIN)
+    pending_dogs, next_cursor = await paginate(db, query, Dog.created_at, Dog.id, page)
     
-    # Konvertuj svaki dog u schema format
-    return [convert_dog_to_schema(dog) for dog in pending_dogs]
+    return json_response(DogPage, {"items": pending_dogs, "next_cursor": next_cursor})
+
+@router.post("/dogs/confirm", response_model=DogModerationResult)
+async def confirm_dog_rescues(
+    request: DogModerationRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(get_admin_user)
+):
+    """Potvrda više spašavanja odjednom; ishod po id-u (updated / not_found / not_pending)"""
+    result = await moderate_pending_dogs(db, request.ids, DogStatus.CONFIRMED)
+    return json_response(DogModerationResult, result)
+
+@router.post("/dogs/reject", response_model=DogModerationResult)
+async def reject_dog_rescues(
+    request: DogModerationRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(get_admin_user)
+):
+    """Odbijanje više spašavanja odjednom - psi se vraćaju u reported"""
+    result = await moderate_pending_dogs(db, request.ids, DogStatus.REPORTED, picked_up_by_user_id=None)
+    return json_response(DogModerationResult, result)
 
 @router.post("/dogs/{id}/confirm", response_model=DogSchema)
-def confirm_dog_rescue(
+async def confirm_dog_rescue(
     id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(get_admin_user)
 ):
     """Admin potvrđuje da je pas zaista spašen → status confirmed"""
-    dog = db.query(Dog).filter(Dog.id == id).first()
+    dog = await db.get(Dog, id)
     if not dog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -50,25 +80,23 @@ def confirm_dog_rescue(
     dog.status = DogStatus.CONFIRMED
     dog.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(dog)
+    await db.commit()
+    await invalidate_dog_responses()
     
-    # Učitaj relationships
-    if dog.reporter_id:
-        dog.reporter = db.query(User).filter(User.id == dog.reporter_id).first()
-    if dog.picked_up_by_user_id:
-        dog.picked_up_by = db.query(User).filter(User.id == dog.picked_up_by_user_id).first()
+    # Učitaj psa zajedno sa relationships (konstantan broj upita)
+    dog = await get_dog_or_404(db, dog.id)
+    publish_dog_event("dog.updated", dog)
     
-    return convert_dog_to_schema(dog)
+    return json_response(DogSchema, dog)
 
 @router.post("/dogs/{id}/reject", response_model=DogSchema)
-def reject_dog_rescue(
+async def reject_dog_rescue(
     id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(get_admin_user)
 ):
     """Admin odbija spašavanje → vraća psa u reported"""
-    dog = db.query(Dog).filter(Dog.id == id).first()
+    dog = await db.get(Dog, id)
     if not dog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -86,23 +114,21 @@ def reject_dog_rescue(
     dog.picked_up_by_user_id = None
     dog.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(dog)
+    await db.commit()
+    await invalidate_dog_responses()
     
-    # Učitaj relationships
-    if dog.reporter_id:
-        dog.reporter = db.query(User).filter(User.id == dog.reporter_id).first()
-    if dog.picked_up_by_user_id:
-        dog.picked_up_by = db.query(User).filter(User.id == dog.picked_up_by_user_id).first()
+    # Učitaj psa zajedno sa relationships (konstantan broj upita)
+    dog = await get_dog_or_404(db, dog.id)
+    publish_dog_event("dog.updated", dog)
     
-    return convert_dog_to_schema(dog)
+    return json_response(DogSchema, dog)
 
 @router.patch("/users/{id}/role")
-def update_user_role(
+async def update_user_role(
     id: int,
     is_admin: bool,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(get_admin_user)
 ):
     """Dodela admin prava korisniku"""
     if id == current_user.id:
@@ -111,7 +137,7 @@ def update_user_role(
             detail="Cannot change your own admin status"
         )
     
-    user = db.query(User).filter(User.id == id).first()
+    user = await db.get(User, id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -119,33 +145,86 @@ def update_user_role(
         )
     
     user.is_admin = is_admin
-    db.commit()
+    await db.commit()
+    invalidate_user_cache(user.id)
     
     return {"message": f"User {'promoted to' if is_admin else 'removed from'} admin"}
 
+@router.get("/cache/stats")
+async def get_cache_stats(current_user: UserSchema = Depends(get_admin_user)):
+    """Statistika in-process keševa (pogoci, promašaji, izbacivanja)"""
+    return {
+        **auth_cache_stats(),
+        "responses": await response_cache.stats(),
+        "dog_stream": dog_events.stats(),
+        "db_routing": db_router.stats(),
+    }
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: UserSchema = Depends(get_admin_user)
+):
+    """Poslednji SQL upiti duži od SLOW_QUERY_MS, sa rutom i parametrima zahteva; najnoviji prvi"""
+    return {
+        "threshold_ms": settings.SLOW_QUERY_MS,
+        "recorded": slow_queries.recorded,
+        "items": slow_queries.entries(limit),
+    }
+
+@router.get("/profiles")
+async def get_profiles(current_user: UserSchema = Depends(get_admin_user)):
+    """Sačuvani profili zahteva poslatih sa X-Profile headerom; najnoviji prvi"""
+    return {"items": profiles.summaries()}
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Literal["text", "pstats"] = "text",
+    sort: Literal["cumulative", "tottime", "calls"] = "cumulative",
+    limit: int = Query(50, ge=1, le=1000),
+    current_user: UserSchema = Depends(get_admin_user)
+):
+    """Izveštaj profila (upiti + najskuplje funkcije) ili pstats fajl za snakeviz/pstats"""
+    profile = profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    if format == "pstats":
+        return Response(
+            content=profile_pstats(profile),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'},
+        )
+    return PlainTextResponse(profile_report(profile, sort, limit))
+
 @router.delete("/dog-images/{image_id}")
-def delete_dog_image(
+async def delete_dog_image(
     image_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_admin_user)
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(get_admin_user)
 ):
     """Briše određenu sliku (admin)"""
-    image = db.query(DogImage).filter(DogImage.id == image_id).first()
+    image = await db.scalar(
+        select(DogImage).options(selectinload(DogImage.variants)).where(DogImage.id == image_id)
+    )
     if not image:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Image not found"
         )
     
-    # Delete file from filesystem
-    image_path = os.path.join("uploads", image.filename)
-    if os.path.exists(image_path):
-        try:
-            os.remove(image_path)
-        except Exception:
-            pass  # Continue even if file deletion fails
+    # Fajl i varijante se brišu samo ako ih nijedna druga slika ne koristi
+    unused_files = await release_image(db, image)
+    await db.execute(update(Dog).where(Dog.id == image.dog_id).values(updated_at=datetime.utcnow()))
+    
+    await db.delete(image)
+    await db.commit()
+    await invalidate_dog_responses()
     
-    db.delete(image)
-    db.commit()
+    delete_uploads(unused_files)
+    await purge_unused_blobs(db, [image.filename])
     
     return {"message": "Image deleted successfully"}
@@ -1,22 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 
 from app.db.database import get_db
 from app.db.models import User
 from app.schemas.user import UserCreate, UserLogin, User as UserSchema, Token
 from app.schemas.auth import RefreshTokenRequest
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token, verify_token
+from app.core.security import (
+    verify_password_async, get_password_hash_async, password_needs_rehash,
+    create_access_token, create_refresh_token, verify_token
+)
 from app.core.config import settings
 from app.api.deps import get_current_user, get_current_active_user
 
 router = APIRouter()
 
 @router.post("/signup", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
-def signup(user: UserCreate, db: Session = Depends(get_db)):
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Registracija novog korisnika"""
     # Check if user already exists
-    db_user = db.query(User).filter(User.email == user.email).first()
+    db_user = await db.scalar(select(User).where(User.email == user.email))
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -24,7 +28,7 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         email=user.email,
         hashed_password=hashed_password,
@@ -33,17 +37,17 @@ def signup(user: UserCreate, db: Session = Depends(get_db)):
         is_active=True
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     """Prijava korisnika - vraća access token i refresh token"""
     # Authenticate user
-    user = db.query(User).filter(User.email == user_credentials.email).first()
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == user_credentials.email))
+    if not user or not await verify_password_async(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -56,6 +60,11 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
             detail="Inactive user"
         )
     
+    # Transparentno obnovi hash ako je BCRYPT_ROUNDS promenjen
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(user_credentials.password)
+        await db.commit()
+    
     # Create tokens
     access_token = create_access_token(data={"sub": str(user.id)})
     refresh_token = create_refresh_token(data={"sub": str(user.id)})
@@ -67,7 +76,7 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     }
 
 @router.post("/refresh", response_model=Token)
-def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
+async def refresh_token(request: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
     """Osvežavanje access tokena pomoću refresh tokena"""
     try:
         payload = verify_token(request.refresh_token)
@@ -88,7 +97,7 @@ def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
             )
         
         # Verify user exists and is active
-        user = db.query(User).filter(User.id == int(user_id)).first()
+        user = await db.get(User, int(user_id))
         if not user or not user.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -113,7 +122,7 @@ def refresh_token(request: RefreshTokenRequest, db: Session = Depends(get_db)):
         )
 
 @router.post("/logout")
-def logout():
+async def logout():
     """Poništavanje refresh tokena - u produkciji bi se čuvao u bazi i invalidirao"""
     return {"message": "Successfully logged out"}
 
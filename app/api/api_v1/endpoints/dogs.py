@@ -1,61 +1,280 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status, Query, Request, UploadFile, File
+from fastapi.responses import Response, StreamingResponse
+from fastapi import status as status_codes
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
-import os
-import uuid
 
 from app.db.database import get_db
-from app.db.models import Dog, DogImage, User, DogStatus
-from app.schemas.dog import DogCreate, DogUpdate, Dog as DogSchema, DogList
-from app.api.deps import get_current_user, get_current_active_user
+from app.db.models import Dog, DogChange, DogImage, DogStatus, dog_is_visible
+from app.schemas.dog import (
+    DogCreate, DogUpdate, Dog as DogSchema, DogChanges, DogClusters, DogListPage, DogSearchResults
+)
+from app.schemas.user import User as UserSchema
+from app.api.deps import get_current_user, get_current_active_user, get_read_db
 from app.core.config import settings
-from app.api.api_v1.utils import convert_dog_to_schema
+from app.core.storage import UploadTooLarge, discard_upload, save_upload, delete_uploads
+from app.core.images import acquire_blob, create_image_variants, purge_unused_blobs, release_image
+from app.core.events import dog_events, sse_stream
+from app.core.response_cache import cache_key, invalidate_dog_responses
+from app.api.api_v1.conditional import ResourceVersion, make_etag
+from app.api.api_v1.utils import (
+    cached_json_response, dog_query, dog_version_query, get_dog_or_404, get_dog_version_or_404, json_response,
+    load_dogs_in_order, parse_search_terms, publish_dog_event
+)
+from app.api.api_v1.pagination import PageParams, id_keyset_query, page_params, paginate_rows, split_page
+from app.api.api_v1.clusters import tile_clusters
+from app.db import search, spatial
 
 router = APIRouter()
 
-@router.get("/", response_model=List[DogList])
-def get_dogs(
+@router.get("/", response_model=DogListPage)
+async def get_dogs(
+    request: Request,
     status: Optional[DogStatus] = Query(None, description="Filter by status"),
-    lat: Optional[float] = Query(None, description="Latitude for location filtering"),
-    lng: Optional[float] = Query(None, description="Longitude for location filtering"),
-    db: Session = Depends(get_db)
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude for location filtering"),
+    lng: Optional[float] = Query(None, ge=-180, le=180, description="Longitude for location filtering"),
+    radius_km: Optional[float] = Query(
+        None, gt=0, le=settings.MAX_SEARCH_RADIUS_KM,
+        description="Search radius around lat/lng in kilometers"
+    ),
+    bbox: Optional[str] = Query(
+        None, description="Bounding box as min_lng,min_lat,max_lng,max_lat"
+    ),
+    q: Optional[str] = Query(
+        None, max_length=200, description="Only dogs whose title or description contains all words"
+    ),
+    page: PageParams = Depends(page_params),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Lista prijavljenih pasa, opcionalno filtriranje po statusu i lokaciji"""
-    query = db.query(Dog).filter(Dog.status != DogStatus.REMOVED)
+    """Lista prijavljenih pasa, opcionalno filtriranje po statusu, lokaciji i tekstu"""
+    terms = parse_search_terms(q) if q is not None else None
+    dialect_name = db.bind.dialect.name
+    box = None
+    if bbox is not None:
+        try:
+            box = spatial.parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status_codes.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid bbox: {e}"
+            )
+    elif lat is not None and lng is not None:
+        radius_km = radius_km or settings.DEFAULT_SEARCH_RADIUS_KM
+    elif radius_km is not None:
+        raise HTTPException(
+            status_code=status_codes.HTTP_400_BAD_REQUEST,
+            detail="radius_km requires lat and lng"
+        )
+    
+    def apply_filters(query):
+        query = query.where(dog_is_visible)
+        
+        # Filter by status
+        if status:
+            query = query.where(Dog.status == status)
+        
+        # Location filtering preko prostornog indeksa (app/db/spatial.py)
+        if box is not None:
+            query = spatial.filter_bbox(query, dialect_name, Dog.id, Dog.latitude, Dog.longitude, box)
+        elif lat is not None and lng is not None:
+            query = spatial.filter_radius(
+                query, dialect_name, Dog.id, Dog.latitude, Dog.longitude, lat, lng, radius_km
+            )
+        
+        # Pretraga teksta preko FTS5 indeksa (app/db/search.py)
+        if terms:
+            query = search.filter_search(query, dialect_name, Dog.id, Dog.title, Dog.description, terms)
+        return query
+    
+    async def validate():
+        # Stranica se prvo čita samo kao (id, updated_at, skup slika) - dovoljno za ETag
+        query = apply_filters(dog_version_query(detail=False))
+        if terms:
+            # Pogoci dolaze iz indeksa po id-u - sortiranje po created_at bi
+            # značilo čitanje svih pogodaka za česte reči
+            order_col = search.order_column(dialect_name, Dog.id)
+            rows, next_cursor = split_page((await db.execute(id_keyset_query(query, order_col, page))).all(), page)
+        else:
+            rows, next_cursor = await paginate_rows(db, query, Dog.created_at, Dog.id, page)
+        return ResourceVersion(make_etag("dogs", next_cursor, *map(tuple, rows)), data=(rows, next_cursor))
+    
+    async def render(version):
+        rows, next_cursor = version.data
+        items = await load_dogs_in_order(db, [row.id for row in rows])
+        return json_response(DogListPage, {"items": items, "next_cursor": next_cursor})
+    
+    # Ključ od validiranih vrednosti - isti filter zadat različitim zapisom deli stavku
+    key = cache_key(
+        "dogs",
+        status=status.name if status else None,
+        bbox=",".join(map(str, box)) if box else None,
+        near=f"{lat},{lng},{radius_km}" if box is None and lat is not None and lng is not None else None,
+        q=" ".join(terms) if terms else None,
+        limit=page.limit,
+        cursor=page.cursor,
+    )
+    return await cached_json_response(request, db, key, validate, render)
+
+# /search, /clusters, /changes i /stream moraju biti pre /{id}, inače bi bili shvaćeni kao id
+@router.get("/search", response_model=DogSearchResults)
+async def search_dogs(
+    request: Request,
+    q: str = Query(..., max_length=200, description="Words to find in title or description"),
+    status: Optional[DogStatus] = Query(None, description="Filter by status"),
+    limit: int = Query(
+        settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE,
+        description="Maximum number of results"
+    ),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Pretraga po naslovu i opisu, najrelevantniji rezultati prvi"""
+    terms = parse_search_terms(q)
+    
+    async def validate():
+        query = dog_version_query(detail=False).where(dog_is_visible)
+        if status:
+            query = query.where(Dog.status == status)
+        query = search.ranked_search(
+            query, db.bind.dialect.name, Dog.id, Dog.title, Dog.description, terms,
+            settings.SEARCH_MAX_CANDIDATES
+        )
+        rows = (await db.execute(query.limit(limit))).all()
+        return ResourceVersion(make_etag("dogs-search", *map(tuple, rows)), data=rows)
     
-    # Filter by status
-    if status:
-        query = query.filter(Dog.status == status)
+    async def render(version):
+        items = await load_dogs_in_order(db, [row.id for row in version.data])
+        return json_response(DogSearchResults, {"items": items})
     
-    # Simple location filtering (basic implementation)
-    # In production, use PostGIS or more sophisticated distance calculation
-    if lat is not None and lng is not None:
-        # This is a placeholder - implement proper distance calculation if needed
-        pass
+    key = cache_key(
+        "dogs-search", q=" ".join(terms), status=status.name if status else None, limit=limit
+    )
+    return await cached_json_response(request, db, key, validate, render)
+
+@router.get("/clusters", response_model=DogClusters)
+async def get_dog_clusters(
+    bbox: str = Query(..., description="Bounding box as min_lng,min_lat,max_lng,max_lat"),
+    zoom: int = Query(..., ge=0, le=settings.CLUSTER_MAX_ZOOM, description="Map zoom level"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Klasteri pasa (broj, težište, statusi) za prikaz mape na manjem zumu"""
+    try:
+        box = spatial.parse_bbox(bbox)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status_codes.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid bbox: {e}"
+        )
     
-    dogs = query.order_by(Dog.created_at.desc()).all()
+    tiles = spatial.tiles_covering(box, zoom)
+    if len(tiles) > settings.CLUSTER_MAX_TILES:
+        raise HTTPException(
+            status_code=status_codes.HTTP_400_BAD_REQUEST,
+            detail=f"bbox covers {len(tiles)} tiles at zoom {zoom}; use a smaller bbox or lower zoom"
+        )
     
-    return dogs
+    # Pločice su već serijalizovane - odgovor se samo spaja
+    bodies = [body for body in await tile_clusters(db, tiles) if body]
+    content = b'{"zoom":%d,"clusters":[%s]}' % (zoom, b",".join(bodies))
+    return Response(content=content, media_type="application/json")
 
-@router.get("/{id}", response_model=DogSchema)
-def get_dog(id: int, db: Session = Depends(get_db)):
-    """Detalji psa"""
-    dog = db.query(Dog).filter(Dog.id == id).first()
-    if not dog:
+@router.get("/changes", response_model=DogChanges)
+async def get_dog_changes(
+    since: int = Query(0, ge=0, description="Token from the previous response; 0 for a full sync"),
+    limit: int = Query(
+        settings.MAX_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE,
+        description="Maximum number of changed dogs to return"
+    ),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Psi kreirani, izmenjeni ili obrisani posle tokena `since` (sinhronizacija posle prekida)"""
+    # dog_changes ima jedan red po psu, pa odgovor raste sa brojem promena, ne sa bazom
+    changes = (await db.execute(
+        select(DogChange.seq, DogChange.dog_id, DogChange.deleted)
+        .where(DogChange.seq > since)
+        .order_by(DogChange.seq)
+        .limit(limit + 1)
+    )).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    
+    live_ids = [change.dog_id for change in changes if not change.deleted]
+    dogs = (await db.scalars(dog_query(detail=False).where(Dog.id.in_(live_ids)))).all() if live_ids else []
+    by_id = {dog.id: dog for dog in dogs}
+    
+    changed, deleted = [], []
+    for change in changes:
+        dog = by_id.get(change.dog_id)
+        if dog is None or dog.status == DogStatus.REMOVED:
+            deleted.append(change.dog_id)
+        else:
+            changed.append(dog)
+    
+    return json_response(DogChanges, {
+        "changed": changed,
+        "deleted": deleted,
+        "token": changes[-1].seq if changes else since,
+        "has_more": has_more,
+    })
+
+@router.get("/stream")
+async def stream_dogs(
+    bbox: Optional[str] = Query(
+        None, description="Only events for dogs inside min_lng,min_lat,max_lng,max_lat"
+    ),
+    last_event_id: Optional[str] = Header(None, description="Resume after this event id"),
+):
+    """Server-Sent Events: dog.created / dog.updated / dog.deleted umesto polling-a liste"""
+    box = None
+    if bbox is not None:
+        try:
+            box = spatial.parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status_codes.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid bbox: {e}"
+            )
+    
+    def match(event):
+        if box is None:
+            return True
+        # Pas koji je napustio oblast se javlja da bi ga klijent sklonio sa mape
+        return spatial.bbox_contains(box, event.latitude, event.longitude) or (
+            event.previous is not None and spatial.bbox_contains(box, *event.previous)
+        )
+    
+    # Samo provera - pretplata se pravi kada telo odgovora počne da se šalje
+    if not dog_events.has_capacity():
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dog not found"
+            status_code=status_codes.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open streams",
+            headers={"Retry-After": "30"}
         )
     
-    # Konvertuj u schema format
-    return convert_dog_to_schema(dog)
+    return StreamingResponse(
+        sse_stream(dog_events, match, last_event_id),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx ne sme da baferuje stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{id}", response_model=DogSchema)
+async def get_dog(id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    """Detalji psa"""
+    async def render(version):
+        dog = await get_dog_or_404(db, id)
+        return json_response(DogSchema, dog)
+    
+    return await cached_json_response(
+        request, db, cache_key("dog", id=id), lambda: get_dog_version_or_404(db, id), render
+    )
 
 @router.post("/", response_model=DogSchema, status_code=status.HTTP_201_CREATED)
-def create_dog(
+async def create_dog(
     dog: DogCreate,
-    current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Optional[UserSchema] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Unos nove prijave psa"""
     # Create new dog report
@@ -69,24 +288,24 @@ def create_dog(
     )
     
     db.add(db_dog)
-    db.commit()
-    db.refresh(db_dog)
+    await db.commit()
+    await invalidate_dog_responses()
     
-    # Učitaj relationships
-    if db_dog.reporter_id:
-        db_dog.reporter = db.query(User).filter(User.id == db_dog.reporter_id).first()
+    # Učitaj psa zajedno sa relationships (konstantan broj upita)
+    db_dog = await get_dog_or_404(db, db_dog.id)
+    publish_dog_event("dog.created", db_dog)
     
-    return convert_dog_to_schema(db_dog)
+    return json_response(DogSchema, db_dog, status_code=status.HTTP_201_CREATED)
 
 @router.put("/{id}", response_model=DogSchema)
-def update_dog(
+async def update_dog(
     id: int,
     dog_update: DogUpdate,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserSchema = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Izmena prijave psa (samo autor ili admin)"""
-    dog = db.query(Dog).filter(Dog.id == id).first()
+    dog = await db.get(Dog, id)
     if not dog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -100,36 +319,31 @@ def update_dog(
             detail="Not enough permissions"
         )
     
+    previous = (dog.latitude, dog.longitude)
+    
     # Update fields
     update_data = dog_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(dog, field, value)
     
     dog.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(dog)
+    await db.commit()
+    await invalidate_dog_responses()
     
-    # Učitaj relationships
-    if dog.reporter_id:
-        dog.reporter = db.query(User).filter(User.id == dog.reporter_id).first()
-    if dog.picked_up_by_user_id:
-        dog.picked_up_by = db.query(User).filter(User.id == dog.picked_up_by_user_id).first()
+    # Učitaj psa zajedno sa relationships (konstantan broj upita)
+    dog = await get_dog_or_404(db, dog.id)
+    publish_dog_event("dog.updated", dog, previous if previous != (dog.latitude, dog.longitude) else None)
     
-    return convert_dog_to_schema(dog)
+    return json_response(DogSchema, dog)
 
 @router.delete("/{id}")
-def delete_dog(
+async def delete_dog(
     id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserSchema = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Brisanje prijave psa (admin ili autor)"""
-    dog = db.query(Dog).filter(Dog.id == id).first()
-    if not dog:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dog not found"
-        )
+    dog = await get_dog_or_404(db, id, detail=False)
     
     # Check if user can delete (reporter or admin)
     if dog.reporter_id != current_user.id and not current_user.is_admin:
@@ -138,31 +352,33 @@ def delete_dog(
             detail="Not enough permissions"
         )
     
-    # Delete associated images from filesystem
+    # Otpusti slike; fajlovi se brišu tek kada ih nijedna prijava više ne koristi
+    released = [image.filename for image in dog.images]
+    unused_files = []
     for image in dog.images:
-        image_path = os.path.join(settings.UPLOAD_DIR, image.filename)
-        if os.path.exists(image_path):
-            try:
-                os.remove(image_path)
-            except Exception:
-                pass  # Continue even if file deletion fails
+        unused_files += await release_image(db, image)
+    
+    await db.delete(dog)
+    await db.commit()
+    await invalidate_dog_responses()
+    publish_dog_event("dog.deleted", dog)
     
-    db.delete(dog)
-    db.commit()
+    delete_uploads(unused_files)
+    await purge_unused_blobs(db, released)
     
     return {"message": "Dog deleted successfully"}
 
 @router.post("/{id}/images")
-def upload_dog_image(
+async def upload_dog_image(
     id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    current_user: Optional[User] = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Optional[UserSchema] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload slike za psa (multipart)"""
     # Check if dog exists
-    dog = db.query(Dog).filter(Dog.id == id).first()
-    if not dog:
+    if await db.scalar(select(Dog.id).where(Dog.id == id)) is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dog not found"
@@ -176,55 +392,51 @@ def upload_dog_image(
             detail=f"File type not allowed. Allowed types: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
     
-    # Check file size
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to beginning
-    
-    if file_size > settings.MAX_FILE_SIZE:
+    # Save file in chunks under its content hash, enforcing MAX_FILE_SIZE as we go
+    try:
+        upload = await save_upload(file, file_extension)
+    except UploadTooLarge:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE / 1024 / 1024}MB"
         )
     
-    # Generate unique filename
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
-    file_path = os.path.join(settings.UPLOAD_DIR, unique_filename)
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
-    
     # Create database record
     db_image = DogImage(
         dog_id=id,
-        filename=unique_filename,
+        filename=upload.filename,
         uploaded_by=current_user.id if current_user else None
     )
     
     db.add(db_image)
-    db.commit()
-    db.refresh(db_image)
-    
-    return {"message": "Image uploaded successfully", "filename": unique_filename, "url": f"/uploads/{unique_filename}"}
+    try:
+        await acquire_blob(db, upload)
+        # Nova slika menja prikaz psa - updated_at služi i kao Last-Modified
+        await db.execute(update(Dog).where(Dog.id == id).values(updated_at=datetime.utcnow()))
+        await db.commit()
+    finally:
+        discard_upload(upload)
+    await invalidate_dog_responses()
+    
+    # Thumbnail/medium varijante se prave posle slanja odgovora; variant_urls
+    # se tada menjaju, pa se keš poništava još jednom
+    background_tasks.add_task(create_image_variants, upload.filename)
+    background_tasks.add_task(invalidate_dog_responses)
+    
+    return {"message": "Image uploaded successfully", "filename": upload.filename, "url": f"/uploads/{upload.filename}"}
 
 @router.get("/{id}/images", response_model=List[dict])
-def get_dog_images(id: int, db: Session = Depends(get_db)):
+async def get_dog_images(id: int, db: AsyncSession = Depends(get_read_db)):
     """Vraća listu fotografija psa"""
-    dog = db.query(Dog).filter(Dog.id == id).first()
-    if not dog:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Dog not found"
-        )
+    dog = await get_dog_or_404(db, id, detail=False)
     
     images = []
     for image in dog.images:
         images.append({
             "id": image.id,
             "filename": image.filename,
-            "url": f"/uploads/{image.filename}",
+            "url": image.url,
+            "variant_urls": image.variant_urls,
             "uploaded_by": image.uploaded_by,
             "created_at": image.created_at
         })
@@ -232,13 +444,13 @@ def get_dog_images(id: int, db: Session = Depends(get_db)):
     return images
 
 @router.post("/{id}/picked-up", response_model=DogSchema)
-def mark_dog_picked_up(
+async def mark_dog_picked_up(
     id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: UserSchema = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Korisnik označava psa kao spašenog → status pending_admin"""
-    dog = db.query(Dog).filter(Dog.id == id).first()
+    dog = await db.get(Dog, id)
     if not dog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -256,13 +468,11 @@ def mark_dog_picked_up(
     dog.picked_up_by_user_id = current_user.id
     dog.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(dog)
+    await db.commit()
+    await invalidate_dog_responses()
     
-    # Učitaj relationships
-    if dog.reporter_id:
-        dog.reporter = db.query(User).filter(User.id == dog.reporter_id).first()
-    if dog.picked_up_by_user_id:
-        dog.picked_up_by = db.query(User).filter(User.id == dog.picked_up_by_user_id).first()
+    # Učitaj psa zajedno sa relationships (konstantan broj upita)
+    dog = await get_dog_or_404(db, dog.id)
+    publish_dog_event("dog.updated", dog)
     
-    return convert_dog_to_schema(dog)
+    return json_response(DogSchema, dog)
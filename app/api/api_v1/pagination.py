@@ -0,0 +1,91 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+class PageParams:
+    """Query parametri za keyset paginaciju (limit + neprozirni cursor)"""
+
+    def __init__(self, limit: int, cursor: Optional[str] = None):
+        self.limit = limit
+        self.cursor = cursor
+
+
+async def page_params(
+    limit: int = Query(
+        settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE,
+        description="Maximum number of items to return"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from the previous page's next_cursor"
+    ),
+) -> PageParams:
+    """Dependency za PageParams; async da FastAPI ne bi trošio nit iz threadpool-a"""
+    return PageParams(limit, cursor)
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = f"{created_at.isoformat()}|{id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = base64.urlsafe_b64decode(padded).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def keyset_query(query, created_at_col, id_col, page: PageParams):
+    """Dodaje keyset uslov, ORDER BY (created_at, id) DESC i LIMIT limit + 1"""
+    if page.cursor:
+        created_at, id = decode_cursor(page.cursor)
+        # Poređenje redova (created_at, id) < (?, ?) - indeks se pretražuje od
+        # pozicije cursora umesto da se preskaču svi redovi pre njega
+        query = query.where(tuple_(created_at_col, id_col) < (created_at, id))
+    return query.order_by(created_at_col.desc(), id_col.desc()).limit(page.limit + 1)
+
+
+def id_keyset_query(query, id_col, page: PageParams):
+    """Keyset samo po id DESC, za upite koje vodi indeks uređen po id-u (FTS5 rowid).
+
+    Cursor je istog oblika kao kod keyset_query; id-evi rastu redom
+    prijavljivanja, pa je redosled praktično isti kao po created_at.
+    """
+    if page.cursor:
+        _, id = decode_cursor(page.cursor)
+        query = query.where(id_col < id)
+    return query.order_by(id_col.desc()).limit(page.limit + 1)
+
+
+def split_page(rows, page: PageParams) -> Tuple[List, Optional[str]]:
+    """Odseca (limit + 1). red; vraća (stavke, next_cursor). Redovi imaju .created_at i .id"""
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+async def paginate(db: AsyncSession, query, created_at_col, id_col, page: PageParams) -> Tuple[List, Optional[str]]:
+    """Keyset paginacija unazad po (created_at, id); vraća (stavke, next_cursor)"""
+    rows = (await db.scalars(keyset_query(query, created_at_col, id_col, page))).all()
+    return split_page(rows, page)
+
+
+async def paginate_rows(db: AsyncSession, query, created_at_col, id_col, page: PageParams) -> Tuple[List, Optional[str]]:
+    """Kao paginate, ali za select() kolona - vraća Row objekte"""
+    rows = (await db.execute(keyset_query(query, created_at_col, id_col, page))).all()
+    return split_page(rows, page)
@@ -1,37 +1,281 @@
-from app.db.models import Dog
-from app.schemas.dog import Dog as DogSchema, DogInDB
+import time
+import types
+from datetime import datetime
+from functools import lru_cache
+from typing import Awaitable, Callable, List, Optional, Union, get_args, get_origin
 
-def convert_dog_to_schema(dog: Dog) -> DogSchema:
-    """Konvertuje Dog SQLAlchemy objekat u DogSchema sa konvertovanim reporter i picked_up_by"""
-    # Prvo kreiramo DogInDB bez reporter i picked_up_by
-    dog_in_db = DogInDB.from_orm(dog)
+from fastapi import HTTPException, Request, Response, status
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined, to_json
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, selectinload
+
+from app.api.api_v1.conditional import (
+    ResourceVersion, is_not_modified, make_etag, validator_headers
+)
+from app.core.config import settings
+from app.core.events import dog_events
+from app.core.response_cache import CachedResponse, Generation, invalidate_dog_responses, response_cache
+from app.db import search
+from app.db.database import db_router
+from app.db.models import Dog, DogImage, DogStatus, User
+from app.db.routing import PrimarySession
+from app.schemas.dog import DogStreamEvent
+
+def dog_query(detail: bool = True):
+    """select(Dog) sa unapred učitanim relacijama.
+
+    Slike i njihove varijante se učitavaju dodatnim SELECT ... IN upitima, a reporter i
+    picked_up_by kroz JOIN, tako da broj upita ne zavisi od broja pasa.
+    Za liste (DogList) dovoljno je detail=False - samo slike. U async sesiji
+    lazy load nije moguć, pa sve što šema čita mora biti učitano ovde.
+    """
+    options = [selectinload(Dog.images).selectinload(DogImage.variants)]
+    if detail:
+        options += [joinedload(Dog.reporter), joinedload(Dog.picked_up_by)]
+    return select(Dog).options(*options)
+
+async def get_dog_or_404(db: AsyncSession, id: int, detail: bool = True) -> Dog:
+    """Vraća psa sa učitanim relacijama ili 404.
+
+    populate_existing osvežava i objekat koji je već u sesiji (npr. posle
+    commit-a), pa nije potreban poseban refresh() ni upiti za User.
+    """
+    dog = await db.scalar(
+        dog_query(detail).where(Dog.id == id).execution_options(populate_existing=True)
+    )
+    if not dog:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dog not found"
+        )
+    return dog
+
+async def load_dogs_in_order(db: AsyncSession, ids: List[int]) -> List[Dog]:
+    """Psi za listu (DogList) u redosledu datih id-eva; obrisani u međuvremenu se preskaču"""
+    dogs = (await db.scalars(dog_query(detail=False).where(Dog.id.in_(ids)))).all()
+    by_id = {dog.id: dog for dog in dogs}
+    return [by_id[id] for id in ids if id in by_id]
+
+def parse_search_terms(q: str) -> List[str]:
+    """Reči za pretragu iz parametra q, ili 400 ako u njemu nema nijedne"""
+    terms = search.search_terms(q)
+    if not terms:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="q must contain at least one letter or digit"
+        )
+    return terms
+
+def dog_version_query(detail: bool = True):
+    """Kolone koje određuju verziju prikaza psa - za ETag, bez učitavanja relacija.
+
+    updated_at se menja pri svakoj izmeni psa, slika i varijanti slika;
+    skup slika (broj i najveći id) se ipak čita direktno. Za detalje se
+    uzimaju i ime/email autora i korisnika koji je preuzeo psa, jer nemaju
+    svoj updated_at.
+    """
+    of_dog = DogImage.dog_id == Dog.id
+    columns = [
+        Dog.id, Dog.created_at, Dog.updated_at,
+        select(func.count(DogImage.id)).where(of_dog).scalar_subquery().label("image_count"),
+        select(func.max(DogImage.id)).where(of_dog).scalar_subquery().label("last_image_id"),
+    ]
+    if not detail:
+        return select(*columns)
+    reporter, picked_up_by = aliased(User), aliased(User)
+    return (
+        select(*columns, reporter.full_name, reporter.email, picked_up_by.full_name, picked_up_by.email)
+        .outerjoin(reporter, Dog.reporter_id == reporter.id)
+        .outerjoin(picked_up_by, Dog.picked_up_by_user_id == picked_up_by.id)
+    )
+
+async def get_dog_version_or_404(db: AsyncSession, id: int) -> ResourceVersion:
+    """ETag detalja psa jednim upitom, ili 404.
+
+    Bez Last-Modified: ETag pokriva i ime/email korisnika, a oni nemaju vreme
+    izmene, pa bi If-Modified-Since posle preimenovanja dao 304 sa starim podacima.
+    """
+    row = (await db.execute(dog_version_query().where(Dog.id == id))).one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dog not found"
+        )
+    return ResourceVersion(make_etag("dog", *row))
+
+
+def json_response(schema, obj, status_code: int = status.HTTP_200_OK) -> Response:
+    """Serijalizuje ORM objekte direktno u JSON bajtove (dump_json).
+
+    Endpoint i dalje deklariše response_model zbog dokumentacije, ali FastAPI
+    ne validira ponovo vraćeni Response.
+    """
+    return Response(content=dump_json(schema, obj), status_code=status_code, media_type="application/json")
+
+def dump_json(schema, obj) -> bytes:
+    """JSON po poljima šeme, bez pydantic validacije.
+
+    Podaci iz baze su već validirani pri upisu, pa se iz ORM objekata (ili
+    dict-ova) samo prepisuju polja koja šema deklariše, a to_json iz
+    pydantic-core-a ih kodira - isti bajtovi kao dump_json posle
+    validate_python(from_attributes=True), oko dva puta brže.
+    """
+    build = _json_builder(schema)
+    return to_json(obj if build is None else build(obj))
+
+@lru_cache(maxsize=None)
+def _json_builder(annotation) -> Optional[Callable]:
+    """Funkcija koja od vrednosti pravi ono što to_json kodira; None = vrednost ide kakva jeste"""
+    origin = get_origin(annotation)
+    if origin is list:
+        item = _json_builder(get_args(annotation)[0])
+        return None if item is None else (lambda values: [item(value) for value in values])
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        inner = _json_builder(args[0]) if len(args) == 1 else None
+        return None if inner is None else (lambda value: None if value is None else inner(value))
+    if annotation is float:
+        # pydantic bi i int iz float polja ispisao kao 1.0
+        return float
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _model_json_builder(annotation)
+    return None
+
+def _model_json_builder(model) -> Callable:
+    fields = [
+        (name, _json_builder(field.annotation), field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+    ]
+
+    def build(obj) -> dict:
+        # Učitane kolone i relacije ORM objekta su u __dict__ - čitanje kroz
+        # SQLAlchemy deskriptor je najskuplji deo; property-ji idu kroz getattr
+        values = obj if isinstance(obj, dict) else obj.__dict__
+        result = {}
+        for name, build_value, default in fields:
+            if name in values:
+                value = values[name]
+            elif values is obj:
+                if default is PydanticUndefined:
+                    raise KeyError(name)
+                value = default
+            else:
+                value = getattr(obj, name)
+            result[name] = value if build_value is None or value is None else build_value(value)
+        return result
+    return build
+
+def publish_dog_event(event_type: str, dog: Dog, previous: Optional[tuple] = None) -> None:
+    """Objavljuje promenu psa pretplatnicima /api/dogs/stream; poziva se posle commit-a.
+
+    Za dog.created/dog.updated šalje se ceo marker (DogList), za
+    dog.deleted samo id. `previous` je (lat, lng) pre izmene lokacije.
+    """
+    payload = {"type": event_type, "id": dog.id, "dog": None if event_type == "dog.deleted" else dog}
+    dog_events.publish(event_type, dump_json(DogStreamEvent, payload), dog.latitude, dog.longitude, previous)
+
+async def moderate_pending_dogs(db: AsyncSession, ids: List[int], new_status: DogStatus, **values) -> dict:
+    """Prevodi pse iz pending_admin u `new_status` jednim UPDATE-om i commit-uje.
+
+    Uslov na statusu je u samom UPDATE-u, pa dva admina koja istovremeno
+    obrađuju isti pas ne mogu oba da ga promene - drugi dobija not_pending.
+    Psi koji nisu promenjeni se čitaju još jednim upitom samo zbog ishoda.
+    Vraća DogModerationResult; keš i pretplatnici se obaveštavaju ovde.
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > settings.MAX_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_PAGE_SIZE} ids per request"
+        )
     
-    # Konvertujemo u dictionary
-    dog_dict = dog_in_db.model_dump()
+    updated_ids = (await db.scalars(
+        update(Dog)
+        .where(Dog.id.in_(ids), Dog.status == DogStatus.PENDING_ADMIN)
+        .values(status=new_status, updated_at=datetime.utcnow(), **values)
+        .returning(Dog.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    updated = set(updated_ids)
+    rest = [id for id in ids if id not in updated]
+    current = dict((await db.execute(select(Dog.id, Dog.status).where(Dog.id.in_(rest)))).all()) if rest else {}
+    await db.commit()
     
-    # Dodajemo images
-    dog_dict["images"] = [{"id": img.id, "dog_id": img.dog_id, "filename": img.filename, 
-                          "uploaded_by": img.uploaded_by, "created_at": img.created_at} 
-                         for img in dog.images]
+    if updated:
+        await invalidate_dog_responses()
+        for dog in await load_dogs_in_order(db, sorted(updated)):
+            publish_dog_event("dog.updated", dog)
+    
+    results = []
+    for id in ids:
+        if id in updated:
+            results.append({"id": id, "result": "updated", "status": new_status})
+        elif id in current:
+            results.append({"id": id, "result": "not_pending", "status": current[id]})
+        else:
+            results.append({"id": id, "result": "not_found"})
+    return {"updated": len(updated), "results": results}
+
+def response_cache_usable(db: AsyncSession) -> bool:
+    """Keš se ne koristi za čitanja sa primarne baze kada postoje replike.
+
+    Takvo čitanje dobija samo korisnik koji je upravo pisao - on mora da vidi
+    svoju izmenu, a keš posle invalidacije mogu popuniti replike koje kasne.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return False
+    return not (db_router.readers and isinstance(db.sync_session, PrimarySession))
+
+def response_cache_fillable(generation: Generation) -> bool:
+    """Sme li odgovor pročitan za ovu generaciju da se upiše u keš.
+
+    Sa replikama se keš ne puni READ_YOUR_WRITES_SECONDS posle invalidacije
+    (isti prozor u kome se pretpostavlja da replike kasne): replika koja još
+    nije primila upis bi pod novu generaciju upisala staro telo i ETag.
+    """
+    if not db_router.readers:
+        return True
+    return time.time() - generation.invalidated_at >= settings.READ_YOUR_WRITES_SECONDS
+
+async def cached_json_response(
+    request: Request,
+    db: AsyncSession,
+    key: str,
+    validate: Callable[[], Awaitable[ResourceVersion]],
+    render: Callable[[ResourceVersion], Awaitable[Response]],
+) -> Response:
+    """Uslovni GET sa kešom odgovora.
+
+    Pogodak u kešu vraća sačuvane bajtove ili 304 bez upita u bazu. Inače
+    validate() jeftinim upitom računa ETag/Last-Modified - ako se poklapaju
+    sa If-None-Match/If-Modified-Since, odgovor je 304 bez serijalizacije;
+    u suprotnom render(version) pravi telo, koje se kešira zajedno sa
+    validatorima. Greške (HTTPException) se ne keširaju. Zaglavlje X-Cache
+    pokazuje da li je odgovor došao iz keša.
+    """
+    generation = await response_cache.generation() if response_cache_usable(db) else None
+    use_cache = generation is not None
+    if use_cache:
+        cached = await response_cache.get(generation, key)
+        if cached is not None:
+            headers = {**validator_headers(cached.etag, cached.last_modified), "X-Cache": "HIT"}
+            if is_not_modified(request.headers, cached.etag, cached.last_modified):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return Response(content=cached.body, media_type="application/json", headers=headers)
     
-    # Konvertujemo reporter i picked_up_by u dictionary ako postoje
-    if dog.reporter:
-        dog_dict["reporter"] = {
-            "id": dog.reporter.id,
-            "full_name": dog.reporter.full_name,
-            "email": dog.reporter.email
-        }
-    else:
-        dog_dict["reporter"] = None
-        
-    if dog.picked_up_by:
-        dog_dict["picked_up_by"] = {
-            "id": dog.picked_up_by.id,
-            "full_name": dog.picked_up_by.full_name,
-            "email": dog.picked_up_by.email
-        }
-    else:
-        dog_dict["picked_up_by"] = None
+    version = await validate()
+    headers = validator_headers(version.etag, version.last_modified)
+    if use_cache:
+        headers["X-Cache"] = "MISS"
+    if is_not_modified(request.headers, version.etag, version.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
-    # Kreiramo DogSchema iz dictionary-a
-    return DogSchema(**dog_dict)
+    response = await render(version)
+    if use_cache and response.status_code == status.HTTP_200_OK and response_cache_fillable(generation):
+        await response_cache.set(
+            generation, key, CachedResponse(response.body, version.etag, version.last_modified)
+        )
+    response.headers.update(headers)
+    return response
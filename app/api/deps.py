@@ -1,20 +1,51 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from typing import Optional
+import hashlib
+import time
 
-from app.db.database import get_db
+from app.db.database import AsyncSessionLocal, db_router, get_db
+from app.db.routing import WRITER_KEY
 from app.db.models import User
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.schemas.user import TokenData
+from app.schemas.user import TokenData, User as UserSchema
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-def get_current_user(
+# Dekodirani JWT payload-i po hash-u tokena, važe do `exp` tokena
+_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAX_SIZE)
+
+# Lagani UserSchema principali po id-u; eksplicitno se invalidiraju pri
+# izmeni korisnika, a TTL pokriva izmene iz drugih worker procesa
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+def decode_access_token(token: str) -> dict:
+    """Dekodira JWT uz keširanje payload-a; baca JWTError ako token nije validan"""
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        exp = payload.get("exp")
+        if exp is not None:
+            _token_cache.set(key, payload, ttl=exp - time.time())
+    return payload
+
+def invalidate_user_cache(user_id: int) -> None:
+    """Poziva se posle svake izmene korisnika (profil, deaktivacija, admin prava)"""
+    _user_cache.pop(user_id)
+
+def auth_cache_stats() -> dict:
+    return {"users": _user_cache.stats(), "tokens": _token_cache.stats()}
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_db)
+) -> UserSchema:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -22,11 +53,7 @@ def get_current_user(
     )
     
     try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.JWT_SECRET_KEY, 
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = decode_access_token(credentials.credentials)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
@@ -34,17 +61,59 @@ def get_current_user(
     except (JWTError, ValueError):
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
-    if user is None:
+    # Commit u ovoj sesiji vezuje korisnika za primarnu bazu (read-your-writes)
+    db.info[WRITER_KEY] = token_data.user_id
+    
+    principal = await _load_principal(db, token_data.user_id)
+    if principal is None:
         raise credentials_exception
-    return user
+    return principal
+
+async def _load_principal(db: AsyncSession, user_id: int) -> Optional[UserSchema]:
+    principal = _user_cache.get(user_id)
+    if principal is None:
+        user = await db.scalar(select(User).where(User.id == user_id))
+        if user is None:
+            return None
+        principal = UserSchema.model_validate(user)
+        _user_cache.set(user_id, principal)
+    return principal
+
+async def admin_from_token(token: str) -> Optional[UserSchema]:
+    """Aktivan admin za bearer token ili None - za middleware (X-Profile), van FastAPI zavisnosti"""
+    try:
+        user_id = int(decode_access_token(token).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+    principal = _user_cache.get(user_id)
+    if principal is None:
+        async with AsyncSessionLocal() as db:
+            principal = await _load_principal(db, user_id)
+    if principal is None or not (principal.is_active and principal.is_admin):
+        return None
+    return principal
+
+def _request_user_id(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[int]:
+    if credentials is None:
+        return None
+    try:
+        return int(decode_access_token(credentials.credentials).get("sub"))
+    except (JWTError, TypeError, ValueError):
+        return None
+
+async def get_read_db(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+):
+    """Sesija samo za čitanje - na replici, osim ako je korisnik nedavno pisao"""
+    async with db_router.reader_for(_request_user_id(credentials))() as db:
+        yield db
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: UserSchema = Depends(get_current_user)) -> UserSchema:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def get_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_admin_user(current_user: UserSchema = Depends(get_current_active_user)) -> UserSchema:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
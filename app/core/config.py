@@ -1,9 +1,32 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 class Settings(BaseSettings):
     # Database - SQLite
     DATABASE_URL: str = "sqlite:///./dog_rescue.db"
+    # Async URL za API; podrazumevano se izvodi iz DATABASE_URL (aiosqlite/asyncpg)
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Read replike (JSON lista URL-ova); prazno = sve ide na primarnu bazu
+    DATABASE_REPLICA_URLS: List[str] = []
+    # Koliko dugo korisnik posle upisa čita sa primarne baze
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    # Primeni migracije pri startu; u produkciji False + `python -m app.db.migrations upgrade`
+    AUTO_MIGRATE: bool = True
+    
+    # Connection pool (vidi app/db/database.py za SQLite vs. server baze)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    # SQLite PRAGMA podešavanja po konekciji
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE_KB: int = 65536  # 64MB
+    SQLITE_MMAP_SIZE: int = 268435456  # 256MB
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_FOREIGN_KEYS: bool = True
     
     # JWT Settings
     JWT_SECRET_KEY: str = "your-super-secret-jwt-key-change-in-production"
@@ -11,10 +34,67 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 64  # poslova koji čekaju na nit; preko toga 503
+    
+    # Auth caches (in-process)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    
+    # Keš JSON odgovora za GET /dogs i /dogs/{id}; RESPONSE_CACHE_URL=redis://... deli keš između worker-a
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: int = 60
+    RESPONSE_CACHE_MAX_SIZE: int = 2048
+    RESPONSE_CACHE_URL: Optional[str] = None
+    
+    # Server-Sent Events (/api/dogs/stream)
+    SSE_MAX_CLIENTS: int = 1000
+    SSE_QUEUE_SIZE: int = 100  # spor klijent sa više neposlatih događaja se odvaja
+    SSE_HISTORY_SIZE: int = 1000  # događaji za nastavak sa Last-Event-ID
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    SSE_RETRY_MS: int = 3000
+    
     # File Storage
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 5242880  # 5MB
     ALLOWED_EXTENSIONS: List[str] = ["jpg", "jpeg", "png"]
+    UPLOAD_CHUNK_SIZE: int = 65536  # 64KB
+    UPLOADS_CACHE_MAX_AGE: int = 31536000  # 1 godina, fajlovi su nepromenljivi
+    
+    # Image variants (najveća dimenzija u pikselima po vrsti)
+    IMAGE_VARIANT_SIZES: Dict[str, int] = {"thumb": 200, "medium": 800}
+    IMAGE_VARIANT_WEBP: bool = False
+    IMAGE_VARIANT_QUALITY: int = 80
+    IMAGE_MAX_PIXELS: int = 50_000_000  # veće slike se ne dekodiraju (decompression bomb)
+    
+    # Location search
+    DEFAULT_SEARCH_RADIUS_KM: float = 5.0
+    MAX_SEARCH_RADIUS_KM: float = 100.0
+    
+    # Klasterovanje markera (GET /api/dogs/clusters)
+    CLUSTER_GRID_SIZE: int = 8  # ćelija po strani pločice
+    CLUSTER_MAX_TILES: int = 64  # najviše pločica po zahtevu
+    CLUSTER_MAX_ZOOM: int = 20
+    
+    # Pretraga teksta (GET /api/dogs/search)
+    SEARCH_MAX_CANDIDATES: int = 500  # najnovijih pogodaka koji se rangiraju
+    
+    # Pagination
+    DEFAULT_PAGE_SIZE: int = 50
+    MAX_PAGE_SIZE: int = 200
+    
+    # Metrike (GET /metrics, Prometheus format)
+    METRICS_ENABLED: bool = True
+    
+    # Profilisanje zahteva (header X-Profile od admina) i log sporih upita
+    PROFILING_ENABLED: bool = True
+    PROFILE_STORE_SIZE: int = 20  # poslednjih profila u memoriji
+    PROFILE_MAX_SECONDS: float = 30.0  # duži zahtev se profiliše samo do ove granice
+    SLOW_QUERY_MS: float = 250.0  # 0 isključuje log sporih upita
+    SLOW_QUERY_LOG_SIZE: int = 200
     
     # App Settings
     DEBUG: bool = True
@@ -0,0 +1,162 @@
+"""In-process event bus za promene pasa i Server-Sent Events stream.
+
+Endpointi posle commit-a objavljuju događaj (nova prijava, izmena, promena
+statusa, brisanje); svaki otvoren /api/dogs/stream ima svoj red događaja.
+SSE zapis događaja se pravi jednom, pri objavljivanju, i deli između svih
+pretplatnika.
+
+Id događaja je `<epoha>-<redni broj>`, gde je epoha slučajna po procesu.
+Klijent koji se ponovo poveže sa Last-Event-ID dobija propuštene događaje
+iz kratke istorije; ako ih tamo više nema (ili je id iz drugog procesa),
+dobija `reset` i treba ponovo da učita listu.
+
+Bus je lokalan za proces - kod više worker-a pretplatnik vidi samo upise
+koji su prošli kroz njegov worker.
+"""
+import asyncio
+import itertools
+import json
+import secrets
+from collections import deque
+from typing import AsyncIterator, Callable, List, NamedTuple, Optional, Set
+
+from app.core.config import settings
+
+
+class DogEvent(NamedTuple):
+    id: str
+    sequence: int
+    type: str
+    latitude: float
+    longitude: float
+    # Pozicija pre izmene - pretplatnik na bbox koji je pas napustio treba da ga skloni
+    previous: Optional[tuple]
+    frame: bytes
+
+
+class Subscription:
+    def __init__(self, match: Callable[[DogEvent], bool], backlog: List[bytes]):
+        self.match = match
+        self.backlog = backlog
+        self.queue: "asyncio.Queue[Optional[DogEvent]]" = asyncio.Queue()
+
+
+class TooManySubscribers(Exception):
+    """Dostignut je SSE_MAX_CLIENTS"""
+
+
+def _frame(event_id: str, event_type: str, data: bytes) -> bytes:
+    return b"id: %s\nevent: %s\ndata: %s\n\n" % (event_id.encode("ascii"), event_type.encode("ascii"), data)
+
+
+class EventBus:
+    def __init__(self, queue_size: int, history_size: int, max_subscribers: int):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.epoch = secrets.token_hex(4)
+        self._sequence = itertools.count(1)
+        self._last_sequence = 0
+        self._history: "deque[DogEvent]" = deque(maxlen=history_size)
+        self._subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def publish(self, event_type: str, data: bytes, latitude: float, longitude: float,
+                previous: Optional[tuple] = None) -> DogEvent:
+        """Objavljuje događaj (`data` je gotov JSON); poziva se iz event loop-a"""
+        sequence = next(self._sequence)
+        event_id = f"{self.epoch}-{sequence}"
+        event = DogEvent(event_id, sequence, event_type, latitude, longitude, previous,
+                         _frame(event_id, event_type, data))
+        self._last_sequence = sequence
+        self._history.append(event)
+        self.published += 1
+
+        for subscription in list(self._subscribers):
+            if not subscription.match(event):
+                continue
+            if subscription.queue.qsize() >= self.queue_size:
+                # Spor klijent: zatvori stream, ponovo se povezuje sa Last-Event-ID
+                self._subscribers.discard(subscription)
+                subscription.queue.put_nowait(None)
+                self.dropped_subscribers += 1
+                continue
+            subscription.queue.put_nowait(event)
+        return event
+
+    def has_capacity(self) -> bool:
+        """Provera pre otvaranja stream-a; ne zauzima mesto (to radi subscribe)"""
+        return len(self._subscribers) < self.max_subscribers
+
+    def subscribe(self, match: Callable[[DogEvent], bool], last_event_id: Optional[str] = None) -> Subscription:
+        if not self.has_capacity():
+            raise TooManySubscribers()
+        subscription = Subscription(match, self._backlog(match, last_event_id))
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def _backlog(self, match: Callable[[DogEvent], bool], last_event_id: Optional[str]) -> List[bytes]:
+        """Propušteni događaji posle last_event_id, ili reset ako se ne mogu nadoknaditi"""
+        if not last_event_id:
+            return []
+        epoch, _, sequence = last_event_id.partition("-")
+        try:
+            sequence = int(sequence)
+        except ValueError:
+            sequence = None
+        oldest = self._history[0].sequence if self._history else self._last_sequence + 1
+        if epoch != self.epoch or sequence is None or sequence > self._last_sequence or sequence < oldest - 1:
+            reset_id = f"{self.epoch}-{self._last_sequence}"
+            return [_frame(reset_id, "reset", json.dumps({"type": "reset"}).encode("utf-8"))]
+        return [event.frame for event in self._history if event.sequence > sequence and match(event)]
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers,
+            "history": len(self._history),
+        }
+
+
+async def sse_stream(
+    bus: EventBus, match: Callable[[DogEvent], bool], last_event_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """Telo text/event-stream odgovora.
+
+    Pretplata se pravi tek kada telo počne da se šalje i uklanja kada se
+    klijent odvoji, pa odgovor koji nikad ne počne ne zauzima mesto. Ako je
+    posle provere u endpointu SSE_MAX_CLIENTS u međuvremenu dostignut, stream
+    se odmah zatvara, a klijent se ponovo povezuje posle `retry`.
+    """
+    try:
+        subscription = bus.subscribe(match, last_event_id)
+    except TooManySubscribers:
+        yield b"retry: %d\n\n" % settings.SSE_RETRY_MS
+        return
+    try:
+        yield b"retry: %d\n\n" % settings.SSE_RETRY_MS
+        for frame in subscription.backlog:
+            yield frame
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Komentar drži vezu otvorenom kroz proxy-je sa idle timeout-om
+                yield b": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield event.frame
+    finally:
+        bus.unsubscribe(subscription)
+
+
+dog_events = EventBus(
+    queue_size=settings.SSE_QUEUE_SIZE,
+    history_size=settings.SSE_HISTORY_SIZE,
+    max_subscribers=settings.SSE_MAX_CLIENTS,
+)
@@ -0,0 +1,216 @@
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, List, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow je opcion - bez njega se variante ne generišu
+    Image = None
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.config import settings
+from app.core.storage import delete_upload, delete_uploads, place_upload, upload_path
+
+logger = logging.getLogger(__name__)
+
+if Image is not None:
+    # Pillow odbija (DecompressionBombError) slike sa više od 2x ovoliko piksela;
+    # generate_variants proverava i samu granicu pre dekodiranja
+    Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def dialect_insert(dialect_name: str, table):
+    """INSERT sa on_conflict_do_nothing/do_update (SQLite i PostgreSQL)"""
+    return _DIALECT_INSERTS[dialect_name](table)
+
+
+def variant_kinds() -> List[Tuple[str, int, str]]:
+    """(kind, max dimenzija, ekstenzija) za svaku konfigurisanu varijantu"""
+    kinds = []
+    for name, size in settings.IMAGE_VARIANT_SIZES.items():
+        kinds.append((name, size, "jpg"))
+        if settings.IMAGE_VARIANT_WEBP:
+            kinds.append((f"{name}_webp", size, "webp"))
+    return kinds
+
+
+def variant_filename(filename: str, kind: str, extension: str) -> str:
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_{kind}.{extension}"
+
+
+def generate_variants(filename: str) -> List[dict]:
+    """Pravi umanjene verzije slike pored originala u UPLOAD_DIR.
+
+    Vraća listu {kind, filename, width, height}; prazna lista ako Pillow
+    nije instaliran ili slika ne može da se pročita.
+    """
+    if Image is None:
+        logger.warning("Pillow is not installed, skipping image variants for %s", filename)
+        return []
+
+    try:
+        with Image.open(upload_path(filename)) as source:
+            # open() čita samo zaglavlje - mali fajl može da najavi ogromnu sliku
+            if source.width * source.height > settings.IMAGE_MAX_PIXELS:
+                logger.warning(
+                    "Skipping image variants for %s: %dx%d exceeds IMAGE_MAX_PIXELS",
+                    filename, source.width, source.height
+                )
+                return []
+            source = ImageOps.exif_transpose(source)
+            if source.mode not in ("RGB", "L"):
+                source = source.convert("RGB")
+
+            variants = []
+            for kind, size, extension in variant_kinds():
+                image = source.copy()
+                image.thumbnail((size, size))
+                name = variant_filename(filename, kind, extension)
+                tmp_path = upload_path(f".{name}.part")
+                image.save(
+                    tmp_path,
+                    format="WEBP" if extension == "webp" else "JPEG",
+                    quality=settings.IMAGE_VARIANT_QUALITY,
+                    optimize=True
+                )
+                os.replace(tmp_path, upload_path(name))
+                variants.append({
+                    "kind": kind,
+                    "filename": name,
+                    "width": image.width,
+                    "height": image.height
+                })
+            return variants
+    except Exception as e:
+        # Neispravan ili oštećen fajl nije greška servera - original ostaje dostupan
+        logger.warning("Could not generate image variants for %s: %s", filename, e)
+        return []
+
+
+def create_image_variants(filename: str) -> None:
+    """Background task posle uploada: generiše varijante i upisuje ih u bazu.
+
+    Sync funkcija - Starlette je izvršava u threadpool-u, pa obrada slike
+    ne blokira event loop; zato koristi sync SessionLocal.
+    """
+    # Lokalni import - app.db zavisi od app.core, ne obrnuto
+    from app.db.database import SessionLocal
+    from app.db.models import Dog, DogImage, ImageVariant
+
+    db = SessionLocal()
+    try:
+        # Isti sadržaj je već uploadovan ranije - varijante se dele
+        if db.query(ImageVariant.id).filter(ImageVariant.source_filename == filename).first():
+            return
+
+        variants = generate_variants(filename)
+        if not variants:
+            return
+
+        # Slika je mogla biti obrisana dok su se varijante generisale
+        if not db.query(DogImage.id).filter(DogImage.filename == filename).first():
+            for variant in variants:
+                delete_upload(variant["filename"])
+            return
+
+        # Isti sadržaj je možda obrađen paralelno (ili se task ponavlja) - postojeća
+        # varijanta ostaje, a fajlovi imaju ista imena i isti sadržaj
+        inserted = db.execute(
+            dialect_insert(db.get_bind().dialect.name, ImageVariant)
+            .values([{"source_filename": filename, **variant} for variant in variants])
+            .on_conflict_do_nothing(index_elements=["source_filename", "kind"])
+        ).rowcount
+        if not inserted:
+            return
+        # variant_urls su deo prikaza psa - updated_at ulazi u ETag/Last-Modified
+        db.execute(
+            update(Dog)
+            .where(Dog.id.in_(select(DogImage.dog_id).where(DogImage.filename == filename)))
+            .values(updated_at=datetime.utcnow())
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def acquire_blob(db, upload) -> None:
+    """Dodaje referencu na sačuvan sadržaj (StoredUpload) i postavlja fajl; commit radi pozivalac.
+
+    Jedan upsert, pa dva paralelna prva uploada istog sadržaja ne mogu oba
+    pokušati INSERT. Upsert drži red sadržaja zaključan (SQLite celu bazu za
+    upis) do commit-a, a fajl se postavlja tek posle njega - purge_unused_blobs
+    zato ne može obrisati fajl koji ovaj upload koristi, a ako ga je obrisao
+    ranije, place_upload ga vraća iz privremenog fajla.
+    """
+    from app.db.models import ImageBlob
+
+    await db.execute(
+        dialect_insert(db.bind.dialect.name, ImageBlob)
+        .values(sha256=upload.sha256, filename=upload.filename, size=upload.size, ref_count=1)
+        .on_conflict_do_update(index_elements=["sha256"], set_={"ref_count": ImageBlob.ref_count + 1})
+    )
+    place_upload(upload)
+
+
+async def release_image(db, image) -> List[str]:
+    """Skida referencu DogImage-a na sadržaj slike.
+
+    Sadržaj koji ostane bez referenci zadržava ImageBlob red sa ref_count = 0;
+    briše ga purge_unused_blobs posle commit-a. Slike snimljene pre
+    deduplikacije nemaju ImageBlob red - za njih se vraćaju fajlovi (original i
+    varijante) koje treba obrisati posle commit-a.
+    """
+    from app.db.models import ImageBlob, ImageVariant
+
+    result = await db.execute(
+        update(ImageBlob)
+        .where(ImageBlob.filename == image.filename)
+        .values(ref_count=ImageBlob.ref_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        return []
+
+    filenames = [variant.filename for variant in image.variants] + [image.filename]
+    await db.execute(
+        delete(ImageVariant)
+        .where(ImageVariant.source_filename == image.filename)
+        .execution_options(synchronize_session=False)
+    )
+    return filenames
+
+
+async def purge_unused_blobs(db, filenames: Iterable[str]) -> None:
+    """Briše sadržaj (red, varijante i fajlove) koji je ostao bez referenci.
+
+    Poziva se posle commit-a koji je otpustio slike, sa imenima njihovih
+    fajlova. DELETE uz uslov ref_count = 0 zaključava red (SQLite celu bazu
+    za upis), a fajlovi se brišu pre commit-a: upload koji u međuvremenu
+    uzme isti sadržaj čeka na acquire_blob i posle toga vraća fajl, a upload
+    koji je referencu već uzeo ostavlja ref_count > 0 i ništa se ne briše.
+    """
+    from app.db.models import ImageBlob, ImageVariant
+
+    for filename in dict.fromkeys(filenames):
+        result = await db.execute(
+            delete(ImageBlob)
+            .where(ImageBlob.filename == filename, ImageBlob.ref_count == 0)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            variants = (await db.scalars(
+                select(ImageVariant.filename).where(ImageVariant.source_filename == filename)
+            )).all()
+            await db.execute(
+                delete(ImageVariant)
+                .where(ImageVariant.source_filename == filename)
+                .execution_options(synchronize_session=False)
+            )
+            delete_uploads([*variants, filename])
+        await db.commit()
@@ -0,0 +1,342 @@
+"""Metrike API-ja u Prometheus tekstualnom formatu (GET /metrics).
+
+MetricsMiddleware je čist ASGI middleware: za svaki HTTP zahtev beleži
+trajanje i status po ruti (šablon putanje, npr. /api/dogs/{id}, da broj
+serija ne raste sa brojem pasa), broj zahteva u toku i primljene bajtove
+tela (upload slika). Događaji na SQLAlchemy engine-ima (instrument_engine)
+broje upite i njihovo trajanje - ukupno i po zahtevu, preko contextvar-a
+koji middleware postavlja, pa se vidi koji endpoint šalje previše upita.
+
+Vrednosti koje već postoje negde drugde (threadpool, keševi, SSE) se ne
+broje dvaput nego čitaju pri svakom scrape-u (collect funkcije).
+
+Metrike su lokalne za proces; kod više uvicorn worker-a Prometheus vidi
+worker koji je odgovorio na scrape, pa svaki worker treba scrape-ovati
+posebno ili pokrenuti jedan worker po portu.
+"""
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy import event
+
+# Sekunde - od keširanog odgovora (~ms) do sporog uploada
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+# Starlette sam dodaje "; charset=utf-8"
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+Labels = Tuple[str, ...]
+CollectResult = Union[Dict[Labels, float], Awaitable[Dict[Labels, float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    async def lines(self) -> List[str]:
+        raise NotImplementedError
+
+
+class _SimpleMetric(Metric):
+    """Jedna vrednost po seriji; sa `collect` se vrednosti čitaju pri scrape-u"""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 collect: Optional[Callable[[], CollectResult]] = None):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._collect = collect
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    async def lines(self) -> List[str]:
+        if self._collect is not None:
+            values = self._collect()
+            if asyncio.iscoroutine(values):
+                values = await values
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(values.items())]
+
+
+class Counter(_SimpleMetric):
+    type = "counter"
+
+
+class Gauge(_SimpleMetric):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # Po seriji: [brojevi po bucket-u (poslednji je +Inf), suma]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    async def lines(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        lines = []
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    async def render(self) -> str:
+        out = []
+        for metric in self._metrics:
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.type}")
+            out.extend(await metric.lines())
+        return "\n".join(out) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time until the response was sent", ("method", "route")
+))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being handled (including open SSE streams)"
+))
+http_request_body_bytes = registry.register(Counter(
+    "http_request_body_bytes_total", "Request body bytes received (uploads)", ("method", "route")
+))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+http_request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Total SQL execution time per request", ("method", "route")
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of single SQL statements", ("database",)
+))
+
+
+class RequestStats:
+    """Upiti u bazu tokom jednog zahteva"""
+    __slots__ = ("queries", "db_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_request_stats: "contextvars.ContextVar[Optional[RequestStats]]" = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def instrument_engine(engine, database: str = "primary") -> None:
+    """Meri trajanje svakog SQL upita na engine-u (za async engine proslediti .sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        db_query_duration.observe(elapsed, database)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # Upit koji je pukao nema after_cursor_execute - skini njegov početak
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+def route_label(scope) -> str:
+    """Šablon putanje rute koja je obradila zahtev; nepoznate putanje dele jednu seriju"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # Mount (npr. /uploads) - root_path je putanja do mount-a
+        return scope.get("root_path") or "/"
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Čist ASGI middleware - ne baferuje telo odgovora kao BaseHTTPMiddleware,
+    pa radi i sa StreamingResponse (SSE)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+        state = {"status": 500, "body_bytes": 0, "finished": None}
+
+        async def receive_counting():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["body_bytes"] += len(message.get("body", b""))
+            return message
+
+        async def send_observing(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Background task-ovi (varijante slika) se izvršavaju posle
+                # slanja odgovora - ne ulaze u latenciju ni u upite zahteva
+                state["finished"] = (time.perf_counter(), stats.queries, stats.db_seconds)
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive_counting, send_observing)
+        finally:
+            http_requests_in_flight.dec()
+            _request_stats.reset(token)
+            finished, queries, db_seconds = state["finished"] or (time.perf_counter(), stats.queries, stats.db_seconds)
+            method, route = scope["method"], route_label(scope)
+            http_requests.inc(method, route, str(state["status"]))
+            http_request_duration.observe(finished - start, method, route)
+            http_request_db_queries.observe(queries, method, route)
+            http_request_db_duration.observe(db_seconds, method, route)
+            if state["body_bytes"]:
+                http_request_body_bytes.inc(method, route, amount=state["body_bytes"])
+
+
+def _threadpool_stats() -> Dict[str, dict]:
+    """Zauzetost Starlette/AnyIO threadpool-a i bcrypt pool-a (app.core.security)"""
+    import anyio.to_thread
+
+    from app.core.security import password_pool_stats
+
+    limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+    password = password_pool_stats()
+    return {
+        "anyio": {"size": limiter.total_tokens, "busy": limiter.borrowed_tokens, "queued": limiter.tasks_waiting},
+        "password_hash": {
+            "size": password["workers"],
+            "busy": min(password["in_flight"], password["workers"]),
+            "queued": max(0, password["in_flight"] - password["workers"]),
+        },
+    }
+
+
+async def _cache_stats() -> Dict[str, dict]:
+    from app.api.deps import auth_cache_stats
+    from app.core.response_cache import response_cache
+
+    return {**auth_cache_stats(), "responses": await response_cache.stats()}
+
+
+def _per_cache(field: str):
+    async def collect():
+        return {(name,): stats[field] for name, stats in (await _cache_stats()).items() if field in stats}
+    return collect
+
+
+def _per_pool(field: str):
+    def collect():
+        return {(name,): stats[field] for name, stats in _threadpool_stats().items()}
+    return collect
+
+
+def register_app_metrics(engines: Dict[str, object]) -> None:
+    """Metrike koje se čitaju pri scrape-u; engines su {ime baze: async engine}"""
+    from app.core.events import dog_events
+
+    for field, help in (("size", "Worker threads"), ("busy", "Threads running a task"),
+                        ("queued", "Tasks waiting for a free thread")):
+        registry.register(Gauge(f"threadpool_{field}", help, ("pool",), collect=_per_pool(field)))
+
+    registry.register(Gauge(
+        "db_pool_checked_out", "Database connections currently checked out", ("database",),
+        collect=lambda: {(name,): engine.pool.checkedout() for name, engine in engines.items()
+                         if hasattr(engine.pool, "checkedout")},
+    ))
+
+    for name, field, metric_type, help in (
+        ("cache_hits_total", "hits", Counter, "Cache hits"),
+        ("cache_misses_total", "misses", Counter, "Cache misses"),
+        ("cache_evictions_total", "evictions", Counter, "Entries evicted to stay under maxsize"),
+        ("cache_entries", "size", Gauge, "Entries currently in the cache"),
+    ):
+        registry.register(metric_type(name, help, ("cache",), collect=_per_cache(field)))
+
+    registry.register(Gauge(
+        "dog_stream_subscribers", "Open /api/dogs/stream connections",
+        collect=lambda: {(): dog_events.stats()["subscribers"]},
+    ))
+    registry.register(Counter(
+        "dog_stream_events_total", "Events published to /api/dogs/stream",
+        collect=lambda: {(): dog_events.stats()["published"]},
+    ))
@@ -0,0 +1,330 @@
+"""Profilisanje pojedinačnih zahteva i log sporih SQL upita (za admine).
+
+X-Profile: admin pošalje zahtev sa headerom `X-Profile: 1` i bearer tokenom;
+ProfilingMiddleware tada taj zahtev izvršava pod cProfile-om, uz listu svih
+SQL upita sa trajanjem, i rezultat čuva u memoriji (poslednjih
+PROFILE_STORE_SIZE). Odgovor dobija header X-Profile-Id, a profil se čita
+na GET /api/admin/profiles/{id} (tekstualni izveštaj ili pstats fajl za
+snakeviz/pstats). Header od ne-admina se ignoriše.
+
+cProfile meri nit event loop-a: dok je profil uključen, u njega ulazi i
+rad drugih zahteva koji se u tom trenutku izvršavaju, a ne ulazi ono što se
+radi u threadpool-u (bcrypt, obrada slika). Zato se profiliše najviše jedan
+zahtev u isto vreme - ostali dobijaju `X-Profile-Id: busy`. Profil se
+zaustavlja čim počne text/event-stream odgovor (stream traje dok je klijent
+povezan) i najkasnije posle PROFILE_MAX_SECONDS; takav profil ima
+`truncated` = "stream" / "time_limit".
+
+Spori upiti: svaki SQL upit duži od SLOW_QUERY_MS se upisuje u log
+(logger app.core.profiling) i u ring buffer (poslednjih SLOW_QUERY_LOG_SIZE,
+GET /api/admin/slow-queries), zajedno sa rutom, parametrima putanje i
+query stringom zahteva koji ga je poslao. Vrednosti SQL parametara se ne
+čuvaju (u njima su bcrypt hash-evi, email adrese...) - samo njihovi tipovi.
+
+Kad su PROFILING_ENABLED i SLOW_QUERY_MS isključeni, middleware i
+listeneri na engine-ima se ne registruju. Inače je cena po zahtevu pregled
+headera (i jedna contextvar uz log sporih upita), a po upitu dva
+perf_counter poziva.
+"""
+import asyncio
+import cProfile
+import contextvars
+import io
+import itertools
+import logging
+import marshal
+import pstats
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.metrics import route_label
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+STREAMING_CONTENT_TYPES = (b"text/event-stream",)
+
+# Najviše upita koji se pamte uz jedan profil i dužina teksta upita/tipova parametara
+MAX_PROFILE_QUERIES = 500
+MAX_STATEMENT_LENGTH = 2000
+MAX_PARAMETERS_LENGTH = 500
+
+
+def _truncate(value: str, limit: int) -> str:
+    return value if len(value) <= limit else value[:limit] + "..."
+
+
+def parameter_types(parameters) -> str:
+    """Opis SQL parametara bez vrednosti: `(int, str)`, `{email_1: str}`, `3 x (int)` za executemany"""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    if isinstance(parameters, list):
+        return f"{len(parameters)} x {parameter_types(parameters[0])}" if parameters else "[]"
+    if isinstance(parameters, tuple):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+class RequestContext:
+    """Zahtev koji se trenutno obrađuje - za upise u log sporih upita"""
+    __slots__ = ("scope", "queries")
+
+    def __init__(self, scope, queries: Optional[list] = None):
+        self.scope = scope
+        # Lista (database, sekunde, upit) samo kad se zahtev profiliše
+        self.queries = queries
+
+
+_request_context: "contextvars.ContextVar[Optional[RequestContext]]" = contextvars.ContextVar(
+    "profiling_request", default=None
+)
+
+
+def _request_info(scope) -> dict:
+    if scope is None:
+        return {"method": None, "route": None, "path": None, "path_params": {}, "query_string": ""}
+    return {
+        "method": scope.get("method"),
+        "route": route_label(scope),
+        "path": scope.get("path"),
+        "path_params": {key: str(value) for key, value in scope.get("path_params", {}).items()},
+        "query_string": scope.get("query_string", b"").decode("latin-1"),
+    }
+
+
+class SlowQueryLog:
+    """Poslednji spori upiti, najnoviji na kraju"""
+
+    def __init__(self, maxsize: int):
+        self._entries = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+        self.recorded = 0
+
+    def record(self, database: str, seconds: float, statement: str, parameters) -> None:
+        context = _request_context.get()
+        entry = {
+            "timestamp": _timestamp(),
+            "duration_ms": round(seconds * 1000, 3),
+            "database": database,
+            "statement": _truncate(statement, MAX_STATEMENT_LENGTH),
+            "parameter_types": _truncate(parameter_types(parameters), MAX_PARAMETERS_LENGTH),
+            **_request_info(context.scope if context is not None else None),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+        logger.warning(
+            "Slow query %.1f ms on %s (%s %s): %s",
+            entry["duration_ms"], database, entry["method"], entry["route"], " ".join(entry["statement"].split()),
+        )
+
+    def entries(self, limit: Optional[int] = None) -> List[dict]:
+        """Najnoviji prvi"""
+        with self._lock:
+            entries = list(reversed(self._entries))
+        return entries[:limit] if limit is not None else entries
+
+
+slow_queries = SlowQueryLog(settings.SLOW_QUERY_LOG_SIZE)
+
+
+def instrument_slow_queries(engine, database: str = "primary") -> None:
+    """Log sporih upita i upiti profilisanih zahteva (za async engine proslediti .sync_engine)"""
+    threshold = settings.SLOW_QUERY_MS / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if threshold and elapsed >= threshold:
+            slow_queries.record(database, elapsed, statement, parameters)
+        request = _request_context.get()
+        if request is not None and request.queries is not None and len(request.queries) < MAX_PROFILE_QUERIES:
+            request.queries.append((database, elapsed, statement))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        starts = context.connection.info.get("slow_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+
+class ProfileStore:
+    """Poslednji profili zahteva; pstats.Stats se čuva da bi se izveštaj mogao
+    sortirati naknadno"""
+
+    def __init__(self, maxsize: int):
+        self._profiles = deque(maxlen=maxsize)
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> str:
+        return str(next(self._ids))
+
+    def add(self, profile: dict) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        for profile in self._profiles:
+            if profile["id"] == profile_id:
+                return profile
+        return None
+
+    def summaries(self) -> List[dict]:
+        """Najnoviji prvi, bez izveštaja"""
+        return [
+            {key: value for key, value in profile.items() if key not in ("stats", "queries")}
+            for profile in reversed(self._profiles)
+        ]
+
+
+profiles = ProfileStore(settings.PROFILE_STORE_SIZE)
+
+
+def profile_report(profile: dict, sort: str = "cumulative", limit: int = 50) -> str:
+    """pstats izveštaj (najskupljih `limit` funkcija) i upiti zahteva"""
+    stream = io.StringIO()
+    stats = profile["stats"]
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    stats.stream = None
+
+    lines = [
+        f"{profile['method']} {profile['path']}"
+        f"{'?' + profile['query_string'] if profile['query_string'] else ''} -> {profile['status']}",
+        f"route {profile['route']}, {profile['duration_ms']} ms, {profile['query_count']} queries "
+        f"({profile['db_ms']} ms)" + (f", truncated: {profile['truncated']}" if profile["truncated"] else ""),
+        "",
+    ]
+    for database, seconds, statement in profile["queries"]:
+        lines.append(f"{seconds * 1000:9.3f} ms  [{database}] {' '.join(statement.split())}")
+    return "\n".join(lines) + "\n" + stream.getvalue()
+
+
+def profile_pstats(profile: dict) -> bytes:
+    """Isti format koji piše pstats.Stats.dump_stats (učitava se sa pstats.Stats(putanja))"""
+    return marshal.dumps(profile["stats"].stats)
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def _bearer_token(scope) -> Optional[str]:
+    value = _header(scope, b"authorization")
+    if value is None:
+        return None
+    scheme, _, token = value.decode("latin-1").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" and token else None
+
+
+class ProfilingMiddleware:
+    """Čist ASGI middleware: kontekst zahteva za log sporih upita i X-Profile"""
+
+    def __init__(self, app):
+        self.app = app
+        self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if settings.PROFILING_ENABLED and _header(scope, PROFILE_HEADER) and await self._allowed(scope):
+            await self._profiled(scope, receive, send)
+        elif settings.SLOW_QUERY_MS > 0:
+            token = _request_context.set(RequestContext(scope))
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _request_context.reset(token)
+        else:
+            await self.app(scope, receive, send)
+
+    async def _allowed(self, scope) -> bool:
+        from app.api.deps import admin_from_token
+
+        token = _bearer_token(scope)
+        return token is not None and await admin_from_token(token) is not None
+
+    async def _profiled(self, scope, receive, send):
+        if self._active:
+            await self.app(scope, receive, _with_header(send, PROFILE_ID_HEADER, b"busy"))
+            return
+
+        profile_id = profiles.next_id()
+        context = RequestContext(scope, queries=[])
+        state = {"status": 500, "finished": False}
+        profiler = cProfile.Profile()
+
+        def finish(truncated: Optional[str] = None) -> None:
+            """Zaustavlja profil i čuva ga; ostatak zahteva se izvršava bez profila"""
+            if state["finished"]:
+                return
+            state["finished"] = True
+            profiler.disable()
+            duration = time.perf_counter() - start
+            timer.cancel()
+            self._active = False
+            queries, context.queries = context.queries, None
+            profiles.add({
+                "id": profile_id,
+                "timestamp": _timestamp(),
+                **_request_info(scope),
+                "status": state["status"],
+                "duration_ms": round(duration * 1000, 3),
+                "truncated": truncated,
+                "query_count": len(queries),
+                "db_ms": round(sum(seconds for _, seconds, _ in queries) * 1000, 3),
+                "queries": queries,
+                "stats": pstats.Stats(profiler),
+            })
+
+        async def send_observing(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                if _content_type(message).startswith(STREAMING_CONTENT_TYPES):
+                    finish("stream")
+            await send(message)
+
+        token = _request_context.set(context)
+        self._active = True
+        timer = asyncio.get_running_loop().call_later(settings.PROFILE_MAX_SECONDS, finish, "time_limit")
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, _with_header(send_observing, PROFILE_ID_HEADER, profile_id.encode()))
+        finally:
+            finish()
+            _request_context.reset(token)
+
+
+def _content_type(message) -> bytes:
+    for key, value in message.get("headers", []):
+        if key.lower() == b"content-type":
+            return value
+    return b""
+
+
+def _with_header(send, name: bytes, value: bytes):
+    async def send_with_header(message):
+        if message["type"] == "http.response.start":
+            message = {**message, "headers": [*message.get("headers", []), (name, value)]}
+        await send(message)
+    return send_with_header
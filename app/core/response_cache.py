@@ -0,0 +1,185 @@
+"""Keš gotovih JSON odgovora za javne GET endpointe pasa.
+
+Čuvaju se već serijalizovani bajtovi zajedno sa ETag/Last-Modified
+validatorima, pa pogodak (i 304 odgovor na pogodak) ne dira bazu ni pydantic.
+Ključ sadrži "generaciju" keša: svaki upis (nova prijava, izmena, slika,
+promena statusa) povećava generaciju i time odjednom poništava sve liste i
+detalje. Odgovor koji se pravio dok je upis trajao snima se pod starom
+generacijom i nikad se ne čita. Generacija pamti i vreme invalidacije, da
+čitanja sa replika koje kasne ne bi popunila novu generaciju starim stanjem
+(app.api.api_v1.utils.response_cache_fillable).
+
+Podrazumevano je keš lokalan za proces (LRU); sa RESPONSE_CACHE_URL
+(`redis://...`, bilo koji server koji govori Redis protokol) keš i
+generaciju dele svi worker-i, pa invalidacija važi odmah za sve. Kad Redis
+nije dostupan, odgovori se prave bez keša (greška se loguje).
+"""
+import logging
+import time
+from typing import NamedTuple, Optional
+
+try:
+    import redis.asyncio as redis
+    from redis.exceptions import RedisError
+except ImportError:  # redis je opcion - potreban samo za RESPONSE_CACHE_URL
+    redis = None
+    RedisError = OSError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class Generation(NamedTuple):
+    number: int
+    # time.time() poslednje invalidacije (0 ako je nije bilo)
+    invalidated_at: float = 0.0
+
+
+def cache_key(namespace: str, **params) -> str:
+    """Normalizovan ključ: parametri sortirani po imenu, None vrednosti izostavljene"""
+    parts = [f"{name}={value}" for name, value in sorted(params.items()) if value is not None]
+    return f"{namespace}?{'&'.join(parts)}"
+
+
+class MemoryResponseCache:
+    """LRU keš u memoriji procesa; drugi worker-i vide invalidaciju tek po isteku TTL-a"""
+
+    def __init__(self, maxsize: int, ttl: Optional[float]):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generation = Generation(0)
+
+    async def generation(self) -> Generation:
+        return self._generation
+
+    async def get(self, generation: Generation, key: str) -> Optional[CachedResponse]:
+        return self._entries.get((generation.number, key))
+
+    async def set(self, generation: Generation, key: str, response: CachedResponse) -> None:
+        if generation.number == self._generation.number:
+            self._entries.set((generation.number, key), response)
+
+    async def invalidate(self) -> None:
+        self._generation = Generation(self._generation.number + 1, time.time())
+        self._entries.clear()
+
+    async def stats(self) -> dict:
+        return {"backend": "memory", "generation": self._generation.number, **self._entries.stats()}
+
+
+class RedisResponseCache:
+    """Keš na Redis serveru (ili drugom serveru sa Redis protokolom), deljen između worker-a.
+
+    Greške servera pri čitanju keša se loguju i broje (`errors`): generation()
+    tada vraća None, pa pozivalac pravi odgovor bez keša, a neuspešan upis u
+    keš se preskače.
+    """
+
+    def __init__(self, client, ttl: Optional[float], prefix: str = "dog_rescue:responses:"):
+        self.client = client
+        self.ttl = int(ttl) if ttl else None
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @classmethod
+    def from_url(cls, url: str, ttl: Optional[float]) -> "RedisResponseCache":
+        if redis is None:
+            raise RuntimeError("RESPONSE_CACHE_URL requires the redis package (pip install redis)")
+        return cls(redis.from_url(url), ttl)
+
+    def _generation_key(self) -> str:
+        return f"{self.prefix}generation"
+
+    def _invalidated_at_key(self) -> str:
+        return f"{self.prefix}invalidated_at"
+
+    def _failed(self, operation: str, exc: Exception) -> None:
+        self.errors += 1
+        logger.warning("Response cache %s failed, serving uncached: %s", operation, exc)
+
+    async def generation(self) -> Optional[Generation]:
+        try:
+            number, invalidated_at = await self.client.mget(self._generation_key(), self._invalidated_at_key())
+        except RedisError as exc:
+            self._failed("generation", exc)
+            return None
+        return Generation(int(number or 0), float(invalidated_at or 0))
+
+    async def get(self, generation: Generation, key: str) -> Optional[CachedResponse]:
+        try:
+            fields = await self.client.hgetall(f"{self.prefix}{generation.number}:{key}")
+        except RedisError as exc:
+            self._failed("get", exc)
+            return None
+        if not fields:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag = fields.get(b"etag")
+        last_modified = fields.get(b"last_modified")
+        return CachedResponse(
+            fields[b"body"],
+            etag.decode("ascii") if etag else None,
+            last_modified.decode("ascii") if last_modified else None,
+        )
+
+    async def set(self, generation: Generation, key: str, response: CachedResponse) -> None:
+        name = f"{self.prefix}{generation.number}:{key}"
+        fields = {field: value for field, value in response._asdict().items() if value is not None}
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.hset(name, mapping=fields)
+                # Stare generacije se ne brišu eksplicitno - ističu same (TTL)
+                if self.ttl:
+                    pipe.expire(name, self.ttl)
+                await pipe.execute()
+        except RedisError as exc:
+            self._failed("set", exc)
+
+    async def invalidate(self) -> None:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(self._generation_key())
+            pipe.set(self._invalidated_at_key(), repr(time.time()))
+            await pipe.execute()
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        generation = await self.generation()
+        return {
+            "backend": "redis",
+            "generation": generation.number if generation is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _create_response_cache():
+    if settings.RESPONSE_CACHE_URL:
+        return RedisResponseCache.from_url(settings.RESPONSE_CACHE_URL, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return MemoryResponseCache(settings.RESPONSE_CACHE_MAX_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+
+response_cache = _create_response_cache()
+
+
+async def invalidate_dog_responses() -> None:
+    """Poziva se posle svakog commit-a koji menja pse, slike ili prikaz korisnika u prijavi.
+
+    Greška keš servera ne sme da obori upis koji je već commit-ovan - loguje
+    se, a zastareli odgovori ističu posle RESPONSE_CACHE_TTL_SECONDS.
+    """
+    try:
+        await response_cache.invalidate()
+    except Exception:
+        logger.exception("Response cache invalidation failed")
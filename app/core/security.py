@@ -1,10 +1,45 @@
 from datetime import datetime, timedelta
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import HTTPException, status
 from app.core.config import settings
 
+# Poseban, ograničen pool za bcrypt. bcrypt oslobađa GIL tokom hashiranja, pa
+# su niti dovoljne; talas prijava tako ne zauzima Starlette threadpool koji
+# opslužuje sve ostale sync endpointe.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+
+_password_jobs = 0  # poslovi u pool-u (izvršavaju se ili čekaju)
+
+async def _run_password_job(func, *args):
+    """Posao u password pool-u; 503 ako je red pun.
+
+    Red ThreadPoolExecutor-a nije ograničen, pa se ograničava ovde: brojač
+    menja samo event loop, bez zaključavanja.
+    """
+    global _password_jobs
+    if _password_jobs >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password operations in progress, try again",
+            headers={"Retry-After": "1"},
+        )
+    _password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs -= 1
+
+def password_pool_stats() -> dict:
+    """in_flight > workers znači da prijave čekaju na bcrypt"""
+    return {"workers": settings.PASSWORD_HASH_WORKERS, "in_flight": _password_jobs}
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifikuje lozinku sa hash-om"""
     try:
@@ -31,12 +66,29 @@ def get_password_hash(password: str) -> str:
         password_bytes = password_bytes[:72]
     
     # Generiši salt i hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     
     # Vrati kao string
     return hashed.decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Da li je hash napravljen sa cenom različitom od BCRYPT_ROUNDS"""
+    try:
+        # Format: $2b$<rounds>$<salt+hash>
+        rounds = int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return True
+    return rounds != settings.BCRYPT_ROUNDS
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password u password pool-u, bez blokiranja event loop-a"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash u password pool-u, bez blokiranja event loop-a"""
+    return await _run_password_job(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -0,0 +1,186 @@
+import os
+import re
+from email.utils import formatdate, parsedate
+from typing import Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+
+# Fajlovi snimljeni posle deduplikacije počinju SHA-256 hash-om sadržaja
+_CONTENT_HASH_NAME = re.compile(r"^[0-9a-f]{64}")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def _etag(full_path: str, stat_result: os.stat_result) -> str:
+    """Jak ETag: ime fajla za content-addressed fajlove, inače mtime+veličina"""
+    name = os.path.basename(full_path)
+    if _CONTENT_HASH_NAME.match(name):
+        return f'"{name}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match koristi slabo poređenje - W/ prefiks se zanemaruje
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parsira `bytes=start-end` u (start, end) uključivo.
+
+    Vraća None za opsege koje ignorišemo (više opsega, nepoznata jedinica) -
+    tada se šalje ceo fajl. Baca RangeNotSatisfiable za opseg van fajla.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str == "":
+            # Sufiks: poslednjih N bajtova
+            length = int(end_str)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(FileResponse):
+    """FileResponse koji šalje ceo fajl ili jedan bajt-opseg.
+
+    Kada ASGI server podržava `http.response.zerocopy` ekstenziju, telo se
+    šalje preko sendfile-a; u suprotnom se čita u komadima.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, path: str, start: int, length: int, **kwargs) -> None:
+        self.start = start
+        self.length = length
+        super().__init__(path, **kwargs)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.send_header_only or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if "http.response.zerocopy" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file.wrapped,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+
+            await file.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                # Fajl je skraćen u međuvremenu - zatvori telo odgovora
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadsStaticFiles(StaticFiles):
+    """StaticFiles za /uploads sa dugim keširanjem, jakim ETag-om i Range podrškom.
+
+    Sadržaj uploadovanog fajla se nikad ne menja pod istim imenom, pa se
+    odgovori označavaju kao immutable i CDN/browser ne moraju da ih
+    revalidiraju.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        size = stat_result.st_size
+        etag = _etag(str(full_path), stat_result)
+        headers = {
+            "cache-control": f"public, max-age={settings.UPLOADS_CACHE_MAX_AGE}, immutable",
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+
+        if self._not_modified(request_headers, etag, stat_result):
+            return Response(status_code=304, headers=headers)
+
+        start, length = 0, size
+        range_header = request_headers.get("range")
+        if_range = request_headers.get("if-range")
+        if range_header and (if_range is None or if_range.strip() == etag):
+            try:
+                byte_range = _parse_range(range_header, size)
+            except RangeNotSatisfiable:
+                headers["content-range"] = f"bytes */{size}"
+                return Response(status_code=416, headers=headers)
+            if byte_range is not None:
+                start, end = byte_range
+                length = end - start + 1
+                status_code = 206
+                headers["content-range"] = f"bytes {start}-{end}/{size}"
+
+        headers["content-length"] = str(length)
+        return FileRangeResponse(
+            full_path,
+            start=start,
+            length=length,
+            status_code=status_code,
+            headers=headers,
+            stat_result=stat_result,
+            method=scope["method"],
+        )
+
+    @staticmethod
+    def _not_modified(request_headers: Headers, etag: str, stat_result: os.stat_result) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_modified_since is not None:
+            parsed = parsedate(if_modified_since)
+            last_modified = parsedate(formatdate(stat_result.st_mtime, usegmt=True))
+            return parsed is not None and parsed >= last_modified
+        return False
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import tempfile
+from typing import Iterable, NamedTuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+class UploadTooLarge(Exception):
+    """Upload je prešao MAX_FILE_SIZE"""
+
+
+class StoredUpload(NamedTuple):
+    filename: str
+    sha256: str
+    size: int
+    # Privremeni fajl sa sadržajem dok ga place_upload ne postavi ili odbaci
+    tmp_path: str
+
+
+# Ista slika sa .jpeg i .jpg ekstenzijom mora dobiti isto ime fajla
+_CANONICAL_EXTENSIONS = {"jpeg": "jpg"}
+
+
+def upload_path(filename: str) -> str:
+    return os.path.join(settings.UPLOAD_DIR, filename)
+
+
+async def save_upload(file: UploadFile, extension: str) -> StoredUpload:
+    """Snima upload u privremeni fajl u UPLOAD_DIR i računa ime <sha256>.<ext>.
+
+    Sadržaj se kopira u komadima od UPLOAD_CHUNK_SIZE i usput hashira, pa je
+    memorija po uploadu ograničena veličinom komada. MAX_FILE_SIZE se
+    proverava usput - kopiranje se prekida čim se pređe. Pod konačno ime fajl
+    postavlja place_upload (iz acquire_blob, dok je referenca na sadržaj
+    zaključana); pozivalac posle toga zove discard_upload za slučaj da do
+    toga nije došlo. Ime zavisi samo od sadržaja, pa su sačuvani fajlovi
+    nepromenljivi.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix=".upload-", suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_FILE_SIZE:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+
+        sha256 = digest.hexdigest()
+        filename = f"{sha256}.{_CANONICAL_EXTENSIONS.get(extension, extension)}"
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return StoredUpload(filename, sha256, size, tmp_path)
+
+
+def place_upload(upload: StoredUpload) -> None:
+    """Postavlja sadržaj pod konačno ime; ako fajl već postoji, privremeni se odbacuje.
+
+    Preimenovanje je atomsko, pa /uploads nikad ne vidi delimično upisan fajl.
+    """
+    if os.path.exists(upload_path(upload.filename)):
+        discard_upload(upload)
+    else:
+        os.replace(upload.tmp_path, upload_path(upload.filename))
+
+
+def discard_upload(upload: StoredUpload) -> None:
+    """Briše privremeni fajl ako je još tu"""
+    try:
+        os.remove(upload.tmp_path)
+    except OSError:
+        pass
+
+
+def delete_upload(filename: str) -> None:
+    """Briše fajl iz UPLOAD_DIR; greške se ignorišu (zapis u bazi je bitniji)"""
+    try:
+        os.remove(upload_path(filename))
+    except OSError:
+        pass  # Continue even if file deletion fails
+
+
+def delete_uploads(filenames: Iterable[str]) -> None:
+    for filename in filenames:
+        delete_upload(filename)
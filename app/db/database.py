@@ -1,24 +1,157 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.profiling import instrument_slow_queries
+from app.db.routing import PrimarySession, ReadWriteRouter, ReplicaSession
+from app.db.spatial import register_sqlite_functions
+
+is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+is_sqlite_memory = is_sqlite and (":memory:" in settings.DATABASE_URL or settings.DATABASE_URL.rstrip("/") == "sqlite:")
+
+# Pool konfiguracija
+# - SQLite fajl: QueuePool; konekcije su jeftine, ali svaka drži svoj page
+#   cache i mmap, pa je DB_POOL_SIZE ujedno i broj "toplih" konekcija.
+#   WAL dozvoljava paralelne čitaoce uz jednog pisca, pa pool veći od broja
+#   worker niti nema smisla. pre_ping nije potreban (nema mreže).
+# - SQLite :memory:: SQLAlchemy bira poseban pool po niti; pool opcije se ne
+#   prosleđuju.
+# - Server baze (PostgreSQL...): pool_size + max_overflow ograničavaju broj
+#   konekcija po worker procesu (ukupno = workers * (size + overflow)),
+#   pool_recycle štiti od konekcija koje server/proxy zatvori, a pre_ping
+#   otkriva prekinute konekcije pre upotrebe.
+engine_kwargs = {"echo": settings.DEBUG}
+if not is_sqlite_memory:
+    engine_kwargs.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING and not is_sqlite,
+    )
 
 # SQLite specific configuration
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+connect_args = {"check_same_thread": False} if is_sqlite else {}
 
+# Sync engine - kreiranje šeme pri startu, background taskovi i CLI skripte
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
-    echo=settings.DEBUG
+    **engine_kwargs
+)
+
+# Async drajveri za isti DATABASE_URL
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def async_database_url(url: str) -> str:
+    """sqlite:// -> sqlite+aiosqlite://, postgresql:// -> postgresql+asyncpg://"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+# aiosqlite podrazumevano koristi NullPool (nova konekcija, nit i PRAGMA-e
+# za svaki upit) - za fajl bazu konekcije se drže u pool-u kao i kod sync-a
+async_engine_kwargs = dict(engine_kwargs)
+if is_sqlite and not is_sqlite_memory:
+    async_engine_kwargs["poolclass"] = AsyncAdaptedQueuePool
+
+# Async engine - koriste ga svi API endpointi, pa čekanje na bazu ne zauzima nit
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    connect_args=connect_args,
+    **async_engine_kwargs
 )
 
+def configure_sqlite_connection(dbapi_connection) -> None:
+    """PRAGMA podešavanja koja važe po konekciji (WAL, cache, mmap, busy timeout...)"""
+    cursor = dbapi_connection.cursor()
+    try:
+        if not is_sqlite_memory:
+            # WAL: čitaoci ne blokiraju pisca i obrnuto; trajno je za fajl
+            cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # NORMAL je bezbedan uz WAL - gubi se najviše poslednja transakcija pri padu OS-a
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        # Negativna vrednost je u KiB
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA foreign_keys={'ON' if settings.SQLITE_FOREIGN_KEYS else 'OFF'}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+def _on_sqlite_connect(dbapi_connection, connection_record):
+    configure_sqlite_connection(dbapi_connection)
+    register_sqlite_functions(dbapi_connection)
+
+if is_sqlite:
+    # Async engine okida iste događaje preko svog sync_engine-a
+    event.listen(engine, "connect", _on_sqlite_connect)
+    event.listen(async_engine.sync_engine, "connect", _on_sqlite_connect)
+
+def create_replica_engine(url: str):
+    """Async engine za read repliku (iste vrste baze kao primarna, ista pool podešavanja)"""
+    replica_engine = create_async_engine(
+        async_database_url(url),
+        connect_args=connect_args,
+        **async_engine_kwargs
+    )
+    if is_sqlite:
+        event.listen(replica_engine.sync_engine, "connect", _on_sqlite_connect)
+    return replica_engine
+
+replica_engines = [create_replica_engine(url) for url in settings.DATABASE_REPLICA_URLS]
+
+# Broj i trajanje upita za /metrics (app/core/metrics.py)
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, "primary")
+    instrument_engine(async_engine.sync_engine, "primary")
+    for index, replica_engine in enumerate(replica_engines):
+        instrument_engine(replica_engine.sync_engine, f"replica{index}")
+
+# Log sporih upita i upiti zahteva sa X-Profile (app/core/profiling.py)
+if settings.PROFILING_ENABLED or settings.SLOW_QUERY_MS > 0:
+    instrument_slow_queries(engine, "primary")
+    instrument_slow_queries(async_engine.sync_engine, "primary")
+    for index, replica_engine in enumerate(replica_engines):
+        instrument_slow_queries(replica_engine.sync_engine, f"replica{index}")
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# expire_on_commit=False - posle commit-a atributi ostaju učitani, jer bi
+# implicitni lazy load van await-a u async sesiji bacio grešku
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=PrimarySession,
+    autoflush=False, expire_on_commit=False
+)
+
+# Čitanja idu na replike, a upisi i čitanja odmah posle upisa na primarnu bazu
+# (get_read_db u app/api/deps.py); bez replika sve ide na primarnu
+db_router = ReadWriteRouter(
+    writer=AsyncSessionLocal,
+    readers=[
+        async_sessionmaker(
+            replica_engine, class_=AsyncSession, sync_session_class=ReplicaSession,
+            autoflush=False, expire_on_commit=False
+        )
+        for replica_engine in replica_engines
+    ],
+    sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+    sticky_max_size=settings.USER_CACHE_MAX_SIZE,
+)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,158 @@
+"""Verzionisane migracije šeme baze.
+
+Svaka migracija je modul `versions/vNNNN_opis.py` sa funkcijom
+`upgrade(connection)`; broj u imenu je verzija, a prva linija docstring-a
+opis. Primenjene verzije se beleže u tabeli `schema_version`.
+
+Migracije koriste sopstvene ("zamrznute") definicije tabela, ne
+app.db.models - kasnije izmene modela ne smeju da promene šta je neka
+stara migracija radila.
+
+    python -m app.db.migrations upgrade    # primeni sve nove migracije
+    python -m app.db.migrations current    # trenutna i najnovija verzija
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from functools import lru_cache
+from types import ModuleType
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+from app.db.migrations import versions
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+# Proizvoljan ključ za PostgreSQL advisory lock tokom migracije
+_PG_LOCK_KEY = 0x646F6773
+
+_VERSION_MODULE = re.compile(r"^v(\d{4})_\w+$")
+
+
+class SchemaOutOfDate(RuntimeError):
+    """Baza je na starijoj verziji šeme nego što aplikacija očekuje"""
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    module: ModuleType
+
+
+@lru_cache(maxsize=None)
+def migrations() -> List[Migration]:
+    """Sve migracije iz versions/ paketa, sortirane po verziji"""
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        match = _VERSION_MODULE.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{info.name}")
+        description = (module.__doc__ or info.name).strip().splitlines()[0]
+        found.append(Migration(int(match.group(1)), description, module))
+    found.sort(key=lambda migration: migration.version)
+    return found
+
+
+def head_version() -> int:
+    all_migrations = migrations()
+    return all_migrations[-1].version if all_migrations else 0
+
+
+def current_version(connection: Connection) -> int:
+    """Najveća primenjena verzija; 0 ako schema_version još ne postoji.
+
+    Posle greške transakcija konekcije je neupotrebljiva (PostgreSQL), pa
+    pozivalac treba da koristi zasebnu konekciju samo za ovu proveru.
+    """
+    try:
+        return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+    except (OperationalError, ProgrammingError):
+        return 0
+
+
+def _lock(connection: Connection) -> None:
+    """Serijalizuje migracije između procesa koji startuju u isto vreme.
+
+    Na SQLite-u upis u schema_version na početku transakcije već drži
+    write lock do commit-a; PostgreSQL dobija advisory lock.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+
+
+def _create_version_table(engine: Engine) -> None:
+    try:
+        _metadata.create_all(engine, checkfirst=True)
+    except (OperationalError, ProgrammingError):
+        # Drugi proces je kreirao tabelu između provere i CREATE TABLE
+        with engine.connect() as connection:
+            if not inspect(connection).has_table(schema_version.name):
+                raise
+
+
+def upgrade(engine: Engine, target: Optional[int] = None) -> List[int]:
+    """Primenjuje migracije do `target` (podrazumevano najnovije); vraća primenjene verzije.
+
+    Svaka migracija se izvršava u svojoj transakciji zajedno sa upisom u
+    schema_version. Ako je drugi proces u međuvremenu primenio istu verziju,
+    upis pada na primarnom ključu i migracija se preskače.
+    """
+    target = head_version() if target is None else target
+    with engine.connect() as connection:
+        current = current_version(connection)
+    if current >= target:
+        return []
+
+    _create_version_table(engine)
+
+    applied = []
+    for migration in migrations():
+        if migration.version <= current or migration.version > target:
+            continue
+        try:
+            with engine.begin() as connection:
+                _lock(connection)
+                connection.execute(insert(schema_version).values(
+                    version=migration.version, description=migration.description
+                ))
+                migration.module.upgrade(connection)
+        except IntegrityError:
+            logger.info("Migration %04d already applied by another process", migration.version)
+            continue
+        logger.info("Applied migration %04d: %s", migration.version, migration.description)
+        applied.append(migration.version)
+    return applied
+
+
+def check_schema(engine: Engine) -> int:
+    """Jeftina provera pri startu: jedan SELECT nad schema_version.
+
+    Baca SchemaOutOfDate ako baza nije migrirana do verzije koju aplikacija
+    očekuje. Novija šema je dozvoljena (rolling restart sa starijim kodom).
+    """
+    with engine.connect() as connection:
+        current = current_version(connection)
+    head = head_version()
+    if current < head:
+        raise SchemaOutOfDate(
+            f"Database schema is at version {current}, application requires {head}. "
+            "Run: python -m app.db.migrations upgrade"
+        )
+    if current > head:
+        logger.warning("Database schema version %d is newer than application version %d", current, head)
+    return current
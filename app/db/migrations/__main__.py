@@ -0,0 +1,36 @@
+"""CLI za migracije: python -m app.db.migrations upgrade|current|history"""
+import argparse
+import logging
+import sys
+
+from app.db.database import engine
+from app.db.migrations import current_version, head_version, migrations, upgrade
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="target version (default: latest)")
+    commands.add_parser("current", help="show the database and latest schema version")
+    commands.add_parser("history", help="list all migrations")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "upgrade":
+        applied = upgrade(engine, target=args.to)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+    elif args.command == "current":
+        with engine.connect() as connection:
+            current = current_version(connection)
+        print(f"current: {current:04d}  latest: {head_version():04d}")
+        return 0 if current >= head_version() else 1
+    elif args.command == "history":
+        for migration in migrations():
+            print(f"{migration.version:04d}  {migration.description}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Migracije šeme, po jedna po verziji (vNNNN_opis.py)"""
@@ -0,0 +1,106 @@
+"""Početna šema: korisnici, psi, slike, varijante, blob-ovi i prostorni indeks
+
+Idempotentna - na bazi koju je ranije napravio create_all kreira samo ono
+što nedostaje (npr. indekse za paginaciju na starijim bazama).
+
+Prostorni indeks (samo SQLite): R*Tree tabela dogs_rtree koju triggeri na
+dogs drže u skladu sa tabelom; upiti nad njom su u app.db.spatial.
+"""
+from sqlalchemy import (
+    Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, MetaData,
+    String, Table, Text, func, text,
+)
+
+metadata = MetaData()
+
+users = Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True, nullable=False),
+    Column("hashed_password", String, nullable=False),
+    Column("full_name", String, nullable=False),
+    Column("is_admin", Boolean, default=False),
+    Column("is_active", Boolean, default=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+dogs = Table(
+    "dogs",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("title", String, nullable=False),
+    Column("description", Text),
+    Column("latitude", Float, nullable=False),
+    Column("longitude", Float, nullable=False),
+    Column("status", Enum("REPORTED", "PENDING_ADMIN", "CONFIRMED", "REMOVED", name="dogstatus")),
+    Column("reporter_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("picked_up_by_user_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    Column("updated_at", DateTime(timezone=True)),
+    Index("ix_dogs_created_at_id", "created_at", "id"),
+    Index("ix_dogs_status_created_at_id", "status", "created_at", "id"),
+)
+
+dog_images = Table(
+    "dog_images",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("dog_id", Integer, ForeignKey("dogs.id"), nullable=False),
+    Column("filename", String, nullable=False),
+    Column("uploaded_by", Integer, ForeignKey("users.id"), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+image_blobs = Table(
+    "image_blobs",
+    metadata,
+    Column("sha256", String(64), primary_key=True),
+    Column("filename", String, unique=True, nullable=False),
+    Column("size", Integer, nullable=False),
+    Column("ref_count", Integer, nullable=False, default=0),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+image_variants = Table(
+    "image_variants",
+    metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("source_filename", String, nullable=False, index=True),
+    Column("kind", String, nullable=False),
+    Column("filename", String, nullable=False),
+    Column("width", Integer, nullable=False),
+    Column("height", Integer, nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+_SQLITE_SPATIAL_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS dogs_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+    """CREATE TRIGGER IF NOT EXISTS dogs_rtree_ai AFTER INSERT ON dogs BEGIN
+        INSERT INTO dogs_rtree VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS dogs_rtree_au AFTER UPDATE OF latitude, longitude ON dogs BEGIN
+        UPDATE dogs_rtree SET min_lat = new.latitude, max_lat = new.latitude,
+            min_lng = new.longitude, max_lng = new.longitude
+        WHERE id = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS dogs_rtree_ad AFTER DELETE ON dogs BEGIN
+        DELETE FROM dogs_rtree WHERE id = old.id;
+    END""",
+    # Popuni indeks za redove koji su postojali pre nego što je indeks uveden
+    """INSERT INTO dogs_rtree
+        SELECT id, latitude, latitude, longitude, longitude FROM dogs
+        WHERE id NOT IN (SELECT id FROM dogs_rtree)""",
+]
+
+
+def upgrade(connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
+    # create_all preskače indekse tabela koje već postoje
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    if connection.dialect.name == "sqlite":
+        for statement in _SQLITE_SPATIAL_DDL:
+            connection.execute(text(statement))
@@ -0,0 +1,35 @@
+"""Indeksi na stranim ključevima: dogs.reporter_id, dogs.picked_up_by_user_id, dog_images.dog_id
+
+status i created_at već pokrivaju kompozitni indeksi iz baseline-a
+(ix_dogs_status_created_at_id, ix_dogs_created_at_id) - zaseban indeks na
+vodećoj koloni bio bi samo dodatni trošak pri upisu.
+"""
+from sqlalchemy import Column, Index, Integer, MetaData, Table
+
+metadata = MetaData()
+
+dogs = Table(
+    "dogs",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("reporter_id", Integer),
+    Column("picked_up_by_user_id", Integer),
+)
+
+dog_images = Table(
+    "dog_images",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("dog_id", Integer),
+)
+
+indexes = [
+    Index("ix_dogs_reporter_id", dogs.c.reporter_id),
+    Index("ix_dogs_picked_up_by_user_id", dogs.c.picked_up_by_user_id),
+    Index("ix_dog_images_dog_id", dog_images.c.dog_id),
+]
+
+
+def upgrade(connection) -> None:
+    for index in indexes:
+        index.create(connection, checkfirst=True)
@@ -0,0 +1,30 @@
+"""Parcijalni indeks (created_at, id) za pse koji nisu uklonjeni
+
+Zamenjuje ix_dogs_created_at_id: lista pasa uvek isključuje REMOVED, pa
+parcijalni indeks daje redosled bez filtriranja uklonjenih redova i manji
+je. Upiti po statusu koriste ix_dogs_status_created_at_id.
+"""
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, text
+
+metadata = MetaData()
+
+dogs = Table(
+    "dogs",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("status", String),
+    Column("created_at", DateTime(timezone=True)),
+)
+
+_VISIBLE = "status != 'REMOVED'"
+
+visible_created_at_id = Index(
+    "ix_dogs_visible_created_at_id", dogs.c.created_at, dogs.c.id,
+    sqlite_where=text(_VISIBLE), postgresql_where=text(_VISIBLE)
+)
+created_at_id = Index("ix_dogs_created_at_id", dogs.c.created_at, dogs.c.id)
+
+
+def upgrade(connection) -> None:
+    visible_created_at_id.create(connection, checkfirst=True)
+    created_at_id.drop(connection, checkfirst=True)
@@ -0,0 +1,69 @@
+"""Tabela dog_changes sa triggerima - log promena pasa za GET /api/dogs/changes
+
+Za svakog psa čuva se samo poslednja promena: svaki INSERT/UPDATE/DELETE
+nad dogs dodeljuje psu novi, veći seq (DELETE ostavlja tombstone), pa je
+tabela veličine skupa pasa, a ne istorije izmena. Trigger u bazi hvata i
+bulk UPDATE upite koji ne prolaze kroz ORM sesiju.
+
+seq mora da raste redosledom commit-ova, inače bi klijent koji je već
+pročitao veći seq preskočio promenu koja se commit-uje kasnije. SQLite ima
+jednog pisca, pa to važi samo po sebi; na PostgreSQL-u trigger uzima
+advisory lock do kraja transakcije.
+"""
+from sqlalchemy import text
+
+# Različit od app.db.migrations._PG_LOCK_KEY (lock za migracije)
+_PG_CHANGES_LOCK_KEY = 0x646F6774
+
+_SQLITE_DDL = [
+    """CREATE TABLE IF NOT EXISTS dog_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        dog_id INTEGER NOT NULL UNIQUE,
+        deleted BOOLEAN NOT NULL DEFAULT 0
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS dogs_changes_ai AFTER INSERT ON dogs BEGIN
+        INSERT OR REPLACE INTO dog_changes (dog_id, deleted) VALUES (new.id, 0);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS dogs_changes_au AFTER UPDATE ON dogs BEGIN
+        INSERT OR REPLACE INTO dog_changes (dog_id, deleted) VALUES (new.id, 0);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS dogs_changes_ad AFTER DELETE ON dogs BEGIN
+        INSERT OR REPLACE INTO dog_changes (dog_id, deleted) VALUES (old.id, 1);
+    END""",
+]
+
+_POSTGRESQL_DDL = [
+    "CREATE SEQUENCE IF NOT EXISTS dog_changes_seq",
+    """CREATE TABLE IF NOT EXISTS dog_changes (
+        seq BIGINT PRIMARY KEY DEFAULT nextval('dog_changes_seq'),
+        dog_id INTEGER NOT NULL UNIQUE,
+        deleted BOOLEAN NOT NULL DEFAULT FALSE
+    )""",
+    f"""CREATE OR REPLACE FUNCTION log_dog_change() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_advisory_xact_lock({_PG_CHANGES_LOCK_KEY});
+        IF TG_OP = 'DELETE' THEN
+            INSERT INTO dog_changes (dog_id, deleted) VALUES (OLD.id, TRUE)
+            ON CONFLICT (dog_id) DO UPDATE SET seq = nextval('dog_changes_seq'), deleted = TRUE;
+            RETURN OLD;
+        END IF;
+        INSERT INTO dog_changes (dog_id, deleted) VALUES (NEW.id, FALSE)
+        ON CONFLICT (dog_id) DO UPDATE SET seq = nextval('dog_changes_seq'), deleted = FALSE;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS dogs_log_change ON dogs",
+    """CREATE TRIGGER dogs_log_change AFTER INSERT OR UPDATE OR DELETE ON dogs
+        FOR EACH ROW EXECUTE FUNCTION log_dog_change()""",
+]
+
+# Postojeći psi dobijaju početne seq vrednosti redom po id-u
+_BACKFILL = """INSERT INTO dog_changes (dog_id, deleted)
+    SELECT id, FALSE FROM dogs WHERE id NOT IN (SELECT dog_id FROM dog_changes) ORDER BY id"""
+
+
+def upgrade(connection) -> None:
+    statements = _POSTGRESQL_DDL if connection.dialect.name == "postgresql" else _SQLITE_DDL
+    for statement in statements:
+        connection.execute(text(statement))
+    connection.execute(text(_BACKFILL))
@@ -0,0 +1,56 @@
+"""FTS5 indeks dogs_fts nad naslovom i opisom pasa (pretraga teksta)
+
+External-content tabela: tekst se ne duplira, indeks čuva samo tokene, a
+triggeri na dogs ga drže u skladu sa tabelom. unicode61 sa
+remove_diacritics 2 izjednačava č/ć/š/ž sa c/s/z, ali đ nema dekompoziciju,
+pa triggeri u indeks upisuju đ kao dj (isto radi app.db.search.fold_text sa
+upitom) - "djurdjevak" i "đurđevak" nalaze isto.
+
+Zbog tog preslikavanja indeks se ne sme obnavljati sa 'rebuild' (čita
+originalni tekst iz dogs); ova migracija ga puni sama. prefix='2 3' čuva
+dodatne indekse za prefikse, pa je upit "ku*" isto brz kao ceo token.
+
+Na PostgreSQL-u nema FTS5 - pretraga tamo koristi ILIKE (app.db.search).
+"""
+from sqlalchemy import text
+
+
+def _fold(column: str) -> str:
+    return f"replace(replace(coalesce({column}, ''), 'đ', 'dj'), 'Đ', 'Dj')"
+
+
+_SQLITE_DDL = [
+    "DROP TRIGGER IF EXISTS dogs_fts_ai",
+    "DROP TRIGGER IF EXISTS dogs_fts_au",
+    "DROP TRIGGER IF EXISTS dogs_fts_ad",
+    "DROP TABLE IF EXISTS dogs_fts",
+    """CREATE VIRTUAL TABLE dogs_fts USING fts5(
+        title, description,
+        content='dogs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # 'delete' mora da dobije iste (preslikane) vrednosti koje su upisane
+    f"""CREATE TRIGGER dogs_fts_ai AFTER INSERT ON dogs BEGIN
+        INSERT INTO dogs_fts (rowid, title, description)
+        VALUES (new.id, {_fold('new.title')}, {_fold('new.description')});
+    END""",
+    f"""CREATE TRIGGER dogs_fts_au AFTER UPDATE OF title, description ON dogs BEGIN
+        INSERT INTO dogs_fts (dogs_fts, rowid, title, description)
+        VALUES ('delete', old.id, {_fold('old.title')}, {_fold('old.description')});
+        INSERT INTO dogs_fts (rowid, title, description)
+        VALUES (new.id, {_fold('new.title')}, {_fold('new.description')});
+    END""",
+    f"""CREATE TRIGGER dogs_fts_ad AFTER DELETE ON dogs BEGIN
+        INSERT INTO dogs_fts (dogs_fts, rowid, title, description)
+        VALUES ('delete', old.id, {_fold('old.title')}, {_fold('old.description')});
+    END""",
+    f"""INSERT INTO dogs_fts (rowid, title, description)
+        SELECT id, {_fold('title')}, {_fold('description')} FROM dogs""",
+]
+
+
+def upgrade(connection) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in _SQLITE_DDL:
+        connection.execute(text(statement))
@@ -0,0 +1,29 @@
+"""Jedinstven par (source_filename, kind) u image_variants
+
+Dva istovremena uploada istog novog sadržaja (ili ponovljen background task)
+mogla su da upišu istu varijantu dva puta, pa je variant_urls birao jedan
+red nasumično. Duplikati se brišu (ostaje najstariji red), a zatim se dodaje
+ograničenje; create_image_variants upisuje sa ON CONFLICT DO NOTHING.
+
+SQLite ne podržava ALTER TABLE ... ADD CONSTRAINT - tamo je to jedinstveni
+indeks istog imena, što baza sprovodi na isti način.
+"""
+from sqlalchemy import text
+
+_NAME = "uq_image_variants_source_kind"
+
+_DEDUPLICATE = """DELETE FROM image_variants WHERE id NOT IN (
+    SELECT min(id) FROM image_variants GROUP BY source_filename, kind
+)"""
+
+
+def upgrade(connection) -> None:
+    connection.execute(text(_DEDUPLICATE))
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(
+            f"ALTER TABLE image_variants ADD CONSTRAINT {_NAME} UNIQUE (source_filename, kind)"
+        ))
+    else:
+        connection.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {_NAME} ON image_variants (source_filename, kind)"
+        ))
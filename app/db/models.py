@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Enum, Float
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Text, ForeignKey, Enum, Float, Index, UniqueConstraint, literal_column, text
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -11,6 +12,12 @@ class DogStatus(str, enum.Enum):
     CONFIRMED = "confirmed"
     REMOVED = "removed"
 
+# Uslov parcijalnog indeksa za "vidljive" pse. Upiti ga koriste kao SQL
+# literal (dog_is_visible), ne kao bind parametar - PostgreSQL u generičkom
+# planu pripremljenog upita (asyncpg) ne može da dokaže uslov parcijalnog
+# indeksa iz parametra, pa se indeks koristi samo za doslovno isti uslov.
+_VISIBLE_DOG_SQL = f"status != '{DogStatus.REMOVED.name}'"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -36,21 +43,38 @@ class Dog(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     status = Column(Enum(DogStatus), default=DogStatus.REPORTED)
-    reporter_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    picked_up_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    reporter_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    picked_up_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    # SQLite upisuje server_default bez mikrosekundi; isti format i za bind
+    # parametre, da bi keyset poređenja (created_at, id) bila tačna
+    created_at = Column(
+        DateTime(timezone=True).with_variant(sqlite.DATETIME(truncate_microseconds=True), "sqlite"),
+        server_default=func.now()
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    __table_args__ = (
+        # Keyset paginacija: ORDER BY created_at DESC, id DESC, bez uklonjenih pasa
+        Index(
+            "ix_dogs_visible_created_at_id", "created_at", "id",
+            sqlite_where=text(_VISIBLE_DOG_SQL), postgresql_where=text(_VISIBLE_DOG_SQL)
+        ),
+        # Filter po statusu (lista sa ?status=, admin pending) + ista paginacija
+        Index("ix_dogs_status_created_at_id", "status", "created_at", "id"),
+    )
+    
     # Relationships
     reporter = relationship("User", foreign_keys=[reporter_id], back_populates="dogs_reported")
     picked_up_by = relationship("User", foreign_keys=[picked_up_by_user_id], back_populates="dogs_picked_up")
     images = relationship("DogImage", back_populates="dog", cascade="all, delete-orphan")
 
+dog_is_visible = Dog.status != literal_column(f"'{DogStatus.REMOVED.name}'")
+
 class DogImage(Base):
     __tablename__ = "dog_images"
     
     id = Column(Integer, primary_key=True, index=True)
-    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
+    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False, index=True)
     filename = Column(String, nullable=False)
     uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -58,3 +82,55 @@ class DogImage(Base):
     # Relationships
     dog = relationship("Dog", back_populates="images")
     uploader = relationship("User", back_populates="images_uploaded")
+    variants = relationship(
+        "ImageVariant",
+        primaryjoin="foreign(ImageVariant.source_filename) == DogImage.filename",
+        viewonly=True
+    )
+    
+    @property
+    def url(self) -> str:
+        return f"/uploads/{self.filename}"
+    
+    @property
+    def variant_urls(self) -> dict:
+        return {variant.kind: f"/uploads/{variant.filename}" for variant in self.variants}
+
+class ImageBlob(Base):
+    """Sadržaj slike adresiran SHA-256 hash-om, deljen između DogImage redova"""
+    __tablename__ = "image_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    filename = Column(String, unique=True, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ImageVariant(Base):
+    """Umanjena verzija (thumbnail, medium, webp) uploadovane slike"""
+    __tablename__ = "image_variants"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source_filename = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # Jedna varijanta svake vrste po slici (migracija 0006)
+        UniqueConstraint("source_filename", "kind", name="uq_image_variants_source_kind"),
+    )
+
+class DogChange(Base):
+    """Poslednja promena svakog psa, ili tombstone za obrisanog.
+
+    Tabelu puni trigger u bazi (migracija 0004) - aplikacija je samo čita.
+    seq raste redosledom commit-ova i služi kao token za GET /api/dogs/changes.
+    """
+    __tablename__ = "dog_changes"
+    
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    dog_id = Column(Integer, nullable=False, unique=True)
+    deleted = Column(Boolean, nullable=False, default=False)
@@ -0,0 +1,211 @@
+"""Provera planova izvršavanja za "vruće" upite API-ja (SQLite).
+
+Pravi privremenu bazu kroz migracije (isti indeksi kao u produkciji), upisuje
+nekoliko redova i izvršava upite koje endpointi šalju - sa istim pomoćnim
+funkcijama (dog_query, keyset_query, spatial filteri), zajedno sa dodatnim
+SELECT ... IN upitima za relacije. Za svaki izvršeni SELECT radi
+`EXPLAIN QUERY PLAN` i prijavljuje grešku ako neka tabela mora da se čita
+cela (`SCAN <tabela>` bez indeksa).
+
+    python -m app.db.query_plans          # izlazni kod 1 ako neki upit skenira tabelu
+    python -m app.db.query_plans -v       # ispiši planove svih upita
+
+Isto proverava tests/test_query_plans.py (pytest), za svaki upit iz hot_queries().
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session, selectinload
+
+# "SCAN dogs" / "SCAN TABLE dogs" (starije verzije SQLite-a), bez USING INDEX
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+# Podupit koji SQLite prvo izvrši, pa njegov (ograničen) rezultat čita redom
+_SUBQUERY = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\w+)$")
+
+_SEED_CREATED_AT = datetime(2024, 1, 1, 12, 0, 0)
+
+
+class PlanRow(NamedTuple):
+    statement: str
+    detail: str
+
+
+def hot_queries() -> Dict[str, Callable[[Session], object]]:
+    """Upiti po endpointu; svaka funkcija izvršava upit u datoj sesiji"""
+    from app.api.api_v1.clusters import cluster_query
+    from app.api.api_v1.pagination import PageParams, encode_cursor, id_keyset_query, keyset_query
+    from app.api.api_v1.utils import dog_query, dog_version_query
+    from app.db import search, spatial
+    from app.db.models import Dog, DogChange, DogImage, DogStatus, ImageBlob, ImageVariant, User, dog_is_visible
+
+    cursor = encode_cursor(_SEED_CREATED_AT, 2)
+    first_page = PageParams(50)
+    next_page = PageParams(50, cursor)
+
+    def dogs_list(page, *criteria):
+        def run(db: Session):
+            query = dog_query(detail=False).where(dog_is_visible, *criteria)
+            return db.scalars(keyset_query(query, Dog.created_at, Dog.id, page)).all()
+        return run
+
+    def dogs_versions(page):
+        def run(db: Session):
+            query = dog_version_query(detail=False).where(dog_is_visible)
+            return db.execute(keyset_query(query, Dog.created_at, Dog.id, page)).all()
+        return run
+
+    def dogs_spatial(apply_filter):
+        def run(db: Session):
+            query = apply_filter(dog_query(detail=False).where(dog_is_visible), "sqlite")
+            return db.scalars(keyset_query(query, Dog.created_at, Dog.id, first_page)).all()
+        return run
+
+    def dogs_search(page):
+        def run(db: Session):
+            query = search.filter_search(
+                dog_version_query(detail=False).where(dog_is_visible), "sqlite",
+                Dog.id, Dog.title, Dog.description, ["dog"]
+            )
+            return db.execute(id_keyset_query(query, search.order_column("sqlite", Dog.id), page)).all()
+        return run
+
+    box = spatial.BoundingBox(20.0, 44.0, 21.0, 45.0)
+
+    return {
+        "GET /dogs": dogs_list(first_page),
+        "GET /dogs (cursor)": dogs_list(next_page),
+        "GET /dogs?status": dogs_list(first_page, Dog.status == DogStatus.REPORTED),
+        "GET /dogs?status (cursor)": dogs_list(next_page, Dog.status == DogStatus.REPORTED),
+        "GET /dogs?bbox": dogs_spatial(
+            lambda query, dialect: spatial.filter_bbox(query, dialect, Dog.id, Dog.latitude, Dog.longitude, box)
+        ),
+        "GET /dogs?lat&lng&radius_km": dogs_spatial(
+            lambda query, dialect: spatial.filter_radius(
+                query, dialect, Dog.id, Dog.latitude, Dog.longitude, 44.8, 20.4, 5.0
+            )
+        ),
+        "GET /dogs (ETag)": dogs_versions(first_page),
+        "GET /dogs (ETag, cursor)": dogs_versions(next_page),
+        "GET /dogs?q (ETag)": dogs_search(first_page),
+        "GET /dogs?q (ETag, cursor)": dogs_search(next_page),
+        "GET /dogs/search (ETag)": lambda db: db.execute(search.ranked_search(
+            dog_version_query(detail=False).where(dog_is_visible), "sqlite",
+            Dog.id, Dog.title, Dog.description, ["dog"], 500
+        ).limit(first_page.limit)).all(),
+        "GET /dogs/{id}": lambda db: db.scalar(dog_query().where(Dog.id == 1)),
+        "GET /dogs/{id} (ETag)": lambda db: db.execute(dog_version_query().where(Dog.id == 1)).one(),
+        "GET /dogs/clusters": lambda db: db.execute(cluster_query("sqlite", 6, box)).all(),
+        "GET /dogs/changes": lambda db: db.execute(
+            select(DogChange.seq, DogChange.dog_id, DogChange.deleted)
+            .where(DogChange.seq > 1).order_by(DogChange.seq).limit(first_page.limit + 1)
+        ).all(),
+        "GET /admin/dogs/pending": lambda db: db.scalars(keyset_query(
+            dog_query().where(Dog.status == DogStatus.PENDING_ADMIN), Dog.created_at, Dog.id, first_page
+        )).all(),
+        "GET /admin/dogs/pending (cursor)": lambda db: db.scalars(keyset_query(
+            dog_query().where(Dog.status == DogStatus.PENDING_ADMIN), Dog.created_at, Dog.id, next_page
+        )).all(),
+        "POST /auth/login": lambda db: db.scalar(select(User).where(User.email == "user@example.com")),
+        "auth: current user": lambda db: db.scalar(select(User).where(User.id == 1)),
+        "DELETE /admin/dog-images/{id}": lambda db: db.scalar(
+            select(DogImage).options(selectinload(DogImage.variants)).where(DogImage.id == 1)
+        ),
+        "images: blob refcount": lambda db: db.scalar(
+            select(ImageBlob.ref_count).where(ImageBlob.filename == "a.jpg")
+        ),
+        "images: existing variants": lambda db: db.scalar(
+            select(ImageVariant.id).where(ImageVariant.source_filename == "a.jpg")
+        ),
+    }
+
+
+def _seed(db: Session) -> None:
+    """Par redova - dovoljno da se izvrše i upiti za relacije"""
+    from app.db.models import Dog, DogImage, DogStatus, ImageBlob, ImageVariant, User
+
+    user = User(email="user@example.com", hashed_password="x", full_name="User")
+    db.add(user)
+    db.flush()
+    for index, status in enumerate(DogStatus):
+        dog = Dog(
+            title=f"Dog {index}", latitude=44.8, longitude=20.4, status=status,
+            reporter_id=user.id, picked_up_by_user_id=user.id, created_at=_SEED_CREATED_AT
+        )
+        dog.images.append(DogImage(filename="a.jpg", uploaded_by=user.id))
+        db.add(dog)
+    db.add(ImageBlob(sha256="0" * 64, filename="a.jpg", size=1, ref_count=len(DogStatus)))
+    db.add(ImageVariant(source_filename="a.jpg", kind="thumb", filename="a_thumb.jpg", width=1, height=1))
+    db.commit()
+
+
+def explain_hot_queries(database_path: str) -> Dict[str, List[PlanRow]]:
+    """Izvršava vruće upite nad novom bazom i vraća plan svakog SELECT-a"""
+    from app.db import migrations
+    from app.db.database import _on_sqlite_connect
+
+    engine = create_engine(f"sqlite:///{database_path}")
+    event.listen(engine, "connect", _on_sqlite_connect)
+    migrations.upgrade(engine)
+
+    with Session(engine) as db:
+        _seed(db)
+
+    captured: List[tuple] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+
+    plans: Dict[str, List[PlanRow]] = {}
+    for name, run in hot_queries().items():
+        captured.clear()
+        with Session(engine) as db:
+            run(db)
+        statements = list(captured)
+        rows = []
+        with engine.connect() as connection:
+            for statement, parameters in statements:
+                result = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                rows += [PlanRow(statement, row[-1]) for row in result]
+        plans[name] = rows
+    engine.dispose()
+    return plans
+
+
+def full_scans(rows: List[PlanRow]) -> List[str]:
+    """Tabele koje plan čita cele (virtuelne tabele, npr. R*Tree, i podupiti se ne računaju)"""
+    subqueries = {match.group(1) for match in (_SUBQUERY.match(row.detail) for row in rows) if match}
+    scans = (_FULL_SCAN.match(row.detail) for row in rows)
+    return [match.group(1) for match in scans if match and match.group(1) not in subqueries]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.query_plans")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        plans = explain_hot_queries(os.path.join(directory, "plans.db"))
+
+    failed = False
+    for name, rows in plans.items():
+        scans = full_scans(rows)
+        failed = failed or bool(scans)
+        print(f"{'FAIL' if scans else 'ok  '}  {name}" + (f"  (full scan: {', '.join(scans)})" if scans else ""))
+        if args.verbose or scans:
+            for row in rows:
+                print(f"        {row.detail}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Rutiranje sesija između primarne baze i read replika.
+
+Upisi i commit-ovi uvek idu na primarnu bazu (`PrimarySession`), a
+dependency-ji samo za čitanje dobijaju sesiju na nekoj od replika
+(round-robin). Korisnik koji je upravo nešto upisao čita sa primarne baze
+još READ_YOUR_WRITES_SECONDS, da ne bi video stanje replike koja kasni.
+
+Evidencija o nedavnim upisima je lokalna za proces - kod više worker-a
+zahtev može stići na worker koji upis nije video, pa prozor treba držati
+većim od uobičajenog kašnjenja replika.
+"""
+import itertools
+from typing import Hashable, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+
+# Ključ u Session.info pod kojim se čuva id korisnika koji pravi zahtev
+WRITER_KEY = "writer_user_id"
+
+
+class PrimarySession(Session):
+    """Sesija na primarnoj bazi; commit beleži korisnika za read-your-writes"""
+
+
+class ReplicaSession(Session):
+    """Sesija na read replici; upis kroz nju je greška"""
+
+
+@event.listens_for(ReplicaSession, "before_flush")
+def _reject_replica_flush(session, flush_context, instances):
+    raise InvalidRequestError("Replica sessions are read-only; use get_db for writes")
+
+
+class ReadWriteRouter:
+    """Bira sessionmaker za čitanje: replika, osim za korisnike koji su upravo pisali"""
+
+    def __init__(
+        self,
+        writer: async_sessionmaker,
+        readers: Sequence[async_sessionmaker],
+        sticky_seconds: float,
+        sticky_max_size: int,
+    ):
+        self.writer = writer
+        self.readers = list(readers)
+        self._round_robin = itertools.cycle(self.readers) if self.readers else None
+        self._recent_writers = TTLCache(maxsize=sticky_max_size, ttl=sticky_seconds)
+        event.listen(writer.kw["sync_session_class"], "after_commit", self._after_commit)
+
+    def _after_commit(self, session: Session) -> None:
+        self.mark_written(session.info.get(WRITER_KEY))
+
+    def mark_written(self, key: Optional[Hashable]) -> None:
+        if key is not None:
+            self._recent_writers.set(key, True)
+
+    def is_sticky(self, key: Optional[Hashable]) -> bool:
+        return key is not None and self._recent_writers.get(key) is not None
+
+    def reader_for(self, key: Optional[Hashable] = None) -> async_sessionmaker:
+        """Sessionmaker za čitanje za datog korisnika (None = anoniman)"""
+        if self._round_robin is None or self.is_sticky(key):
+            return self.writer
+        return next(self._round_robin)
+
+    def stats(self) -> dict:
+        return {"replicas": len(self.readers), "recent_writers": self._recent_writers.stats()}
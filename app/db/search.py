@@ -0,0 +1,106 @@
+"""Pretraga pasa po tekstu (naslov i opis).
+
+Na SQLite bazi tekst je indeksiran u FTS5 tabeli `dogs_fts` (external
+content nad `dogs`, održavaju je triggeri - migracija v0005). Tokenizer
+unicode61 sa remove_diacritics 2 izjednačava č/ć/š/ž sa c/s/z, a đ se i u
+indeksu i u upitu piše kao dj (fold_text). Poslednja reč upita se traži kao
+prefiks, pa pretraga radi i dok korisnik kuca.
+
+Na ostalim bazama koristi se ILIKE po svakoj reči, bez indeksa i bez
+izjednačavanja dijakritika.
+"""
+import re
+import unicodedata
+from typing import List
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, and_, func, literal_column, or_, select
+
+# Najviše reči iz upita - svaka reč je još jedan doclist koji FTS5 spaja
+MAX_TERMS = 8
+
+# bm25 težine po koloni (title, description): pogodak u naslovu vredi više
+_WEIGHTS = (5.0, 1.0)
+
+# Zaseban MetaData - virtuelnu tabelu ne sme da kreira Base.metadata.create_all
+_fts_metadata = MetaData()
+
+dogs_fts = Table(
+    "dogs_fts",
+    _fts_metadata,
+    Column("rowid", Integer, primary_key=True),
+    Column("title", Text),
+    Column("description", Text),
+)
+
+# Isti skup znakova koji unicode61 smatra delom tokena (slova i cifre)
+_TERM = re.compile(r"[^\W_]+")
+
+
+def fold_text(value: str) -> str:
+    """đ -> dj (unicode61 ga ne svodi na d); isto preslikavanje rade triggeri"""
+    return value.replace("đ", "dj").replace("Đ", "Dj")
+
+
+def search_terms(value: str) -> List[str]:
+    """Reči iz korisničkog upita (najviše MAX_TERMS); prazna lista ako ih nema"""
+    return _TERM.findall(unicodedata.normalize("NFC", value))[:MAX_TERMS]
+
+
+def match_expression(terms: List[str]) -> str:
+    """FTS5 upit: sve reči moraju da se nađu, poslednja kao prefiks.
+
+    Reči su uvek pod navodnicima, pa AND/OR/NEAR iz upita nisu operatori.
+    Jednoslovni prefiks bi spajao doclist-e skoro svih reči - traži se ceo.
+    """
+    phrases = [f'"{fold_text(term)}"' for term in terms]
+    if len(terms[-1]) >= 2:
+        phrases[-1] += "*"
+    return " ".join(phrases)
+
+
+def _fts_match(terms: List[str]):
+    return literal_column("dogs_fts").op("MATCH")(match_expression(terms))
+
+
+def _ilike_filter(title_col, description_col, terms: List[str]):
+    return and_(*[
+        or_(title_col.icontains(term, autoescape=True), description_col.icontains(term, autoescape=True))
+        for term in terms
+    ])
+
+
+def filter_search(query, dialect_name: str, id_col, title_col, description_col, terms: List[str]):
+    """Ograničava upit na pse čiji naslov/opis sadrži sve reči.
+
+    Na SQLite-u upit vodi FTS5 indeks: pogoci dolaze po rowid-u, pa uz
+    ORDER BY order_column(...) DESC i LIMIT baza čita samo onoliko pogodaka
+    koliko stane na stranu, bez obzira na to koliko ih ukupno ima.
+    """
+    if dialect_name == "sqlite":
+        return query.join(dogs_fts, dogs_fts.c.rowid == id_col).where(_fts_match(terms))
+    return query.where(_ilike_filter(title_col, description_col, terms))
+
+
+def order_column(dialect_name: str, id_col):
+    """Kolona za keyset paginaciju rezultata filter_search (id psa)"""
+    return dogs_fts.c.rowid if dialect_name == "sqlite" else id_col
+
+
+def ranked_search(query, dialect_name: str, id_col, title_col, description_col,
+                  terms: List[str], candidates: int):
+    """Pogoci po relevantnosti (bm25), najrelevantniji prvi.
+
+    Rangira se samo `candidates` najnovijih pogodaka: bm25 se računa za svaki
+    rangirani red, pa bi česta reč (npr. "pas") inače značila bodovanje
+    skoro cele tabele. Na bazama bez FTS5 redosled je od najnovijeg.
+    """
+    if dialect_name != "sqlite":
+        return query.where(_ilike_filter(title_col, description_col, terms)).order_by(id_col.desc())
+    ranked = (
+        select(dogs_fts.c.rowid.label("id"), func.bm25(literal_column("dogs_fts"), *_WEIGHTS).label("score"))
+        .where(_fts_match(terms))
+        .order_by(dogs_fts.c.rowid.desc())
+        .limit(candidates)
+        .subquery("ranked")
+    )
+    return query.join(ranked, ranked.c.id == id_col).order_by(ranked.c.score, id_col.desc())
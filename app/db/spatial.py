@@ -0,0 +1,187 @@
+"""Prostorni indeks i geo pomoćne funkcije za pretragu pasa po lokaciji.
+
+Na SQLite bazi lokacije pasa se drže u R*Tree virtuelnoj tabeli `dogs_rtree`
+koju ažuriraju triggeri na tabeli `dogs` (kreira ih migracija 0001), tako da
+pretraga po mapi dira samo kandidate iz indeksa. Na ostalim bazama koristi se običan opseg po
+latitude/longitude kolonama.
+"""
+import math
+from typing import List, NamedTuple
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, and_, cast, func, or_
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Zaseban MetaData - virtuelnu tabelu ne sme da kreira Base.metadata.create_all
+_rtree_metadata = MetaData()
+
+dogs_rtree = Table(
+    "dogs_rtree",
+    _rtree_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("min_lat", Float),
+    Column("max_lat", Float),
+    Column("min_lng", Float),
+    Column("max_lng", Float),
+)
+
+
+class BoundingBox(NamedTuple):
+    min_lng: float
+    min_lat: float
+    max_lng: float
+    max_lat: float
+
+
+class Tile(NamedTuple):
+    """Pločica mreže za klasterovanje: na nivou zoom svet je 2^zoom pločica po širini"""
+    zoom: int
+    x: int
+    y: int
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Udaljenost između dve tačke na Zemlji u kilometrima"""
+    if None in (lat1, lng1, lat2, lng2):
+        return None
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_around(lat: float, lng: float, radius_km: float) -> BoundingBox:
+    """Najmanji pravougaonik koji sadrži krug datog radijusa oko tačke"""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(-90.0, lat - dlat)
+    max_lat = min(90.0, lat + dlat)
+
+    # Blizu polova krug pokriva sve geografske dužine
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return BoundingBox(-180.0, min_lat, 180.0, max_lat)
+
+    dlng = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(lat))))
+    if dlng >= 180.0:
+        return BoundingBox(-180.0, min_lat, 180.0, max_lat)
+
+    min_lng = lng - dlng
+    max_lng = lng + dlng
+    # Prelazak preko 180. meridijana: min_lng > max_lng označava "omotan" opseg
+    if min_lng < -180.0:
+        min_lng += 360.0
+    if max_lng > 180.0:
+        max_lng -= 360.0
+    return BoundingBox(min_lng, min_lat, max_lng, max_lat)
+
+
+def parse_bbox(value: str) -> BoundingBox:
+    """Parsira `min_lng,min_lat,max_lng,max_lat`; baca ValueError ako nije ispravno"""
+    parts = value.split(",")
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    bbox = BoundingBox(*(float(p) for p in parts))
+    if not (-90 <= bbox.min_lat <= bbox.max_lat <= 90):
+        raise ValueError("bbox latitudes must satisfy -90 <= min_lat <= max_lat <= 90")
+    if not (-180 <= bbox.min_lng <= 180 and -180 <= bbox.max_lng <= 180):
+        raise ValueError("bbox longitudes must be between -180 and 180")
+    return bbox
+
+
+def _lng_ranges(bbox: BoundingBox):
+    if bbox.min_lng <= bbox.max_lng:
+        return [(bbox.min_lng, bbox.max_lng)]
+    return [(bbox.min_lng, 180.0), (-180.0, bbox.max_lng)]
+
+
+def bbox_contains(bbox: BoundingBox, lat: float, lng: float) -> bool:
+    """Ista provera kao _range_filter, nad vrednostima u Python-u"""
+    return bbox.min_lat <= lat <= bbox.max_lat and any(lo <= lng <= hi for lo, hi in _lng_ranges(bbox))
+
+
+def _range_filter(lat_col, lng_col, bbox: BoundingBox):
+    return and_(
+        lat_col.between(bbox.min_lat, bbox.max_lat),
+        or_(*[lng_col.between(lo, hi) for lo, hi in _lng_ranges(bbox)]),
+    )
+
+
+def filter_bbox(query, dialect_name: str, id_col, lat_col, lng_col, bbox: BoundingBox):
+    """Ograničava upit na redove unutar bbox-a, preko R*Tree indeksa kada postoji"""
+    if dialect_name == "sqlite":
+        rt = dogs_rtree.c
+        # R*Tree čuva 32-bitne float vrednosti i zaokružuje ka spolja, pa
+        # daje nadskup kandidata; tačan opseg se proverava na pravim kolonama
+        query = query.join(dogs_rtree, rt.id == id_col).filter(
+            and_(
+                rt.max_lat >= bbox.min_lat,
+                rt.min_lat <= bbox.max_lat,
+                or_(*[and_(rt.max_lng >= lo, rt.min_lng <= hi) for lo, hi in _lng_ranges(bbox)]),
+            )
+        )
+    return query.filter(_range_filter(lat_col, lng_col, bbox))
+
+
+def distance_km(dialect_name: str, lat_col, lng_col, lat: float, lng: float):
+    """SQL izraz za haversine udaljenost kolona od zadate tačke"""
+    if dialect_name == "sqlite":
+        return func.haversine_km(lat_col, lng_col, lat, lng)
+
+    phi1 = func.radians(lat_col)
+    phi2 = math.radians(lat)
+    a = (
+        func.power(func.sin((phi2 - phi1) / 2), 2)
+        + func.cos(phi1) * math.cos(phi2) * func.power(func.sin(func.radians(lng - lng_col) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * func.asin(func.least(1.0, func.sqrt(a)))
+
+
+def filter_radius(query, dialect_name: str, id_col, lat_col, lng_col,
+                  lat: float, lng: float, radius_km: float):
+    """Kandidati iz bbox-a oko tačke, pa tačna haversine provera samo nad njima"""
+    query = filter_bbox(query, dialect_name, id_col, lat_col, lng_col, bbox_around(lat, lng, radius_km))
+    return query.filter(distance_km(dialect_name, lat_col, lng_col, lat, lng) <= radius_km)
+
+
+def tile_size(zoom: int) -> float:
+    """Stranica pločice u stepenima (ista po geografskoj dužini i širini)"""
+    return 360.0 / (1 << zoom)
+
+
+def tile_counts(zoom: int):
+    """Broj pločica po x (dužina) i y (širina) na datom nivou"""
+    size = tile_size(zoom)
+    return 1 << zoom, max(1, math.ceil(180.0 / size))
+
+
+def tiles_covering(bbox: BoundingBox, zoom: int) -> List[Tile]:
+    """Pločice koje seku bbox (uključujući bbox preko antimeridijana)"""
+    size = tile_size(zoom)
+    count_x, count_y = tile_counts(zoom)
+    ys = range(int((bbox.min_lat + 90) // size), min(int((bbox.max_lat + 90) // size), count_y - 1) + 1)
+    xs = []
+    for lo, hi in _lng_ranges(bbox):
+        xs += range(int((lo + 180) // size), min(int((hi + 180) // size), count_x - 1) + 1)
+    return [Tile(zoom, x, y) for y in ys for x in dict.fromkeys(xs)]
+
+
+def tile_bbox(tile: Tile) -> BoundingBox:
+    size = tile_size(tile.zoom)
+    return BoundingBox(
+        -180.0 + tile.x * size, -90.0 + tile.y * size,
+        min(-180.0 + (tile.x + 1) * size, 180.0), min(-90.0 + (tile.y + 1) * size, 90.0)
+    )
+
+
+def grid_index(dialect_name: str, col, origin: float, size: float):
+    """SQL izraz floor((col - origin) / size); vrednosti su uvek >= 0"""
+    if dialect_name == "sqlite":
+        # CAST odseca ka nuli, što je za nenegativne vrednosti isto što i floor
+        return cast((col - origin) / size, Integer)
+    return cast(func.floor((col - origin) / size), Integer)
+
+
+def register_sqlite_functions(dbapi_connection) -> None:
+    """Registruje haversine_km() na novoj SQLite konekciji"""
+    dbapi_connection.create_function("haversine_km", 4, haversine_km, deterministic=True)
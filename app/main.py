@@ -1,22 +1,35 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 import os
 
 from app.core.config import settings
+from app.core import metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.static_files import UploadsStaticFiles
 from app.api.api_v1.api import api_router
-from app.db.database import engine
-from app.db import models
+from app.db.database import async_engine, engine, replica_engines
+from app.db import migrations
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Šema se više ne kreira pri importu - pri startu samo jedan SELECT nad
+    # schema_version, a migracije se primenjuju ako je AUTO_MIGRATE uključen
+    if settings.AUTO_MIGRATE:
+        await run_in_threadpool(migrations.upgrade, engine)
+    else:
+        await run_in_threadpool(migrations.check_schema, engine)
+    yield
 
 app = FastAPI(
     title="Dog Rescue API",
     description="Sistem za prijavu izgubljenih i nađenih pasa sa potvrdom spašavanja",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,11 +41,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Profilisanje (X-Profile) i kontekst zahteva za log sporih upita
+if settings.PROFILING_ENABLED or settings.SLOW_QUERY_MS > 0:
+    app.add_middleware(ProfilingMiddleware)
+
+# Metrike - dodat poslednji, pa je spolja i meri i CORS obradu
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    metrics.register_app_metrics({
+        "primary": async_engine,
+        **{f"replica{index}": replica for index, replica in enumerate(replica_engines)},
+    })
+
 # Static files for uploaded images
 if not os.path.exists(settings.UPLOAD_DIR):
     os.makedirs(settings.UPLOAD_DIR)
 
-app.mount("/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
+app.mount("/uploads", UploadsStaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 
 # Include API router
 app.include_router(api_router, prefix="/api")
@@ -44,3 +69,9 @@ async def root():
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy"}
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """Prometheus tekstualni format; lokalno za ovaj worker"""
+        return Response(content=await metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from app.db.models import DogStatus
 
@@ -14,6 +14,8 @@ class DogImage(DogImageBase):
     dog_id: int
     uploaded_by: Optional[int] = None
     created_at: datetime
+    url: Optional[str] = None
+    variant_urls: Dict[str, str] = {}
 
     class Config:
         from_attributes = True
@@ -44,10 +46,18 @@ class DogInDB(DogBase):
     class Config:
         from_attributes = True
 
+class UserSummary(BaseModel):
+    id: int
+    full_name: str
+    email: str
+
+    class Config:
+        from_attributes = True
+
 class Dog(DogInDB):
     images: List[DogImage] = []
-    reporter: Optional[dict] = None
-    picked_up_by: Optional[dict] = None
+    reporter: Optional[UserSummary] = None
+    picked_up_by: Optional[UserSummary] = None
 
 class DogList(BaseModel):
     id: int
@@ -60,3 +70,50 @@ class DogList(BaseModel):
 
     class Config:
         from_attributes = True
+
+class DogStreamEvent(BaseModel):
+    type: str  # dog.created, dog.updated, dog.deleted
+    id: int
+    dog: Optional[DogList] = None  # nema ga za dog.deleted
+
+class DogChanges(BaseModel):
+    changed: List[DogList]  # trenutno stanje pasa izmenjenih posle `since`
+    deleted: List[int]  # obrisani ili uklonjeni (REMOVED) psi
+    token: int  # `since` za sledeći poziv
+    has_more: bool
+
+class DogCluster(BaseModel):
+    latitude: float  # težište pasa u ćeliji
+    longitude: float
+    count: int
+    statuses: Dict[str, int]
+    dog_id: Optional[int] = None  # samo kada je u klasteru jedan pas
+
+DogClusterList = List[DogCluster]
+
+class DogClusters(BaseModel):
+    zoom: int
+    clusters: List[DogCluster]
+
+class DogSearchResults(BaseModel):
+    items: List[DogList]  # najrelevantniji prvi
+
+class DogModerationRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+class DogModerationOutcome(BaseModel):
+    id: int
+    result: str  # updated, not_found, not_pending
+    status: Optional[DogStatus] = None  # status posle zahteva; None ako pas ne postoji
+
+class DogModerationResult(BaseModel):
+    updated: int
+    results: List[DogModerationOutcome]  # redosledom id-eva iz zahteva
+
+class DogListPage(BaseModel):
+    items: List[DogList]
+    next_cursor: Optional[str] = None
+
+class DogPage(BaseModel):
+    items: List[Dog]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,15 @@
+"""Benchmark Dog Rescue API-ja: sintetički podaci, scenariji opterećenja i mikro-benchmark-ovi.
+
+Opterećenje (aplikacija se poziva u istom procesu kroz httpx ASGI transport,
+nad privremenom bazom napunjenom sa benchmarks.seed):
+
+    python -m benchmarks run --users 1000 --dogs 20000 --images 10000 --output before.json
+    python -m benchmarks run --scenario map_listing --scenario detail_view --requests 1000
+    python -m benchmarks compare before.json after.json
+
+Mikro-benchmark-ovi (pytest-benchmark):
+
+    pytest benchmarks/bench_micro.py
+
+Potrebni su httpx, pytest i pytest-benchmark (nisu u requirements.txt).
+"""
@@ -0,0 +1,92 @@
+"""python -m benchmarks run|compare - videti benchmarks/__init__.py"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Dog Rescue API benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="napuni bazu i izvrši scenarije")
+    run.add_argument("--users", type=int, default=1000)
+    run.add_argument("--dogs", type=int, default=20000)
+    run.add_argument("--images", type=int, default=10000)
+    run.add_argument("--requests", type=int, default=200, help="operacija po scenariju")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--warmup", type=int, default=5, help="nemerene operacije pre svakog scenarija")
+    run.add_argument("--scenario", action="append", dest="scenarios",
+                     help="scenario za izvršavanje (može više puta); podrazumevano svi")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--database-url", help="prazna baza za podatke (podrazumevano privremeni SQLite fajl)")
+    run.add_argument("--bcrypt-rounds", type=int, help="BCRYPT_ROUNDS za ovo merenje")
+    run.add_argument("--no-response-cache", action="store_true", help="RESPONSE_CACHE_ENABLED=false")
+    run.add_argument("--output", help="JSON fajl sa rezultatima (podrazumevano benchmark-<vreme>.json)")
+
+    cmp = commands.add_parser("compare", help="uporedi dva JSON rezultata")
+    cmp.add_argument("old")
+    cmp.add_argument("new")
+
+    args = parser.parse_args(argv)
+    if args.command == "run" and args.users < 1:
+        parser.error("--users mora biti najmanje 1 (prvi korisnik je admin)")
+    return args
+
+
+def _run(args) -> int:
+    workdir = tempfile.mkdtemp(prefix="dog-rescue-bench-")
+    # Podešavanja se čitaju pri importu app.core.config - postaviti ih pre importa aplikacije
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["DEBUG"] = "false"
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+    if args.bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+
+    from app.core.config import settings
+    from app.db import migrations
+    from app.db.database import engine
+    from app.main import app
+    from benchmarks import runner
+    from benchmarks.scenarios import SCENARIOS
+    from benchmarks.seed import seed
+
+    scenarios = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"nepoznat scenario: {', '.join(unknown)} (postoje: {', '.join(SCENARIOS)})", file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    migrations.upgrade(engine)
+    data = seed(engine, settings.UPLOAD_DIR, args.users, args.dogs, args.images, seed=args.seed)
+    print(f"baza: {args.users} korisnika, {args.dogs} pasa, {args.images} slika "
+          f"({time.perf_counter() - started:.1f} s) - {settings.DATABASE_URL}")
+
+    print(runner.HEADER)
+    results = asyncio.run(runner.run_all(
+        app, data, scenarios, args.requests, args.concurrency, args.warmup, args.seed
+    ))
+
+    output = args.output or time.strftime("benchmark-%Y%m%d-%H%M%S.json")
+    runner.save(output, runner.run_metadata(vars(args)), results)
+    print(f"rezultati: {output}")
+    return 1 if any(result["errors"] for result in results.values()) else 0
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.command == "compare":
+        from benchmarks.runner import compare
+
+        print(compare(args.old, args.new))
+        return 0
+    return _run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
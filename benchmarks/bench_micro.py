@@ -0,0 +1,179 @@
+"""Mikro-benchmark-ovi vrućih funkcija (pytest-benchmark).
+
+    pytest benchmarks/bench_micro.py
+    pytest benchmarks/bench_micro.py --benchmark-json=micro.json
+    pytest benchmarks/bench_micro.py --benchmark-compare   # sa --benchmark-autosave
+
+Ime fajla ne počinje sa test_, pa ga običan `pytest` ne pokreće.
+"""
+import asyncio
+import os
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.api import deps
+from app.api.api_v1.utils import json_response
+from app.core.security import create_access_token
+from app.db.database import Base
+from app.db.models import Dog, DogImage, DogStatus, ImageVariant, User
+from app.schemas.dog import Dog as DogSchema, DogInDB, DogListPage, DogPage
+
+# Veličina strane za poređenje serijalizacije liste
+PAGE_DOGS = 1000
+
+_REPORTER = User(id=1, email="reporter@bench.example", full_name="Prijavio", hashed_password="x")
+_RESCUER = User(id=2, email="rescuer@bench.example", full_name="Preuzeo", hashed_password="x")
+
+
+def _dog(images: int, id: int = 1) -> Dog:
+    """Pas kakav vraća GET /api/dogs/{id}: prijavio ga je jedan, preuzeo drugi korisnik, sa slikama i varijantama"""
+    now = datetime.utcnow()
+    reporter, rescuer = _REPORTER, _RESCUER
+    dog = Dog(
+        id=id, title="Crni pas kod pijace", description="Ima ogrlicu, prilazi ljudima.",
+        latitude=44.8125, longitude=20.4612, status=DogStatus.PENDING_ADMIN,
+        reporter_id=1, picked_up_by_user_id=2, created_at=now, updated_at=now,
+        reporter=reporter, picked_up_by=rescuer,
+    )
+    for index in range(images):
+        image = DogImage(id=id * 100 + index, dog_id=id, filename=f"{index}.jpg", uploaded_by=1, created_at=now)
+        image.variants = [
+            ImageVariant(source_filename=f"{index}.jpg", kind=kind, filename=f"{index}_{kind}.webp",
+                         width=width, height=width)
+            for kind, width in (("thumb", 320), ("medium", 1024))
+        ]
+        dog.images.append(image)
+    return dog
+
+
+@pytest.fixture(scope="module")
+def page_dogs():
+    return [_dog(2, id) for id in range(1, PAGE_DOGS + 1)]
+
+
+def _legacy_convert_dog_to_schema(dog: Dog) -> DogSchema:
+    """Konverzija pre direktne serijalizacije: DogInDB, dump u dict, ručni dict-ovi i ponovna validacija"""
+    dog_dict = DogInDB.model_validate(dog).model_dump()
+    dog_dict["images"] = [{"id": img.id, "dog_id": img.dog_id, "filename": img.filename,
+                           "uploaded_by": img.uploaded_by, "created_at": img.created_at}
+                          for img in dog.images]
+    for key in ("reporter", "picked_up_by"):
+        user = getattr(dog, key)
+        dog_dict[key] = {"id": user.id, "full_name": user.full_name, "email": user.email} if user else None
+    return DogSchema(**dog_dict)
+
+
+@lru_cache(maxsize=None)
+def _response_field(schema):
+    # FastAPI pravi polje jednom, pri registraciji rute
+    return create_response_field(name="response", type_=schema, mode="serialization")
+
+
+def _response_model_body(schema, content) -> bytes:
+    """Ono što FastAPI radi sa vraćenim dict-om: validacija kroz response_model, pa JSONResponse"""
+    coroutine = serialize_response(field=_response_field(schema), response_content=content)
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        # serialize_response za async endpoint ne čeka ništa - završava u prvom koraku
+        return JSONResponse(done.value).body
+    raise RuntimeError("serialize_response suspended")
+
+
+def _per_dog(benchmark) -> None:
+    if benchmark.stats is None:
+        # --benchmark-disable: funkcija se pozove jednom, bez merenja
+        return
+    benchmark.extra_info["per_dog_us"] = round(benchmark.stats.stats.mean / PAGE_DOGS * 1e6, 2)
+
+
+@pytest.mark.benchmark(group="admin pending (DogPage, 1000 pasa)")
+def test_dog_page_legacy(benchmark, page_dogs):
+    """Stara pending lista: convert_dog_to_schema po psu + response_model"""
+    body = benchmark(lambda: _response_model_body(
+        DogPage, {"items": [_legacy_convert_dog_to_schema(dog) for dog in page_dogs], "next_cursor": None}
+    ))
+    _per_dog(benchmark)
+    assert body.startswith(b'{"items":[')
+
+
+@pytest.mark.benchmark(group="admin pending (DogPage, 1000 pasa)")
+def test_dog_page_json_response(benchmark, page_dogs):
+    """Sadašnja pending lista: json_response (polja šeme iz ORM objekata, bez validacije)"""
+    body = benchmark(lambda: json_response(DogPage, {"items": page_dogs, "next_cursor": None}).body)
+    _per_dog(benchmark)
+    assert body.startswith(b'{"items":[')
+
+
+@pytest.mark.benchmark(group="lista pasa (DogListPage, 1000 pasa)")
+def test_dog_list_page_response_model(benchmark, page_dogs):
+    """Stara javna lista: ORM objekti kroz FastAPI response_model"""
+    body = benchmark(lambda: _response_model_body(DogListPage, {"items": page_dogs, "next_cursor": None}))
+    _per_dog(benchmark)
+    assert body.startswith(b'{"items":[')
+
+
+@pytest.mark.benchmark(group="lista pasa (DogListPage, 1000 pasa)")
+def test_dog_list_page_json_response(benchmark, page_dogs):
+    """Sadašnja javna lista: json_response"""
+    body = benchmark(lambda: json_response(DogListPage, {"items": page_dogs, "next_cursor": None}).body)
+    _per_dog(benchmark)
+    assert body.startswith(b'{"items":[')
+
+
+@pytest.fixture(scope="module")
+def auth_db():
+    """Privremena baza sa jednim korisnikom, async sesija i event loop za get_current_user"""
+    workdir = tempfile.mkdtemp(prefix="dog-rescue-micro-")
+    url = f"sqlite:///{os.path.join(workdir, 'micro.db')}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as connection:
+        connection.execute(User.__table__.insert(), {
+            "id": 1, "email": "user@bench.example", "hashed_password": "x", "full_name": "Korisnik",
+            "is_admin": False, "is_active": True,
+        })
+    sync_engine.dispose()
+
+    loop = asyncio.new_event_loop()
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    session = AsyncSession(async_engine, expire_on_commit=False)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=create_access_token({"sub": "1"}))
+    yield loop, session, credentials
+    loop.run_until_complete(session.close())
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+
+
+def test_get_current_user_cached(benchmark, auth_db):
+    """Uobičajen slučaj: token i korisnik su u kešu, bez upita bazi"""
+    loop, session, credentials = auth_db
+    deps._token_cache.clear()
+    deps._user_cache.clear()
+    user = benchmark(lambda: loop.run_until_complete(deps.get_current_user(credentials, session)))
+    assert user.id == 1
+
+
+def test_get_current_user_uncached(benchmark, auth_db):
+    """Prvi zahtev sa tokenom: dekodiranje JWT-a i SELECT korisnika"""
+    loop, session, credentials = auth_db
+
+    def call():
+        deps._token_cache.clear()
+        deps._user_cache.clear()
+        return loop.run_until_complete(deps.get_current_user(credentials, session))
+
+    user = benchmark(call)
+    assert user.id == 1
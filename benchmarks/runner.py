@@ -0,0 +1,163 @@
+"""Pokretanje scenarija nad aplikacijom u istom procesu i poređenje rezultata.
+
+Aplikacija se poziva kroz httpx.ASGITransport - bez mreže i uvicorn-a, pa
+rezultat meri rutiranje, zavisnosti, bazu i serijalizaciju. ASGITransport
+čeka i background taskove odgovora (npr. varijante slika posle upload-a),
+pa su oni uračunati u latenciju, za razliku od /metrics.
+"""
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.scenarios import SCENARIOS, BenchContext, UnexpectedResponse, prepare
+from benchmarks.seed import SeedResult
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentil nad sortiranom listom"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(durations: List[float], errors: int, elapsed: float) -> dict:
+    """Statistika jednog scenarija; vremena su u milisekundama"""
+    values = sorted(durations)
+    result = {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+    for pct in PERCENTILES:
+        result[f"p{pct}_ms"] = round(percentile(values, pct) * 1000, 3)
+    return result
+
+
+async def run_scenario(ctx: BenchContext, name: str, requests: int, concurrency: int, warmup: int) -> dict:
+    """`requests` operacija koje paralelno izvršava `concurrency` workera"""
+    operation = SCENARIOS[name]
+    for _ in range(warmup):
+        await operation(ctx)
+
+    durations: List[float] = []
+    failures: Dict[str, int] = {}
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                await operation(ctx)
+            except UnexpectedResponse as exc:
+                failures[str(exc)] = failures.get(str(exc), 0) + 1
+                continue
+            durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(durations, sum(failures.values()), elapsed)
+    result["concurrency"] = concurrency
+    if failures:
+        result["failures"] = failures
+    return result
+
+
+async def run_all(app, data: SeedResult, scenarios: List[str], requests: int, concurrency: int,
+                  warmup: int, seed: int) -> Dict[str, dict]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        ctx = BenchContext(client=client, data=data, rng=random.Random(seed))
+        await prepare(ctx)
+        results = {}
+        for name in scenarios:
+            results[name] = await run_scenario(ctx, name, requests, concurrency, warmup)
+            print(format_row(name, results[name]), flush=True)
+        return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(args: dict) -> dict:
+    from app.core.config import settings
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+        "response_cache": settings.RESPONSE_CACHE_ENABLED,
+        "args": args,
+    }
+
+
+HEADER = f"{'scenario':<18}{'req':>6}{'err':>5}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+
+
+def format_row(name: str, result: dict) -> str:
+    return (
+        f"{name:<18}{result['requests']:>6}{result['errors']:>5}{result['throughput_rps']:>10.1f}"
+        f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+    )
+
+
+def save(path: str, meta: dict, results: Dict[str, dict]) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({"meta": meta, "scenarios": results}, handle, indent=2, ensure_ascii=False)
+        handle.write("\n")
+
+
+def compare(old_path: str, new_path: str) -> str:
+    """Tabela razlika dva JSON rezultata (negativan procenat = brže)"""
+    with open(old_path, encoding="utf-8") as handle:
+        old = json.load(handle)
+    with open(new_path, encoding="utf-8") as handle:
+        new = json.load(handle)
+
+    def change(before: float, after: float) -> str:
+        if not before:
+            return "-"
+        return f"{(after - before) / before * 100:+.1f}%"
+
+    lines = [
+        f"{old_path} ({old['meta'].get('git_revision')}) -> {new_path} ({new['meta'].get('git_revision')})",
+        f"{'scenario':<18}{'metric':<16}{'old':>12}{'new':>12}{'change':>10}",
+    ]
+    for name in sorted(set(old["scenarios"]) | set(new["scenarios"])):
+        before, after = old["scenarios"].get(name), new["scenarios"].get(name)
+        if before is None or after is None:
+            lines.append(f"{name:<18}{'samo u ' + (old_path if after is None else new_path)}")
+            continue
+        for metric in ("throughput_rps", *(f"p{pct}_ms" for pct in PERCENTILES), "errors"):
+            lines.append(
+                f"{name:<18}{metric:<16}{before[metric]:>12}{after[metric]:>12}"
+                f"{change(before[metric], after[metric]):>10}"
+            )
+    return "\n".join(lines)
@@ -0,0 +1,110 @@
+"""Scenariji opterećenja - svaki je jedna "korisnička operacija" nad aplikacijom.
+
+Operacija je async funkcija (ctx) -> None koja šalje jedan ili više zahteva
+kroz ctx.client i baca UnexpectedResponse ako status nije očekivan. Runner
+meri trajanje cele operacije.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.seed import CITIES, PASSWORD, SeedResult, make_jpeg
+
+
+class UnexpectedResponse(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"{response.request.method} {response.request.url.path} -> {response.status_code}")
+        self.response = response
+
+
+def expect(response: httpx.Response, *statuses: int) -> httpx.Response:
+    if response.status_code not in statuses:
+        raise UnexpectedResponse(response)
+    return response
+
+
+@dataclass
+class BenchContext:
+    client: httpx.AsyncClient
+    data: SeedResult
+    rng: random.Random
+    user_tokens: List[str] = field(default_factory=list)
+    admin_token: str = ""
+    # Unapred napravljene JPEG slike - kodiranje ne ulazi u merenje
+    uploads: List[bytes] = field(default_factory=list)
+
+    def user_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.rng.choice(self.user_tokens)}"}
+
+    def admin_headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+
+async def login(client: httpx.AsyncClient, email: str) -> str:
+    response = expect(await client.post("/api/auth/login", json={"email": email, "password": PASSWORD}), 200)
+    return response.json()["access_token"]
+
+
+async def prepare(ctx: BenchContext, tokens: int = 20, uploads: int = 50) -> None:
+    """Tokeni za nekoliko korisnika i admina, slike za upload scenario"""
+    emails = ctx.data.user_emails[1:tokens + 1] or ctx.data.user_emails
+    ctx.user_tokens = [await login(ctx.client, email) for email in emails]
+    ctx.admin_token = await login(ctx.client, ctx.data.admin_email)
+    ctx.uploads = [make_jpeg(ctx.rng) for _ in range(uploads)]
+
+
+async def map_listing(ctx: BenchContext) -> None:
+    """Mapa grada (~ zum 13) oko nasumičnog grada: GET /api/dogs?bbox=..."""
+    _, lat, lng, _, _ = ctx.rng.choice(CITIES)
+    lat += ctx.rng.uniform(-0.03, 0.03)
+    lng += ctx.rng.uniform(-0.03, 0.03)
+    bbox = f"{lng - 0.04:.5f},{lat - 0.025:.5f},{lng + 0.04:.5f},{lat + 0.025:.5f}"
+    expect(await ctx.client.get("/api/dogs/", params={"bbox": bbox, "limit": 100}), 200)
+
+
+async def detail_view(ctx: BenchContext) -> None:
+    """Detalji nasumičnog psa koji nije uklonjen"""
+    dog_id = ctx.rng.choice(ctx.data.visible_dog_ids)
+    expect(await ctx.client.get(f"/api/dogs/{dog_id}"), 200)
+
+
+async def login_storm(ctx: BenchContext) -> None:
+    """Prijava nasumičnog korisnika (bcrypt sa BCRYPT_ROUNDS)"""
+    await login(ctx.client, ctx.rng.choice(ctx.data.user_emails))
+
+
+async def upload_burst(ctx: BenchContext) -> None:
+    """Upload nove (jedinstvene) slike za nasumičnog psa, sa generisanjem varijanti"""
+    dog_id = ctx.rng.choice(ctx.data.visible_dog_ids)
+    image = ctx.uploads[ctx.rng.randrange(len(ctx.uploads))]
+    # Bajtovi posle kraja JPEG-a menjaju sha256, pa se slika ne deduplikuje
+    image += ctx.rng.randbytes(8)
+    expect(await ctx.client.post(
+        f"/api/dogs/{dog_id}/images",
+        files={"file": ("dog.jpg", image, "image/jpeg")},
+        headers=ctx.user_headers(),
+    ), 200, 201)
+
+
+async def admin_moderation(ctx: BenchContext) -> None:
+    """Strana pasa koji čekaju potvrdu i grupna potvrda/odbijanje cele strane"""
+    pending = expect(await ctx.client.get(
+        "/api/admin/dogs/pending", params={"limit": 50}, headers=ctx.admin_headers()
+    ), 200).json()["items"]
+    if not pending:
+        return
+    action = "confirm" if ctx.rng.random() < 0.8 else "reject"
+    expect(await ctx.client.post(
+        f"/api/admin/dogs/{action}", json={"ids": [dog["id"] for dog in pending]}, headers=ctx.admin_headers()
+    ), 200)
+
+
+SCENARIOS: Dict[str, Callable[[BenchContext], Awaitable[None]]] = {
+    "map_listing": map_listing,
+    "detail_view": detail_view,
+    "login_storm": login_storm,
+    "upload_burst": upload_burst,
+    "admin_moderation": admin_moderation,
+}
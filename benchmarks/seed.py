@@ -0,0 +1,176 @@
+"""Sintetički podaci za benchmark: korisnici, psi i slike.
+
+Psi su grupisani oko većih gradova Srbije (normalna raspodela oko centra,
+veći grad - više prijava) uz mali udeo razbacan po celoj zemlji, sa
+mešavinom statusa kakva se vidi u produkciji. Isti `seed` uvek daje iste
+podatke, pa su dva merenja uporediva.
+
+Svi korisnici imaju lozinku PASSWORD (hash se računa jednom), a prvi
+korisnik je admin.
+"""
+import io
+import math
+import os
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+from app.core.security import get_password_hash
+from app.db.models import Dog, DogImage, DogStatus, ImageBlob, User
+
+PASSWORD = "benchmark-password"
+
+# (ime, lat, lng, udeo prijava, raspršenost u km)
+CITIES = [
+    ("Beograd", 44.8125, 20.4612, 0.42, 6.0),
+    ("Novi Sad", 45.2671, 19.8335, 0.14, 4.0),
+    ("Niš", 43.3209, 21.8958, 0.10, 3.5),
+    ("Kragujevac", 44.0128, 20.9114, 0.07, 3.0),
+    ("Subotica", 46.1005, 19.6651, 0.05, 3.0),
+    ("Čačak", 43.8914, 20.3497, 0.04, 2.5),
+    ("Zrenjanin", 45.3816, 20.3686, 0.04, 2.5),
+    ("Šabac", 44.7489, 19.6908, 0.04, 2.5),
+    ("Kraljevo", 43.7234, 20.6870, 0.04, 2.5),
+]
+# Ostatak (udeo 1 - zbir gradova) ravnomerno po Srbiji
+COUNTRY_BBOX = (18.85, 42.25, 22.95, 46.15)  # min_lng, min_lat, max_lng, max_lat
+
+STATUS_MIX = {
+    DogStatus.REPORTED: 0.60,
+    DogStatus.PENDING_ADMIN: 0.10,
+    DogStatus.CONFIRMED: 0.25,
+    DogStatus.REMOVED: 0.05,
+}
+
+_ADJECTIVES = ["Crni", "Beli", "Mali", "Veliki", "Žuti", "Braon", "Šareni", "Mršav", "Uplašen", "Povređen"]
+_NOUNS = ["pas", "kuče", "štene", "mešanac", "ovčar", "terijer", "džukac", "lovački pas"]
+_PLACES = ["kod pijace", "u parku", "kod škole", "na autobuskoj stanici", "ispod mosta",
+           "kod prodavnice", "u dvorištu zgrade", "pored reke", "na Đerdapskoj ulici"]
+_DETAILS = ["ima ogrlicu", "šepa na zadnju nogu", "gladan je", "prilazi ljudima", "beži od ljudi",
+            "deluje bolesno", "čipovan", "lepo se slaže sa decom", "laje na automobile"]
+
+
+@dataclass
+class SeedResult:
+    user_ids: List[int]
+    admin_email: str
+    user_emails: List[str]
+    dog_ids: Dict[DogStatus, List[int]] = field(default_factory=dict)
+    image_count: int = 0
+
+    @property
+    def visible_dog_ids(self) -> List[int]:
+        return [id for status, ids in self.dog_ids.items() if status != DogStatus.REMOVED for id in ids]
+
+
+def random_location(rng: random.Random) -> Tuple[float, float]:
+    """(lat, lng) iz mešavine gradova i ravnomerne raspodele po zemlji"""
+    roll = rng.random()
+    for _, lat, lng, share, spread_km in CITIES:
+        if roll < share:
+            lat = rng.gauss(lat, spread_km / 111.0)
+            lng = rng.gauss(lng, spread_km / (111.0 * math.cos(math.radians(lat))))
+            return lat, lng
+        roll -= share
+    min_lng, min_lat, max_lng, max_lat = COUNTRY_BBOX
+    return rng.uniform(min_lat, max_lat), rng.uniform(min_lng, max_lng)
+
+
+def make_jpeg(rng: random.Random, size: Tuple[int, int] = (640, 480)) -> bytes:
+    """Mala JPEG fotografija sa slučajnim bojama - svaka je različita (nema deduplikacije)"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(8):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.ellipse((x, y, x + rng.randrange(20, 200), y + rng.randrange(20, 200)),
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=80)
+    return out.getvalue()
+
+
+def _title(rng: random.Random) -> str:
+    return f"{rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)} {rng.choice(_PLACES)}"
+
+
+def _description(rng: random.Random) -> str:
+    return ", ".join(rng.sample(_DETAILS, rng.randint(1, 4))).capitalize() + "."
+
+
+def seed(engine: Engine, upload_dir: str, users: int, dogs: int, images: int,
+         seed: int = 1, batch_size: int = 5000) -> SeedResult:
+    """Upisuje podatke u (migriranu) bazu i vraća id-eve za scenarije"""
+    rng = random.Random(seed)
+    password_hash = get_password_hash(PASSWORD)
+
+    emails = [f"user{index}@bench.example" for index in range(users)]
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {"email": email, "hashed_password": password_hash, "full_name": f"Korisnik {index}",
+             "is_admin": index == 0, "is_active": True}
+            for index, email in enumerate(emails)
+        ])
+        user_ids = list(connection.scalars(select(User.id).where(User.email.in_(emails)).order_by(User.id)))
+
+    statuses, weights = zip(*STATUS_MIX.items())
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        for start in range(0, dogs, batch_size):
+            rows = []
+            for _ in range(start, min(start + batch_size, dogs)):
+                status = rng.choices(statuses, weights)[0]
+                lat, lng = random_location(rng)
+                rows.append({
+                    "title": _title(rng),
+                    "description": _description(rng) if rng.random() < 0.8 else None,
+                    "latitude": lat,
+                    "longitude": lng,
+                    "status": status,
+                    "reporter_id": rng.choice(user_ids) if rng.random() < 0.7 else None,
+                    "picked_up_by_user_id": (
+                        rng.choice(user_ids) if status in (DogStatus.PENDING_ADMIN, DogStatus.CONFIRMED) else None
+                    ),
+                    "created_at": now - timedelta(seconds=rng.randrange(90 * 24 * 3600)),
+                })
+            connection.execute(insert(Dog), rows)
+        dog_rows = connection.execute(select(Dog.id, Dog.status).order_by(Dog.id)).all()
+
+    dog_ids: Dict[DogStatus, List[int]] = {status: [] for status in DogStatus}
+    for id, status in dog_rows:
+        dog_ids[status].append(id)
+
+    # Slike dele mali skup fajlova (kao posle deduplikacije) - za liste je
+    # bitan broj redova u dog_images, ne sadržaj
+    image_files = []
+    if images:
+        os.makedirs(upload_dir, exist_ok=True)
+        for index in range(min(images, 20)):
+            filename = f"bench_{index}.jpg"
+            data = make_jpeg(rng, (320, 240))
+            with open(os.path.join(upload_dir, filename), "wb") as handle:
+                handle.write(data)
+            image_files.append((filename, len(data)))
+
+        all_dog_ids = [id for id, _ in dog_rows]
+        with engine.begin() as connection:
+            for start in range(0, images, batch_size):
+                connection.execute(insert(DogImage), [
+                    {"dog_id": rng.choice(all_dog_ids), "filename": rng.choice(image_files)[0],
+                     "uploaded_by": rng.choice(user_ids)}
+                    for _ in range(start, min(start + batch_size, images))
+                ])
+            counts = dict(connection.execute(
+                select(DogImage.filename, func.count()).group_by(DogImage.filename)
+            ).all())
+            connection.execute(insert(ImageBlob), [
+                {"sha256": f"{index:064x}", "filename": filename, "size": size, "ref_count": counts.get(filename, 0)}
+                for index, (filename, size) in enumerate(image_files)
+            ])
+
+    return SeedResult(user_ids, emails[0], emails, dog_ids, images)
@@ -5,6 +5,9 @@ echo "🐕 Dog Rescue API - Pokretanje..."
 # Kreiraj uploads direktorijum
 mkdir -p uploads
 
+# Primeni migracije baze
+python -m app.db.migrations upgrade
+
 # Pokreni aplikaciju
 echo "🚀 Pokretanje FastAPI servera..."
 echo ""
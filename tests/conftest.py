@@ -0,0 +1,102 @@
+"""Zajednička podešavanja testova.
+
+Testovi rade nad privremenom SQLite bazom napravljenom kroz migracije.
+Podešavanja se čitaju pri importu app.core.config, pa se okruženje postavlja
+ovde, pre nego što bilo koji test importuje aplikaciju.
+"""
+import itertools
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+_workdir = tempfile.mkdtemp(prefix="dog-rescue-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_workdir, "uploads")
+os.environ["DEBUG"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["DATABASE_REPLICA_URLS"] = "[]"
+# Keš odgovora bi sakrio upite koje testovi broje
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select, text
+
+from app.db import migrations
+from app.db.database import async_engine, engine
+from app.db.models import Dog, DogImage, DogStatus, ImageVariant, User
+from app.main import app
+
+PASSWORD = "secret123"
+
+_emails = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def client():
+    migrations.upgrade(engine)
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def make_user(client):
+    """Registruje novog korisnika i vraća Authorization header za njega"""
+    def make(admin: bool = False) -> dict:
+        email = f"user{next(_emails)}@example.com"
+        response = client.post("/api/auth/signup", json={"email": email, "password": PASSWORD, "full_name": "Test"})
+        assert response.status_code == 201, response.text
+        if admin:
+            with engine.begin() as connection:
+                connection.execute(text("UPDATE users SET is_admin = 1 WHERE email = :email"), {"email": email})
+        response = client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return make
+
+
+def insert_dogs(count: int, status: DogStatus = DogStatus.REPORTED, images: int = 1, **columns) -> list:
+    """Upisuje pse (sa slikama i varijantama) direktno u bazu; vraća njihove id-eve.
+
+    columns zamenjuju podrazumevane vrednosti kolona (naslov, koordinate, created_at...) za sve pse.
+    """
+    with engine.begin() as connection:
+        user_id = connection.scalar(select(User.id).order_by(User.id))
+        now = datetime.utcnow()
+        ids = []
+        for index in range(count):
+            values = dict(
+                title=f"Dog {index}", latitude=44.8, longitude=20.4, status=status,
+                reporter_id=user_id, picked_up_by_user_id=user_id,
+                created_at=now - timedelta(seconds=index),
+            )
+            values.update(columns)
+            ids.append(connection.scalar(insert(Dog).values(**values).returning(Dog.id)))
+        add_images(connection, ids, images, user_id)
+    return ids
+
+
+def add_images(connection, dog_ids: list, images: int, user_id=None) -> None:
+    for dog_id in dog_ids:
+        for index in range(images):
+            filename = f"dog{dog_id}_{index}_{next(_emails)}.jpg"
+            connection.execute(insert(DogImage).values(dog_id=dog_id, filename=filename, uploaded_by=user_id))
+            connection.execute(insert(ImageVariant).values(
+                source_filename=filename, kind="thumb", filename=f"thumb_{filename}", width=200, height=150
+            ))
+
+
+@contextmanager
+def count_queries():
+    """Broji SQL naredbe koje API pošalje bazi unutar bloka"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
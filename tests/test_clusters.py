@@ -0,0 +1,54 @@
+"""Klasteri za mapu: broj pasa po ćeliji unutar bbox-a, bez uklonjenih i pasa van oblasti"""
+import pytest
+
+from app.db.models import DogStatus
+
+from conftest import insert_dogs
+
+# Oblast u kojoj drugi testovi nemaju pse
+BBOX = "129.95,-30.15,130.15,-29.95"
+ZOOM = 10
+
+
+@pytest.fixture(scope="module")
+def dogs(client):
+    return {
+        "pair": insert_dogs(1, latitude=-30.0, longitude=130.0)
+        + insert_dogs(1, status=DogStatus.PENDING_ADMIN, latitude=-30.001, longitude=130.001),
+        "single": insert_dogs(1, latitude=-30.1, longitude=130.1)[0],
+        "removed": insert_dogs(1, status=DogStatus.REMOVED, latitude=-30.0, longitude=130.0)[0],
+        "outside": insert_dogs(1, latitude=-35.0, longitude=140.0)[0],
+    }
+
+
+def _clusters(client, bbox: str = BBOX, zoom: int = ZOOM) -> list:
+    response = client.get("/api/dogs/clusters", params={"bbox": bbox, "zoom": zoom})
+    assert response.status_code == 200, response.text
+    assert response.json()["zoom"] == zoom
+    return sorted(response.json()["clusters"], key=lambda cluster: -cluster["count"])
+
+
+def test_counts_visible_dogs_per_cell(client, dogs):
+    pair, single = _clusters(client)
+
+    assert pair["count"] == 2
+    assert pair["statuses"] == {"reported": 1, "pending_admin": 1}
+    assert pair["dog_id"] is None
+    assert pair["latitude"] == pytest.approx(-30.0005)
+    assert pair["longitude"] == pytest.approx(130.0005)
+
+    assert single["count"] == 1
+    assert single["statuses"] == {"reported": 1}
+    assert single["dog_id"] == dogs["single"]
+
+
+def test_low_zoom_merges_cells(client, dogs):
+    clusters = _clusters(client, zoom=4)
+    assert [(cluster["count"], cluster["dog_id"]) for cluster in clusters] == [(3, None)]
+
+
+def test_invalid_bbox_and_too_many_tiles(client):
+    assert client.get("/api/dogs/clusters", params={"bbox": "1,2,3", "zoom": 3}).status_code == 400
+    response = client.get("/api/dogs/clusters", params={"bbox": "-180,-90,180,90", "zoom": 10})
+    assert response.status_code == 400
+    assert "tiles" in response.json()["detail"]
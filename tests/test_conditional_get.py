@@ -0,0 +1,24 @@
+"""Uslovni GET detalja psa: ETag vidi promenu korisnika, If-Modified-Since ne daje 304"""
+from email.utils import formatdate
+
+
+def test_if_modified_since_alone_never_returns_stale_user(client, make_user):
+    headers = make_user()
+    dog_id = client.post(
+        "/api/dogs/", headers=headers, json={"title": "Pas", "latitude": 44.8, "longitude": 20.4}
+    ).json()["id"]
+    url = f"/api/dogs/{dog_id}"
+
+    response = client.get(url)
+    assert "Last-Modified" not in response.headers
+    etag = response.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    assert client.patch("/api/users/me", headers=headers, json={"full_name": "Novo ime"}).status_code == 200
+
+    # Ime autora se promenilo, a updated_at psa nije
+    in_the_future = formatdate(usegmt=True, timeval=2**31)
+    response = client.get(url, headers={"If-Modified-Since": in_the_future})
+    assert response.status_code == 200
+    assert response.json()["reporter"]["full_name"] == "Novo ime"
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,71 @@
+"""/api/dogs/changes: token iz odgovora vraća samo kasnije promene, brisanje ostavlja tombstone"""
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db.database import engine
+from app.db.models import Dog, DogStatus
+
+from conftest import insert_dogs
+
+
+def _changes(client, since: int, limit: int = settings.MAX_PAGE_SIZE) -> dict:
+    response = client.get("/api/dogs/changes", params={"since": since, "limit": limit})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _current_token(client) -> int:
+    """Token posle svih dosadašnjih promena (pun sync od 0)"""
+    token, has_more = 0, True
+    while has_more:
+        body = _changes(client, token)
+        token, has_more = body["token"], body["has_more"]
+    return token
+
+
+def _has_tombstone(client, dog_id: int) -> bool:
+    token, has_more = 0, True
+    while has_more:
+        body = _changes(client, token)
+        if dog_id in body["deleted"]:
+            return True
+        token, has_more = body["token"], body["has_more"]
+    return False
+
+
+def test_token_round_trip_with_tombstones(client, make_user):
+    headers = make_user(admin=True)
+    since = _current_token(client)
+    first, second, third = insert_dogs(3)
+
+    page = _changes(client, since, limit=2)
+    assert [dog["id"] for dog in page["changed"]] == [first, second]
+    assert page["deleted"] == [] and page["has_more"] is True
+    page = _changes(client, page["token"], limit=2)
+    assert [dog["id"] for dog in page["changed"]] == [third]
+    assert page["has_more"] is False
+    since = page["token"]
+
+    # Ništa novo: isti token, prazan odgovor
+    assert _changes(client, since) == {"changed": [], "deleted": [], "token": since, "has_more": False}
+
+    assert client.delete(f"/api/dogs/{first}", headers=headers).status_code == 200
+    assert client.put(f"/api/dogs/{second}", headers=headers, json={"title": "Izmenjen"}).status_code == 200
+    with engine.begin() as connection:
+        connection.execute(update(Dog).where(Dog.id == third).values(status=DogStatus.REMOVED))
+
+    page = _changes(client, since)
+    # Obrisan i uklonjen pas se javljaju samo kao id, redosledom promena
+    assert page["deleted"] == [first, third]
+    assert [(dog["id"], dog["title"]) for dog in page["changed"]] == [(second, "Izmenjen")]
+    assert page["token"] > since and page["has_more"] is False
+
+    # Pas izmenjen više puta ima jedan red - javlja se jednom, sa poslednjim stanjem
+    assert client.put(f"/api/dogs/{second}", headers=headers, json={"title": "Opet"}).status_code == 200
+    assert client.put(f"/api/dogs/{second}", headers=headers, json={"title": "Treći put"}).status_code == 200
+    later = _changes(client, page["token"])
+    assert later["deleted"] == []
+    assert [(dog["id"], dog["title"]) for dog in later["changed"]] == [(second, "Treći put")]
+
+    # Pun sync vidi tombstone obrisanog psa
+    assert _has_tombstone(client, first)
@@ -0,0 +1,59 @@
+"""Grupna moderacija: ishod po id-u (updated / not_pending / not_found) i uslov na statusu"""
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.database import engine
+from app.db.models import Dog, DogStatus
+
+from conftest import insert_dogs
+
+
+def _statuses(ids: list) -> dict:
+    with engine.connect() as connection:
+        return dict(connection.execute(select(Dog.id, Dog.status).where(Dog.id.in_(ids))).all())
+
+
+def test_confirm_reports_outcome_per_id(client, make_user):
+    headers = make_user(admin=True)
+    pending = insert_dogs(2, status=DogStatus.PENDING_ADMIN)
+    reported = insert_dogs(1)[0]
+    with engine.connect() as connection:
+        missing = connection.scalar(select(func.max(Dog.id))) + 1000
+
+    # Ponovljen id se obrađuje jednom, redosled ishoda prati zahtev
+    ids = [missing, pending[1], reported, pending[0], pending[1]]
+    response = client.post("/api/admin/dogs/confirm", headers=headers, json={"ids": ids})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"updated": 2, "results": [
+        {"id": missing, "result": "not_found", "status": None},
+        {"id": pending[1], "result": "updated", "status": "confirmed"},
+        {"id": reported, "result": "not_pending", "status": "reported"},
+        {"id": pending[0], "result": "updated", "status": "confirmed"},
+    ]}
+    assert _statuses(pending + [reported]) == {
+        pending[0]: DogStatus.CONFIRMED, pending[1]: DogStatus.CONFIRMED, reported: DogStatus.REPORTED,
+    }
+
+    # Drugi admin koji potvrđuje iste pse ne menja ništa
+    response = client.post("/api/admin/dogs/confirm", headers=headers, json={"ids": pending})
+    assert response.json()["updated"] == 0
+    assert [item["result"] for item in response.json()["results"]] == ["not_pending", "not_pending"]
+
+
+def test_reject_returns_dogs_to_reported(client, make_user):
+    headers = make_user(admin=True)
+    dog_id = insert_dogs(1, status=DogStatus.PENDING_ADMIN)[0]
+
+    response = client.post("/api/admin/dogs/reject", headers=headers, json={"ids": [dog_id]})
+    assert response.json() == {"updated": 1, "results": [{"id": dog_id, "result": "updated", "status": "reported"}]}
+    with engine.connect() as connection:
+        row = connection.execute(select(Dog.status, Dog.picked_up_by_user_id).where(Dog.id == dog_id)).one()
+    assert row == (DogStatus.REPORTED, None)
+
+
+def test_bulk_moderation_limits(client, make_user):
+    headers = make_user(admin=True)
+    assert client.post("/api/admin/dogs/confirm", headers=headers, json={"ids": []}).status_code == 422
+    too_many = list(range(1, settings.MAX_PAGE_SIZE + 2))
+    assert client.post("/api/admin/dogs/confirm", headers=headers, json={"ids": too_many}).status_code == 400
+    assert client.post("/api/admin/dogs/confirm", headers=make_user(), json={"ids": [1]}).status_code == 403
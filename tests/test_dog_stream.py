@@ -0,0 +1,49 @@
+"""/api/dogs/stream: pretplata postoji samo dok se telo odgovora šalje"""
+import asyncio
+
+from app.api.api_v1.endpoints.dogs import stream_dogs
+from app.core.config import settings
+from app.core.events import dog_events
+
+
+def _subscribers() -> int:
+    return dog_events.stats()["subscribers"]
+
+
+def test_stream_subscribes_only_while_body_is_sent(client):
+    async def scenario():
+        before = _subscribers()
+        response = await stream_dogs(bbox=None, last_event_id=None)
+        # Odgovor koji nikad ne počne (klijent se odvojio) ne zauzima mesto
+        assert _subscribers() == before
+
+        body = response.body_iterator
+        assert await body.__anext__() == b"retry: %d\n\n" % settings.SSE_RETRY_MS
+        assert _subscribers() == before + 1
+        await body.aclose()
+        assert _subscribers() == before
+
+    asyncio.run(scenario())
+
+
+def test_stream_returns_503_without_reserving_a_slot(client, monkeypatch):
+    monkeypatch.setattr(dog_events, "max_subscribers", 0)
+    before = _subscribers()
+
+    response = client.get("/api/dogs/stream")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+    assert _subscribers() == before
+
+
+def test_stream_closes_when_capacity_is_taken_before_it_starts(client, monkeypatch):
+    async def scenario():
+        response = await stream_dogs(bbox=None, last_event_id=None)
+        # Drugi klijent je zauzeo poslednje mesto između provere i početka tela
+        monkeypatch.setattr(dog_events, "max_subscribers", 0)
+        chunks = [chunk async for chunk in response.body_iterator]
+        assert chunks == [b"retry: %d\n\n" % settings.SSE_RETRY_MS]
+        assert _subscribers() == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,119 @@
+"""Deljeni sadržaj slika: brojanje referenci i brisanje fajla bez trke sa uploadom"""
+import asyncio
+import hashlib
+import os
+import tempfile
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.images import acquire_blob, purge_unused_blobs
+from app.core.storage import StoredUpload, upload_path
+from app.db.database import AsyncSessionLocal, engine
+from app.db.models import DogImage, ImageBlob
+
+from conftest import insert_dogs
+
+CONTENT = b"\xff\xd8\xff\xe0 same picture"
+
+
+def _stored_upload(content: bytes = CONTENT) -> StoredUpload:
+    """Ono što save_upload vraća: sadržaj u privremenom fajlu, još bez konačnog imena"""
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix=".upload-", suffix=".part")
+    with os.fdopen(fd, "wb") as out:
+        out.write(content)
+    sha256 = hashlib.sha256(content).hexdigest()
+    return StoredUpload(f"{sha256}.jpg", sha256, len(content), tmp_path)
+
+
+def _ref_count(filename: str):
+    with engine.connect() as connection:
+        return connection.scalar(select(ImageBlob.ref_count).where(ImageBlob.filename == filename))
+
+
+def test_same_content_uploaded_twice_shares_one_blob(client, make_user):
+    # insert_dogs upisuje prvog korisnika iz baze kao autora - brisanje sme admin
+    headers = make_user(admin=True)
+    dog_ids = insert_dogs(2, images=0)
+    filenames = []
+    for dog_id in dog_ids:
+        response = client.post(
+            f"/api/dogs/{dog_id}/images", headers=headers,
+            files={"file": ("dog.jpg", b"\xff\xd8\xff\xe0 shared upload", "image/jpeg")},
+        )
+        assert response.status_code == 200, response.text
+        filenames.append(response.json()["filename"])
+
+    assert filenames[0] == filenames[1]
+    assert _ref_count(filenames[0]) == 2
+    assert not [name for name in os.listdir(settings.UPLOAD_DIR) if name.endswith(".part")]
+
+    assert client.delete(f"/api/dogs/{dog_ids[0]}", headers=headers).status_code == 200
+    assert _ref_count(filenames[0]) == 1
+    assert os.path.exists(upload_path(filenames[0]))
+
+    assert client.delete(f"/api/dogs/{dog_ids[1]}", headers=headers).status_code == 200
+    assert _ref_count(filenames[0]) is None
+    assert not os.path.exists(upload_path(filenames[0]))
+
+
+def test_purge_waits_for_upload_that_reuses_the_file(client, make_user):
+    """Brisanje poslednje reference i novi upload istog sadržaja u isto vreme"""
+    make_user()
+    dog_id = insert_dogs(1, images=0)[0]
+    first = _stored_upload()
+    filename = first.filename
+
+    async def scenario():
+        # Sadržaj koji je upravo ostao bez referenci: red sa ref_count = 0, fajl još postoji
+        async with AsyncSessionLocal() as db:
+            await acquire_blob(db, first)
+            await db.commit()
+            blob = await db.get(ImageBlob, first.sha256)
+            blob.ref_count = 0
+            await db.commit()
+
+        second = _stored_upload()
+        async with AsyncSessionLocal() as upload_db, AsyncSessionLocal() as purge_db:
+            upload_db.add(DogImage(dog_id=dog_id, filename=filename))
+            await acquire_blob(upload_db, second)
+            # Upload je odlučio da koristi postojeći fajl - brisanje mora da sačeka njegov commit
+            purge = asyncio.create_task(purge_unused_blobs(purge_db, [filename]))
+            await asyncio.sleep(0.3)
+            assert not purge.done()
+            await upload_db.commit()
+            await purge
+        assert not os.path.exists(second.tmp_path)
+
+    asyncio.run(scenario())
+
+    assert _ref_count(filename) == 1
+    assert os.path.exists(upload_path(filename))
+
+
+def test_upload_after_purge_restores_the_file(client, make_user):
+    make_user()
+    dog_id = insert_dogs(1, images=0)[0]
+    content = b"\xff\xd8\xff\xe0 purged picture"
+    first = _stored_upload(content)
+
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await acquire_blob(db, first)
+            await db.commit()
+            blob = await db.get(ImageBlob, first.sha256)
+            blob.ref_count = 0
+            await db.commit()
+            await purge_unused_blobs(db, [first.filename])
+        assert not os.path.exists(upload_path(first.filename))
+
+        async with AsyncSessionLocal() as db:
+            db.add(DogImage(dog_id=dog_id, filename=first.filename))
+            await acquire_blob(db, _stored_upload(content))
+            await db.commit()
+
+    asyncio.run(scenario())
+
+    assert _ref_count(first.filename) == 1
+    assert os.path.exists(upload_path(first.filename))
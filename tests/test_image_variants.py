@@ -0,0 +1,66 @@
+"""Varijante slika: jedna po vrsti i kod paralelne obrade, bez dekodiranja prevelikih slika"""
+import os
+import threading
+
+from PIL import Image
+from sqlalchemy import insert, select
+
+from app.core import images
+from app.core.config import settings
+from app.core.storage import upload_path
+from app.db.database import engine
+from app.db.models import DogImage, ImageVariant
+
+from conftest import insert_dogs
+
+
+def _save_image(filename: str, size=(64, 48)) -> None:
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    Image.new("RGB", size, (200, 120, 40)).save(upload_path(filename), "JPEG")
+
+
+def test_concurrent_variant_tasks_store_one_row_per_kind(client, make_user, monkeypatch):
+    make_user()
+    dog_id = insert_dogs(1, images=0)[0]
+    filename = "race.jpg"
+    _save_image(filename)
+    with engine.begin() as connection:
+        connection.execute(insert(DogImage).values(dog_id=dog_id, filename=filename))
+
+    # Oba taska prođu proveru postojećih varijanti pre nego što bilo koji upiše
+    barrier = threading.Barrier(2)
+    generate = images.generate_variants
+
+    def generate_together(name):
+        variants = generate(name)
+        barrier.wait(timeout=10)
+        return variants
+
+    errors = []
+
+    def run_task():
+        try:
+            images.create_image_variants(filename)
+        except Exception as exc:
+            errors.append(exc)
+
+    monkeypatch.setattr(images, "generate_variants", generate_together)
+    tasks = [threading.Thread(target=run_task) for _ in range(2)]
+    for task in tasks:
+        task.start()
+    for task in tasks:
+        task.join()
+    assert errors == []
+
+    with engine.connect() as connection:
+        kinds = connection.scalars(
+            select(ImageVariant.kind).where(ImageVariant.source_filename == filename)
+        ).all()
+    assert sorted(kinds) == sorted(kind for kind, _, _ in images.variant_kinds())
+
+
+def test_oversized_image_is_not_decoded(monkeypatch):
+    _save_image("huge.jpg", (200, 200))
+    monkeypatch.setattr(settings, "IMAGE_MAX_PIXELS", 100 * 100)
+    assert images.generate_variants("huge.jpg") == []
+    assert not os.path.exists(upload_path("huge_thumb.jpg"))
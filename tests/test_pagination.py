@@ -0,0 +1,78 @@
+"""Keyset paginacija po (created_at, id): isti created_at razrešava id, bez preskakanja i ponavljanja"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.api_v1.pagination import PageParams, decode_cursor, encode_cursor, paginate
+from app.api.api_v1.utils import dog_query
+from app.db.database import AsyncSessionLocal
+from app.db.models import Dog
+
+from conftest import insert_dogs
+
+CREATED_AT = datetime(2024, 5, 1, 12, 0, 0)
+
+
+@pytest.fixture(scope="module")
+def dog_ids(client):
+    """Sedam pasa sa istim created_at (i jedan stariji) u oblasti bez drugih pasa"""
+    place = dict(latitude=10.0, longitude=-60.0)
+    return insert_dogs(7, created_at=CREATED_AT, **place) + insert_dogs(
+        1, created_at=datetime(2024, 4, 1), **place
+    )
+
+
+def _all_pages(limit: int, ids: list) -> list:
+    async def scenario():
+        pages, cursor = [], None
+        async with AsyncSessionLocal() as db:
+            while True:
+                query = dog_query(detail=False).where(Dog.id.in_(ids))
+                items, cursor = await paginate(db, query, Dog.created_at, Dog.id, PageParams(limit, cursor))
+                pages.append([dog.id for dog in items])
+                if cursor is None:
+                    return pages
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 8, 50])
+def test_equal_created_at_is_tie_broken_by_id(dog_ids, limit):
+    pages = _all_pages(limit, dog_ids)
+    seen = [id for page in pages for id in page]
+
+    # Noviji created_at prvi, u okviru istog created_at veći id prvi; poslednji je stariji pas
+    assert seen == sorted(dog_ids[:7], reverse=True) + [dog_ids[7]]
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+def test_list_endpoint_pages_through_bbox(client, dog_ids):
+    seen, cursor = [], None
+    while True:
+        params = {"bbox": "-60.5,9.5,-59.5,10.5", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/dogs/", params=params)
+        assert response.status_code == 200, response.text
+        seen += [item["id"] for item in response.json()["items"]]
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(dog_ids[:7], reverse=True) + [dog_ids[7]]
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(CREATED_AT, 42)) == (CREATED_AT, 42)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "!!!", encode_cursor(CREATED_AT, 1)[:-3]])
+def test_invalid_cursor_is_rejected(client, cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+    response = client.get("/api/dogs/", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,79 @@
+"""Ograničen red password pool-a: preko PASSWORD_HASH_QUEUE_SIZE poslova signup/login vraćaju 503"""
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import security
+from app.core.config import settings
+
+
+def test_password_queue_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(settings, "PASSWORD_HASH_QUEUE_SIZE", 2)
+    release = threading.Event()
+
+    def blocked():
+        release.wait()
+        return "done"
+
+    async def run():
+        jobs = [asyncio.create_task(security._run_password_job(blocked)) for _ in range(3)]
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as rejected:
+            await security._run_password_job(blocked)
+        release.set()
+        assert await asyncio.gather(*jobs) == ["done"] * 3
+        return rejected.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503 and error.headers["Retry-After"] == "1"
+    assert security.password_pool_stats()["in_flight"] == 0
+
+
+def test_signup_returns_503_when_password_queue_is_full(client, monkeypatch):
+    monkeypatch.setattr(security, "_password_jobs", settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE)
+    response = client.post(
+        "/api/auth/signup", json={"email": "flood@example.com", "password": "secret123", "full_name": "Flood"}
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_login_does_not_block_other_requests(client, monkeypatch):
+    """Dok bcrypt traje (u password pool-u), event loop opslužuje ostale zahteve"""
+    import httpx
+
+    from app.main import app
+
+    email = "slow-login@example.com"
+    response = client.post("/api/auth/signup", json={"email": email, "password": "secret123", "full_name": "Slow"})
+    assert response.status_code == 201
+    started = threading.Event()
+    release = threading.Event()
+    verify = security.verify_password
+
+    def slow_verify(plain_password, hashed_password):
+        started.set()
+        release.wait(timeout=10)
+        return verify(plain_password, hashed_password)
+
+    monkeypatch.setattr(security, "verify_password", slow_verify)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            login = asyncio.create_task(http.post(
+                "/api/auth/login", json={"email": email, "password": "wrong"}
+            ))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            listing = await asyncio.wait_for(http.get("/api/dogs/"), timeout=5)
+            assert not login.done()
+            release.set()
+            return listing, await login
+
+    listing, login = asyncio.run(run())
+    assert listing.status_code == 200
+    assert login.status_code == 401
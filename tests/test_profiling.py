@@ -0,0 +1,89 @@
+"""Log sporih upita i profilisanje zahteva (app/core/profiling.py)"""
+import asyncio
+
+from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware, SlowQueryLog, parameter_types, profiles
+
+
+def test_slow_query_log_keeps_parameter_types_not_values():
+    log = SlowQueryLog(maxsize=10)
+    hashed = "$2b$12$abcdefghijklmnopqrstuuN2q0m3Jc6yE5m1mQ0h2YvI8Yl9x4m7G"
+    log.record("primary", 0.5, "UPDATE users SET hashed_password=? WHERE users.email = ?", (hashed, "ana@example.com"))
+
+    entry = log.entries()[0]
+    assert entry["parameter_types"] == "(str, str)"
+    assert hashed not in repr(entry) and "ana@example.com" not in repr(entry)
+
+
+def test_parameter_types():
+    assert parameter_types({"email_1": "ana@example.com", "id_1": 3}) == "{email_1: str, id_1: int}"
+    assert parameter_types([(1, "a"), (2, "b")]) == "2 x (int, str)"
+    assert parameter_types(()) == "()"
+
+
+def _profiled_request(app, monkeypatch):
+    """Pokreće zahtev sa X-Profile kroz ProfilingMiddleware (admin provera se preskače)"""
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    middleware = ProfilingMiddleware(app)
+
+    async def allowed(scope):
+        return True
+
+    monkeypatch.setattr(middleware, "_allowed", allowed)
+    scope = {"type": "http", "method": "GET", "path": "/stream", "query_string": b"", "headers": [(b"x-profile", b"1")]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    return middleware, middleware(scope, receive, send), sent
+
+
+def test_profiling_stops_when_event_stream_starts(monkeypatch):
+    stream_started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def stream_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream; charset=utf-8")]})
+        stream_started.set()
+        await release.wait()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def scenario():
+        middleware, call, sent = _profiled_request(stream_app, monkeypatch)
+        task = asyncio.create_task(call)
+        await stream_started.wait()
+        # Stream je još otvoren, a profil je već zatvoren i sačuvan
+        assert not middleware._active
+        profile_id = dict(sent[0]["headers"])[b"x-profile-id"].decode()
+        assert profiles.get(profile_id)["truncated"] == "stream"
+        release.set()
+        await task
+
+    asyncio.run(scenario())
+
+
+def test_profiling_stops_after_time_limit(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_MAX_SECONDS", 0.05)
+    release = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}", "more_body": False})
+
+    async def scenario():
+        middleware, call, sent = _profiled_request(slow_app, monkeypatch)
+        task = asyncio.create_task(call)
+        await asyncio.sleep(0.2)
+        assert not middleware._active
+        assert profiles.summaries()[0]["truncated"] == "time_limit"
+        release.set()
+        await task
+        assert sent[0]["status"] == 200
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+"""Broj SQL upita po zahtevu ne sme da raste sa brojem pasa (N+1)"""
+from app.db.database import engine
+from app.db.models import DogStatus
+
+from conftest import add_images, count_queries, insert_dogs
+
+
+def _queries(client, path: str, headers=None) -> int:
+    with count_queries() as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+def test_dog_list_query_count_is_constant(client, make_user):
+    make_user()
+    insert_dogs(3)
+    client.get("/api/dogs/?limit=100")  # zagrevanje (pool, keš šeme)
+    small = _queries(client, "/api/dogs/?limit=100")
+
+    insert_dogs(60, images=3)
+    assert len(client.get("/api/dogs/?limit=100").json()["items"]) > 60
+    assert _queries(client, "/api/dogs/?limit=100") == small
+
+
+def test_admin_pending_query_count_is_constant(client, make_user):
+    admin = make_user(admin=True)
+    insert_dogs(2, status=DogStatus.PENDING_ADMIN)
+    client.get("/api/admin/dogs/pending?limit=100", headers=admin)
+    small = _queries(client, "/api/admin/dogs/pending?limit=100", admin)
+
+    insert_dogs(40, status=DogStatus.PENDING_ADMIN, images=2)
+    assert len(client.get("/api/admin/dogs/pending?limit=100", headers=admin).json()["items"]) >= 42
+    assert _queries(client, "/api/admin/dogs/pending?limit=100", admin) == small
+
+
+def test_dog_detail_query_count_is_constant(client, make_user):
+    make_user()
+    dog_id = insert_dogs(1)[0]
+    client.get(f"/api/dogs/{dog_id}")
+    small = _queries(client, f"/api/dogs/{dog_id}")
+
+    insert_dogs(30)
+    with engine.begin() as connection:
+        add_images(connection, [dog_id], 10)
+    assert len(client.get(f"/api/dogs/{dog_id}").json()["images"]) == 11
+    assert _queries(client, f"/api/dogs/{dog_id}") == small
@@ -0,0 +1,28 @@
+"""Vrući upiti API-ja ne čitaju cele tabele (EXPLAIN QUERY PLAN na SQLite-u)"""
+import pytest
+
+from app.db.query_plans import PlanRow, explain_hot_queries, full_scans, hot_queries
+
+
+@pytest.fixture(scope="module")
+def plans(tmp_path_factory):
+    return explain_hot_queries(str(tmp_path_factory.mktemp("plans") / "plans.db"))
+
+
+@pytest.mark.parametrize("name", list(hot_queries()))
+def test_hot_query_uses_indexes(plans, name):
+    rows = plans[name]
+    assert rows, f"{name} did not run any SELECT"
+    assert full_scans(rows) == [], "\n".join(row.detail for row in rows)
+
+
+def test_full_scan_detection():
+    rows = [
+        PlanRow("q", "SCAN dogs"),
+        PlanRow("q", "SCAN TABLE users AS u"),
+        PlanRow("q", "SEARCH dog_images USING INDEX ix_dog_images_dog_id (dog_id=?)"),
+        PlanRow("q", "SCAN dogs_rtree VIRTUAL TABLE INDEX 2:D0B1"),
+        PlanRow("q", "MATERIALIZE page"),
+        PlanRow("q", "SCAN page"),
+    ]
+    assert full_scans(rows) == ["dogs", "users"]
@@ -0,0 +1,84 @@
+"""Read replike: anonimna čitanja idu na repliku, upisi i čitanja autora upisa na primarnu bazu"""
+import asyncio
+import os
+import sqlite3
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api import deps
+from app.api.api_v1 import utils
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, create_replica_engine, engine
+from app.db.routing import ReadWriteRouter, ReplicaSession
+
+from conftest import insert_dogs
+
+# Dovoljno dugo za nekoliko zahteva u prozoru, dovoljno kratko da test sačeka istek
+WINDOW_SECONDS = 0.5
+
+
+def _title(url: str, dog_id: int) -> str:
+    file_engine = create_engine(url)
+    try:
+        with file_engine.connect() as connection:
+            return connection.scalar(text("SELECT title FROM dogs WHERE id = :id"), {"id": dog_id})
+    finally:
+        file_engine.dispose()
+
+
+@pytest.fixture
+def replica(client, make_user, tmp_path, monkeypatch):
+    """Druga SQLite baza kao replika: kopija primarne u trenutku pravljenja fixture-a"""
+    headers = make_user(admin=True)
+    dog_id = insert_dogs(1)[0]
+
+    path = str(tmp_path / "replica.db")
+    source = sqlite3.connect(engine.url.database)
+    target = sqlite3.connect(path)
+    try:
+        source.backup(target)
+        # Replika zna za psa pod drugim imenom, pa se iz odgovora vidi koja baza je čitana
+        target.execute("UPDATE dogs SET title = 'Sa replike' WHERE id = ?", (dog_id,))
+        target.commit()
+    finally:
+        source.close()
+        target.close()
+
+    url = f"sqlite:///{path}"
+    replica_engine = create_replica_engine(url)
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", WINDOW_SECONDS)
+    router = ReadWriteRouter(
+        writer=AsyncSessionLocal,
+        readers=[async_sessionmaker(
+            replica_engine, class_=AsyncSession, sync_session_class=ReplicaSession,
+            autoflush=False, expire_on_commit=False,
+        )],
+        sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+        sticky_max_size=100,
+    )
+    monkeypatch.setattr(deps, "db_router", router)
+    monkeypatch.setattr(utils, "db_router", router)
+    yield url, headers, dog_id
+    asyncio.run(replica_engine.dispose())
+    os.remove(path)
+
+
+def test_reads_follow_the_writer_until_the_window_expires(client, replica):
+    replica_url, headers, dog_id = replica
+
+    assert client.get(f"/api/dogs/{dog_id}").json()["title"] == "Sa replike"
+
+    response = client.put(f"/api/dogs/{dog_id}", headers=headers, json={"title": "Sa primarne"})
+    assert response.status_code == 200, response.text
+    assert _title(settings.DATABASE_URL, dog_id) == "Sa primarne"
+    assert _title(replica_url, dog_id) == "Sa replike"
+
+    # Autor upisa u prozoru čita sa primarne baze, ostali i dalje sa replike
+    assert client.get(f"/api/dogs/{dog_id}", headers=headers).json()["title"] == "Sa primarne"
+    assert client.get(f"/api/dogs/{dog_id}").json()["title"] == "Sa replike"
+
+    time.sleep(WINDOW_SECONDS + 0.1)
+    assert client.get(f"/api/dogs/{dog_id}", headers=headers).json()["title"] == "Sa replike"
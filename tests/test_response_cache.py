@@ -0,0 +1,111 @@
+"""Keš odgovora: replike ga ne pune odmah posle invalidacije, a pad Redis-a ne obara zahteve"""
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.api import deps
+from app.api.api_v1 import utils
+from app.core.config import settings
+from app.core.response_cache import CachedResponse, MemoryResponseCache, RedisResponseCache
+from app.db.database import AsyncSessionLocal, async_engine
+from app.db.routing import ReadWriteRouter, ReplicaSession
+
+from conftest import insert_dogs
+
+
+@pytest.fixture
+def replica_cache(monkeypatch):
+    """Keš u memoriji i "replika" na istoj bazi, kao kad postoje DATABASE_REPLICA_URLS"""
+    router = ReadWriteRouter(
+        writer=AsyncSessionLocal,
+        readers=[async_sessionmaker(
+            async_engine, class_=AsyncSession, sync_session_class=ReplicaSession,
+            autoflush=False, expire_on_commit=False,
+        )],
+        sticky_seconds=settings.READ_YOUR_WRITES_SECONDS,
+        sticky_max_size=100,
+    )
+    cache = MemoryResponseCache(maxsize=100, ttl=60)
+    monkeypatch.setattr(deps, "db_router", router)
+    monkeypatch.setattr(utils, "db_router", router)
+    monkeypatch.setattr(utils, "response_cache", cache)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    return cache
+
+
+def test_replica_reads_do_not_fill_cache_right_after_invalidation(client, make_user, replica_cache):
+    make_user()
+    dog_id = insert_dogs(1)[0]
+    asyncio.run(replica_cache.invalidate())
+
+    # Replika možda još nije primila upis koji je poništio keš
+    assert client.get(f"/api/dogs/{dog_id}").headers["X-Cache"] == "MISS"
+    assert client.get(f"/api/dogs/{dog_id}").headers["X-Cache"] == "MISS"
+
+
+def test_replica_reads_fill_cache_after_lag_window(client, make_user, replica_cache, monkeypatch):
+    make_user()
+    dog_id = insert_dogs(1)[0]
+    asyncio.run(replica_cache.invalidate())
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 0.0)
+
+    assert client.get(f"/api/dogs/{dog_id}").headers["X-Cache"] == "MISS"
+    assert client.get(f"/api/dogs/{dog_id}").headers["X-Cache"] == "HIT"
+
+
+class _UnavailableRedis:
+    """Klijent čiji svaki poziv pada kao kod nedostupnog servera"""
+
+    def __getattr__(self, name):
+        redis = pytest.importorskip("redis")
+
+        def fail(*args, **kwargs):
+            raise redis.ConnectionError("Connection refused")
+        return fail
+
+
+def test_redis_errors_fall_through_to_uncached_response(client, make_user, monkeypatch):
+    pytest.importorskip("redis")
+    cache = RedisResponseCache(_UnavailableRedis(), ttl=60)
+    monkeypatch.setattr(utils, "response_cache", cache)
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    make_user()
+    dog_id = insert_dogs(1)[0]
+
+    response = client.get(f"/api/dogs/{dog_id}")
+    assert response.status_code == 200
+    assert "X-Cache" not in response.headers
+    assert client.get("/api/dogs/").status_code == 200
+    assert cache.errors == 2
+
+
+def test_redis_get_and_set_errors_are_logged_not_raised():
+    pytest.importorskip("redis")
+    from app.core.response_cache import Generation
+
+    cache = RedisResponseCache(_UnavailableRedis(), ttl=60)
+
+    async def scenario():
+        assert await cache.generation() is None
+        assert await cache.get(Generation(1), "k") is None
+        await cache.set(Generation(1), "k", CachedResponse(b"{}"))
+
+    asyncio.run(scenario())
+    assert cache.errors == 3
+
+
+def test_redis_generation_records_invalidation_time():
+    fakeredis = pytest.importorskip("fakeredis.aioredis")
+    cache = RedisResponseCache(fakeredis.FakeRedis(), ttl=60)
+
+    async def scenario():
+        assert await cache.generation() == (0, 0.0)
+        await cache.set(await cache.generation(), "k", CachedResponse(b"{}", '"e"'))
+        assert await cache.get(await cache.generation(), "k") == CachedResponse(b"{}", '"e"')
+        await cache.invalidate()
+        generation = await cache.generation()
+        assert generation.number == 1 and generation.invalidated_at > 0
+        assert await cache.get(generation, "k") is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,39 @@
+"""Pretraga pasa: dijakritici u upitu i u tekstu se izjednačavaju (FTS5 na SQLite-u)"""
+import pytest
+
+from app.db.models import DogStatus
+
+from conftest import insert_dogs
+
+
+def _search(client, q: str) -> list:
+    response = client.get("/api/dogs/search", params={"q": q})
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()["items"]]
+
+
+@pytest.fixture(scope="module")
+def dogs(client):
+    return {
+        "djurdjevak": insert_dogs(1, title="Riđi pas kod Đurđevka")[0],
+        "cupavi": insert_dogs(1, title="Pas", description="Čupavi mešanac, plaši se ćebeta")[0],
+        "removed": insert_dogs(1, status=DogStatus.REMOVED, title="Čupavi Đurđevak uklonjen")[0],
+    }
+
+
+@pytest.mark.parametrize("q", ["Đurđevka", "đurđevka", "djurdjevka", "Djurdjev"])
+def test_dj_matches_both_spellings(client, dogs, q):
+    assert _search(client, q) == [dogs["djurdjevak"]]
+
+
+@pytest.mark.parametrize("q", ["čupavi", "cupavi", "CUPAV", "cebeta mesanac"])
+def test_caron_and_acute_letters_fold_to_plain(client, dogs, q):
+    assert _search(client, q) == [dogs["cupavi"]]
+
+
+def test_ridji_matches_without_diacritics(client, dogs):
+    assert dogs["djurdjevak"] in _search(client, "ridji djurdjevka")
+
+
+def test_query_without_words_is_rejected(client):
+    assert client.get("/api/dogs/search", params={"q": "--- !"}).status_code == 400
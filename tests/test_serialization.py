@@ -0,0 +1,69 @@
+"""dump_json bez validacije daje iste bajtove kao pydantic validacija + dump_json"""
+import asyncio
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.api.api_v1.utils import dog_query, dump_json
+from app.db.database import AsyncSessionLocal, engine
+from app.db.models import Dog, DogStatus
+from app.schemas.dog import (
+    Dog as DogSchema, DogChanges, DogClusterList, DogListPage, DogModerationResult, DogPage,
+    DogStreamEvent,
+)
+
+from conftest import insert_dogs
+
+
+def _validated(schema, obj) -> bytes:
+    adapter = TypeAdapter(schema)
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+def _load(ids: list, detail: bool) -> list:
+    async def load():
+        async with AsyncSessionLocal() as db:
+            return list(await db.scalars(dog_query(detail).where(Dog.id.in_(ids)).order_by(Dog.id)))
+    return asyncio.run(load())
+
+
+@pytest.fixture
+def dog_ids(client, make_user):
+    make_user()
+    ids = insert_dogs(2, images=2) + insert_dogs(1, images=0)
+    # Celobrojne koordinate: float polje ih i dalje ispisuje kao 45.0
+    with engine.begin() as connection:
+        connection.execute(Dog.__table__.update().where(Dog.id == ids[0]).values(latitude=45, description="Opis"))
+    return ids
+
+
+def test_orm_objects_match_validated_dump(dog_ids):
+    detail = _load(dog_ids, detail=True)
+    listed = _load(dog_ids, detail=False)
+
+    assert dump_json(DogSchema, detail[0]) == _validated(DogSchema, detail[0])
+    page = {"items": detail, "next_cursor": "abc"}
+    assert dump_json(DogPage, page) == _validated(DogPage, page)
+    list_page = {"items": listed, "next_cursor": None}
+    assert dump_json(DogListPage, list_page) == _validated(DogListPage, list_page)
+    assert b'"latitude":45.0' in dump_json(DogListPage, list_page)
+
+
+def test_dicts_match_validated_dump(dog_ids):
+    listed = _load(dog_ids, detail=False)
+    changes = {"changed": listed, "deleted": [7, 8], "token": 3, "has_more": False}
+    assert dump_json(DogChanges, changes) == _validated(DogChanges, changes)
+
+    for event in ({"type": "dog.updated", "id": listed[0].id, "dog": listed[0]},
+                  {"type": "dog.deleted", "id": 99, "dog": None}):
+        assert dump_json(DogStreamEvent, event) == _validated(DogStreamEvent, event)
+
+    # not_found ishod nema status - ispisuje se podrazumevani null
+    result = {"updated": 1, "results": [
+        {"id": 1, "result": "updated", "status": DogStatus.CONFIRMED},
+        {"id": 2, "result": "not_found"},
+    ]}
+    assert dump_json(DogModerationResult, result) == _validated(DogModerationResult, result)
+
+    clusters = [{"latitude": 44, "longitude": 20.5, "count": 2, "statuses": {"reported": 2}}]
+    assert dump_json(DogClusterList, clusters) == _validated(DogClusterList, clusters)